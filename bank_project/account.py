@@ -1,5 +1,100 @@
+import calendar
+import threading
+import time
+from collections import namedtuple
+
+from bank_project.money import format_money
+
+# Number of history entries each account keeps in memory (all that is shown)
+HISTORY_CAPACITY = 5
+
+
+# =============================
+# History records
+# =============================
+class HistoryEntry(namedtuple("HistoryEntry", ["type", "amount", "timestamp", "note"])):
+    """
+    One compact history record: (type, amount in cents, unix timestamp, note).
+    Only turned into text when it is displayed.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        parts = []
+        if self.timestamp is not None:
+            parts.append(time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.gmtime(self.timestamp)))
+        parts.append(self.type)
+        if self.amount is not None:
+            parts.append(format_money(self.amount))
+        if self.note:
+            parts.append(self.note)
+        return " | ".join(parts)
+
+    @classmethod
+    def coerce(cls, value):
+        """Accept a stored record (list/tuple) or a legacy free-text line."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return cls("NOTE", None, None, value)
+        return cls(*value)
+
+    @staticmethod
+    def parse_timestamp(text):
+        """SQLite 'YYYY-MM-DD HH:MM:SS' (UTC) -> unix seconds."""
+        return calendar.timegm(time.strptime(text, "%Y-%m-%d %H:%M:%S"))
+
+
+class HistoryRing:
+    """
+    Fixed-capacity ring buffer of history records, oldest first.
+    Once full, each append overwrites the oldest slot in place. Much smaller
+    than a deque, whose minimum block is sized for 64 items.
+    """
+    __slots__ = ("_items", "_start", "_size")
+
+    def __init__(self, entries=(), capacity=HISTORY_CAPACITY):
+        self._items = [None] * capacity
+        self._start = 0
+        self._size = 0
+        for entry in entries:
+            self.append(entry)
+
+    def append(self, entry):
+        capacity = len(self._items)
+        if self._size < capacity:
+            self._items[(self._start + self._size) % capacity] = entry
+            self._size += 1
+        else:
+            self._items[self._start] = entry
+            self._start = (self._start + 1) % capacity
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        capacity = len(self._items)
+        for i in range(self._size):
+            yield self._items[(self._start + i) % capacity]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("history index out of range")
+        return self._items[(self._start + index) % len(self._items)]
+
+    def __repr__(self):
+        return f"HistoryRing({list(self)!r})"
+
+
 class bank:
 
+    # One fixed set of attributes per account: no per-instance __dict__.
+    # __weakref__ lets AccountRepository track objects sessions still hold
+    __slots__ = ("name", "password", "balance", "history", "__weakref__")
+
     # =============================
     # Class-level tracking
     # =============================
@@ -7,26 +102,51 @@ class bank:
     num_bank_acc = 0
     total_bank_balance = 0
 
+    # Guards the shared counters above when accounts are used from several threads
+    _totals_lock = threading.Lock()
+
+    @classmethod
+    def adjust_totals(cls, accounts=0, balance=0):
+        """Atomically update the bank-wide account count and balance."""
+        with cls._totals_lock:
+            cls.num_bank_acc += accounts
+            cls.total_bank_balance += balance
+
     # =============================
     # Account Initialization
     # =============================
     def __init__(self, name, password, initial_balance=0):
 
-        # Store account information
+        # Store account information (balance is integer cents)
         self.name = name
         self.password = password
         self.balance = initial_balance
-        bank.total_bank_balance += initial_balance
 
-        # Track transaction history for this account
-        self.history = []
+        # Track recent transaction history for this account (ring buffer)
+        self.history = HistoryRing()
 
         # Log account creation
         if initial_balance == 0:
-            self.history.append(f"Account created with $0")
+            self._record("ACCOUNT_CREATED", 0)
 
         # Update global bank totals
-        bank.num_bank_acc += 1
+        bank.adjust_totals(accounts=1, balance=initial_balance)
+
+    @classmethod
+    def restore(cls, name, password, balance, history=()):
+        """Rebuild a stored account without counting it as a new one."""
+        acc = cls.__new__(cls)
+        acc.name = name
+        acc.password = password
+        acc.balance = balance
+        acc.set_history(history)
+        return acc
+
+    def set_history(self, entries):
+        self.history = HistoryRing(HistoryEntry.coerce(e) for e in entries)
+
+    def _record(self, tx_type, amount=None, note=None):
+        self.history.append(HistoryEntry(tx_type, amount, int(time.time()), note))
 
     # =============================
     # Account Security
@@ -38,7 +158,7 @@ class bank:
         self.password = new_password
 
         # Record password change in history
-        self.history.append("Security: Password was updated.")
+        self._record("PASSWORD_CHANGE", note="Password was updated.")
 
         return f"Password changed successfully for {self.name}."
 
@@ -51,12 +171,11 @@ class bank:
         # Validate deposit amount
         if amount > 0:
             self.balance += amount
-            bank.total_bank_balance += amount
+            bank.adjust_totals(balance=amount)
 
             # Log successful deposit
-            msg = f"Deposited: ${amount}. New balance: ${self.balance}."
-            self.history.append(msg)
-            return msg
+            self._record("DEPOSIT", amount)
+            return f"Deposited: {format_money(amount)}. New balance: {format_money(self.balance)}."
 
         else:
             return "Deposit amount must be positive."
@@ -70,12 +189,11 @@ class bank:
         if amount > 0:
             if amount <= self.balance:
                 self.balance -= amount
-                bank.total_bank_balance -= amount
+                bank.adjust_totals(balance=-amount)
 
                 # Log successful withdrawal
-                msg = f"Withdrew: ${amount}. New balance: ${self.balance}."
-                self.history.append(msg)
-                return msg
+                self._record("WITHDRAW", amount)
+                return f"Withdrew: {format_money(amount)}. New balance: {format_money(self.balance)}."
             else:
                 return "Insufficient funds."
         else:
@@ -87,14 +205,14 @@ class bank:
     def check_balance(self):
 
         # Return formatted account balance
-        return f"Current balance: ${self.balance}."
+        return f"Current balance: {format_money(self.balance)}."
 
     # =============================
     # Transaction History
     # =============================
     def get_history(self):
 
-        # Return recent transactions only
+        # Return recent transactions only (formatted on demand)
         if not self.history:
             return "No transactions yet."
-        return "\n".join(self.history[-5:])  # Returns the last 5 transactions
+        return "\n".join(str(entry) for entry in self.history)
@@ -0,0 +1,65 @@
+# bank_project/bank_app/archive_transactions.py
+
+import argparse
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services import shard_router
+
+DEFAULT_BATCH_SIZE = 10_000
+
+# Transactions younger than this stay in bank.db
+HOT_WINDOW_DAYS = 365
+
+ArchiveStats = namedtuple("ArchiveStats", ["rows", "periods", "seconds"])
+
+
+def archive(before=None, batch_size=DEFAULT_BATCH_SIZE, vacuum=False, report=print):
+    """
+    Move transactions created before `before` ('YYYY-MM-DD', default
+    HOT_WINDOW_DAYS ago) out of bank.db into one archive file per year,
+    batch_size rows per commit. Safe to interrupt and re-run.
+    History queries still see archived rows.
+    """
+    shard_router.require_unsharded("Archiving")
+    if batch_size < 1:
+        raise ValueError("Batch size must be at least 1.")
+    cutoff = date.fromisoformat(before) if before else date.today() - timedelta(days=HOT_WINDOW_DAYS)
+    db_storage.init_db()
+
+    start = time.perf_counter()
+    moved, periods, last_id = 0, set(), 0
+    while True:
+        batch = db_storage.archive_batch(cutoff.isoformat(), last_id, batch_size)
+        if not batch.rows:
+            break
+        moved += batch.rows
+        periods.update(batch.periods)
+        last_id = batch.last_id
+        report(f"  Archived {moved} rows (up to id {last_id})")
+
+    if vacuum and moved:
+        report("  Compacting bank.db...")
+        db_storage.vacuum()
+
+    stats = ArchiveStats(moved, tuple(sorted(periods)), time.perf_counter() - start)
+    report(f"Archive complete ✅  {stats.rows} rows before {cutoff.isoformat()} "
+           f"into {len(stats.periods)} yearly files in {stats.seconds:.1f}s")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old transactions into yearly archive files")
+    parser.add_argument("--before", help=f"archive rows created before this date "
+                                         f"(YYYY-MM-DD, default {HOT_WINDOW_DAYS} days ago)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--vacuum", action="store_true",
+                        help="compact bank.db afterwards to give the space back")
+    args = parser.parse_args()
+    archive(args.before, args.batch_size, args.vacuum)
+
+
+if __name__ == "__main__":
+    main()
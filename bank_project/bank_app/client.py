@@ -0,0 +1,51 @@
+# bank_project/bank_app/client.py
+
+import argparse
+import asyncio
+
+from bank_project.bank_app.server import PROMPT, DEFAULT_HOST, DEFAULT_PORT
+
+
+async def run_client(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+    """Interactive terminal client for the bank server."""
+    if unix_path:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            text = line.decode().rstrip("\n")
+
+            if not text.startswith(PROMPT):
+                print(text)
+                continue
+
+            # input() blocks, so read the answer on a worker thread
+            answer = await loop.run_in_executor(
+                None, input, text[len(PROMPT):] + " ")
+            writer.write((answer + "\n").encode())
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bank server client")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="connect to a Unix socket path instead of TCP")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run_client(args.host, args.port, args.unix))
+    except (KeyboardInterrupt, EOFError):
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# bank_project/bank_app/end_of_day.py
+
+import argparse
+import calendar
+import time
+from collections import namedtuple
+from datetime import date
+
+from bank_project.account import bank
+from bank_project.money import format_money
+from bank_project.bank_app.services import storage as json_storage
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services import shard_router
+
+InterestTier = namedtuple("InterestTier", ["min_balance", "annual_bps"])
+
+# Daily interest: each balance earns the rate of the highest tier it
+# reaches (annual rate in basis points, balances in cents)
+INTEREST_TIERS = (
+    InterestTier(1_000_00, 50),
+    InterestTier(10_000_00, 100),
+    InterestTier(100_000_00, 200),
+)
+
+# Maintenance fee, charged on the last business day of each month to
+# balances below the waiver threshold
+MONTHLY_FEE = 4_00
+FEE_WAIVER_BALANCE = 500_00
+
+
+def is_month_end(day):
+    return day.day == calendar.monthrange(day.year, day.month)[1]
+
+
+def run_end_of_day(business_date=None, accounts=None, mirror=True, report=print):
+    """
+    Nightly batch, safe to re-run for the same date:
+    - Post interest (and fees at month end) for every account in SQLite
+      with set-based statements, all in one transaction
+    - Refresh `accounts` (a dict or AccountRepository already in memory)
+    - Bring the JSON mirror's balances up to date when it exists
+
+    The app and server cache balances and would write them back over the
+    postings, so this refuses (ValueError) while another process has the
+    bank open; stop the server first. Sharded storage is not supported. An app calling it for itself passes
+    its own `accounts` and must flush pending writes before the call.
+    Returns the EodRun, or None when the date had already been posted.
+    """
+    shard_router.require_unsharded("End of day")
+    day = date.fromisoformat(business_date) if business_date else date.today()
+    db_storage.init_db()
+
+    with db_storage.exclusive_use("end of day"):
+        return _post(day, accounts, mirror, report)
+
+
+def _post(day, accounts, mirror, report):
+    start = time.perf_counter()
+    run = db_storage.post_end_of_day(
+        day.isoformat(), INTEREST_TIERS,
+        MONTHLY_FEE if is_month_end(day) else 0, FEE_WAIVER_BALANCE)
+    if run is None:
+        report(f"End of day {day.isoformat()} was already posted. Nothing to do.")
+        return None
+
+    report(f"  Interest: {run.interest_accounts} accounts, {format_money(run.interest_cents)}")
+    report(f"  Fees: {run.fee_accounts} accounts, {format_money(run.fee_cents)}")
+    report(f"  Posted in {time.perf_counter() - start:.2f}s")
+
+    if accounts is not None:
+        refresh_accounts(accounts)
+    if mirror and json_storage.DATA_FILE.exists():
+        sync_mirror_balances()
+
+    report(f"End of day {day.isoformat()} complete ✅")
+    return run
+
+
+def refresh_accounts(accounts):
+    """Re-read balances and recent history for accounts already held in memory."""
+    if hasattr(accounts, "invalidate"):
+        # Repository: drop clean entries, they reload from SQLite on next use
+        accounts.invalidate()
+    else:
+        balances = db_storage.load_balances()
+        histories = db_storage.load_recent_histories()
+        for name, acc in accounts.items():
+            if name in balances:
+                acc.balance = balances[name]
+                acc.set_history(histories.get(name, ()))
+    bank.num_bank_acc, bank.total_bank_balance = db_storage.load_totals()
+
+
+def sync_mirror_balances():
+    """Rewrite accounts.json with the balances now stored in SQLite."""
+    balances = db_storage.load_balances()
+
+    def with_balance(name, info):
+        if name not in balances:
+            return info
+        acc = json_storage.restore_account(info)
+        acc.balance = balances[name]
+        return json_storage.serialize_account(acc)
+
+    json_storage.rewrite_snapshot(with_balance)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Post nightly interest and fees to bank.db")
+    parser.add_argument("--date", help="business date to post (YYYY-MM-DD, default today)")
+    parser.add_argument("--no-mirror", action="store_true",
+                        help="leave accounts.json for the app to re-sync")
+    args = parser.parse_args()
+    run_end_of_day(args.date, mirror=not args.no_mirror)
+
+
+if __name__ == "__main__":
+    main()
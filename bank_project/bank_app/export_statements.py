@@ -0,0 +1,355 @@
+# bank_project/bank_app/export_statements.py
+
+import argparse
+import csv
+import hashlib
+import multiprocessing
+import operator
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import repeat
+from pathlib import Path
+
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services import shard_router
+
+# Ledger rows fetched, encoded and written per step of the pipeline
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Per-account fan-out: worker processes, and accounts handed to a worker
+# per task (enough to amortise the round trip to the pool)
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+ACCOUNTS_PER_TASK = 200
+
+ExportStats = namedtuple("ExportStats", ["files", "rows", "seconds"])
+
+
+# =============================
+# Reading
+# =============================
+
+def iter_statement_chunks(columns, account_names=None, since=None, until=None,
+                          tx_types=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Yield lists of ledger row tuples (`columns` are db_storage.LEDGER_COLUMNS
+    keys), account by account in ledger order. SQLite steps the cursor only
+    as chunks are pulled, so one chunk is in memory at a time.
+    """
+    filters = {"since": since, "until": until, "tx_types": tx_types}
+    if account_names is None:
+        yield from db_storage.iter_ledger(columns, chunk_rows, **filters)
+        return
+    for name in account_names:
+        yield from db_storage.iter_ledger(columns, chunk_rows, account_name=name, **filters)
+
+
+# =============================
+# CSV
+# =============================
+
+CSV_COLUMNS = ("id", "account_name", "type", "amount", "note", "created_at")
+CSV_HEADER = ("id", "account", "type", "amount_cents", "note", "created_at")
+
+
+def write_csv(path, chunks):
+    """Write chunks of CSV_COLUMNS rows under a header; returns rows written."""
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+    return rows
+
+
+# =============================
+# Binary columnar format (.bcol)
+# =============================
+# Little-endian and written block by block (one block per chunk), so neither
+# the writer nor the reader holds more than one chunk:
+#   header  MAGIC, u16 column count, then per column: u8 kind, u8 name length, name
+#   block   u32 row count (0 ends the file), then per column a null bitmap
+#           (1 bit per row, LSB first) followed by
+#             kind q (int64)  one int64 per row (0 where null)
+#             kind t (text)   u32 dictionary size, each entry as u32 length +
+#                             UTF-8 bytes, then one dictionary code per row as
+#                             u8, u16 or u32 (the smallest that fits)
+# Timestamps are stored as int64 unix seconds.
+
+MAGIC = b"BANKCOL1"
+
+COLUMNAR_SCHEMA = (
+    ("id", "q"),
+    ("account_name", "t"),
+    ("type", "t"),
+    ("amount", "q"),
+    ("note", "t"),
+    ("created_ts", "q"),
+)
+COLUMNAR_COLUMNS = tuple(name for name, _ in COLUMNAR_SCHEMA)
+
+
+def _le_bytes(values):
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _code_type(size):
+    return "B" if size <= 0xFF else "H" if size <= 0xFFFF else "I"
+
+
+_BIT_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def _null_bitmap(values):
+    size = (len(values) + 7) // 8
+    if None not in values:
+        return bytes(size)
+    # One 0/1 byte per row, read back to front as a base-2 number: bit i is row i
+    flags = bytes(map(operator.is_, values, repeat(None)))
+    return int(flags[::-1].translate(_BIT_DIGITS), 2).to_bytes(size, "little")
+
+
+def _encode_column(kind, values):
+    parts = [_null_bitmap(values)]
+    if kind == "q":
+        if None in values:
+            values = [value or 0 for value in values]
+        parts.append(_le_bytes(array("q", values)))
+        return b"".join(parts)
+
+    # Dictionary in first-seen order; a null gets an (unused) empty entry
+    codes = {value: code for code, value in enumerate(dict.fromkeys(values))}
+    parts.append(struct.pack("<I", len(codes)))
+    for text in codes:
+        encoded = (text or "").encode("utf-8")
+        parts.append(struct.pack("<I", len(encoded)))
+        parts.append(encoded)
+    parts.append(_le_bytes(array(_code_type(len(codes)), map(codes.__getitem__, values))))
+    return b"".join(parts)
+
+
+def write_columnar(path, chunks):
+    """Write chunks of COLUMNAR_COLUMNS rows as .bcol blocks; returns rows written."""
+    rows = 0
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<H", len(COLUMNAR_SCHEMA)))
+        for name, kind in COLUMNAR_SCHEMA:
+            encoded = name.encode("ascii")
+            f.write(kind.encode("ascii") + struct.pack("<B", len(encoded)) + encoded)
+
+        for chunk in chunks:
+            f.write(struct.pack("<I", len(chunk)))
+            for (_, kind), values in zip(COLUMNAR_SCHEMA, zip(*chunk)):
+                f.write(_encode_column(kind, values))
+            rows += len(chunk)
+        f.write(struct.pack("<I", 0))
+    return rows
+
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError(f"Truncated columnar file: {f.name}")
+    return data
+
+
+def _decode_column(f, kind, rows):
+    bitmap = _read_exact(f, (rows + 7) // 8)
+    if kind == "q":
+        values = _from_le("q", _read_exact(f, rows * 8)).tolist()
+    else:
+        (size,) = struct.unpack("<I", _read_exact(f, 4))
+        dictionary = []
+        for _ in range(size):
+            (length,) = struct.unpack("<I", _read_exact(f, 4))
+            dictionary.append(_read_exact(f, length).decode("utf-8"))
+        code_type = _code_type(size)
+        codes = _from_le(code_type, _read_exact(f, rows * array(code_type).itemsize))
+        values = [dictionary[code] for code in codes]
+
+    if any(bitmap):
+        for i in range(rows):
+            if bitmap[i >> 3] >> (i & 7) & 1:
+                values[i] = None
+    return values
+
+
+def read_columnar(path):
+    """Yield one {column name: list of values} dict per block of a .bcol file."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a columnar statement file: {path}")
+        (count,) = struct.unpack("<H", _read_exact(f, 2))
+        schema = []
+        for _ in range(count):
+            kind, length = struct.unpack("<cB", _read_exact(f, 2))
+            schema.append((_read_exact(f, length).decode("ascii"), kind.decode("ascii")))
+
+        while True:
+            (rows,) = struct.unpack("<I", _read_exact(f, 4))
+            if rows == 0:
+                return
+            yield {name: _decode_column(f, kind, rows) for name, kind in schema}
+
+
+# =============================
+# Export
+# =============================
+
+FORMATS = {
+    # format: (columns pulled from the ledger, writer, file suffix)
+    "csv": (CSV_COLUMNS, write_csv, ".csv"),
+    "bcol": (COLUMNAR_COLUMNS, write_columnar, ".bcol"),
+}
+
+
+def _format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'.")
+    return FORMATS[fmt]
+
+
+def export_statements(path, fmt="csv", account_names=None, since=None, until=None,
+                      tx_types=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Stream matching ledger rows into one file. Covers every account, or only
+    `account_names` (in that order); `since` / `until` are inclusive
+    'YYYY-MM-DD' dates. Returns the number of rows written.
+    """
+    shard_router.require_unsharded("Statement export")
+    columns, writer, _ = _format(fmt)
+    return writer(path, iter_statement_chunks(
+        columns, account_names, since, until, tx_types, chunk_rows))
+
+
+def statement_file_name(account_name, fmt):
+    """File name for one account's statement, safe on any filesystem."""
+    safe = re.sub(r"[^\w.-]", "_", account_name)
+    if safe != account_name:
+        # Keep names that only differ in replaced characters apart
+        safe += "-" + hashlib.sha1(account_name.encode("utf-8")).hexdigest()[:8]
+    return safe + FORMATS[fmt][2]
+
+
+def _export_accounts(db_file, out_dir, fmt, names, filters, chunk_rows):
+    # Runs in a worker process, which starts without the parent's settings
+    db_storage.DB_FILE = db_file
+    rows = 0
+    for name in names:
+        rows += export_statements(
+            Path(out_dir) / statement_file_name(name, fmt), fmt, [name],
+            chunk_rows=chunk_rows, **filters)
+    return len(names), rows
+
+
+def _batches(names, size):
+    batch = []
+    for name in names:
+        batch.append(name)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_per_account(out_dir, fmt="csv", account_names=None, since=None, until=None,
+                       tx_types=None, workers=DEFAULT_WORKERS, chunk_rows=DEFAULT_CHUNK_ROWS,
+                       report=print):
+    """
+    Write one statement file per account into `out_dir`, fanned out over
+    `workers` processes (inline when workers <= 1). Only a few batches of
+    account names are in flight at once. Returns ExportStats.
+    """
+    shard_router.require_unsharded("Statement export")
+    _format(fmt)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    filters = {"since": since, "until": until, "tx_types": tx_types}
+    names = account_names if account_names is not None else db_storage.iter_account_names()
+    batches = _batches(names, ACCOUNTS_PER_TASK)
+    files = rows = 0
+    start = time.perf_counter()
+
+    def progress(done_files, done_rows):
+        nonlocal files, rows
+        files += done_files
+        rows += done_rows
+        report(f"  {files} statements, {rows} rows, "
+               f"{rows / (time.perf_counter() - start):,.0f} rows/s")
+
+    if workers <= 1:
+        for batch in batches:
+            progress(*_export_accounts(
+                db_storage.DB_FILE, out_dir, fmt, batch, filters, chunk_rows))
+        return ExportStats(files, rows, time.perf_counter() - start)
+
+    # Workers read the database file directly, so pending group commits
+    # must be on disk first
+    db_storage.flush_group()
+    # "spawn": forking a multi-threaded process is unsafe
+    with ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = set()
+        for batch in batches:
+            pending.add(pool.submit(
+                _export_accounts, db_storage.DB_FILE, out_dir, fmt, batch, filters, chunk_rows))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    progress(*future.result())
+        for future in pending:
+            progress(*future.result())
+    return ExportStats(files, rows, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export account statements from bank.db")
+    parser.add_argument("out", help="output file, or directory with --per-account")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+    parser.add_argument("--account", action="append", dest="accounts",
+                        help="account to include (repeatable, default all)")
+    parser.add_argument("--since", help="first day to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last day to include (YYYY-MM-DD)")
+    parser.add_argument("--type", action="append", dest="tx_types",
+                        help="transaction type to include (repeatable, default all)")
+    parser.add_argument("--per-account", action="store_true",
+                        help="write one file per account into the output directory")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    shard_router.require_unsharded("Statement export")
+    db_storage.init_db()
+    filters = {"since": args.since, "until": args.until, "tx_types": args.tx_types}
+    if args.per_account:
+        stats = export_per_account(args.out, args.format, args.accounts, workers=args.workers,
+                                   chunk_rows=args.chunk_rows, **filters)
+        print(f"Export complete ✅  {stats.files} statements, {stats.rows} rows "
+              f"in {stats.seconds:.1f}s")
+    else:
+        start = time.perf_counter()
+        rows = export_statements(args.out, args.format, args.accounts,
+                                 chunk_rows=args.chunk_rows, **filters)
+        print(f"Export complete ✅  {rows} rows in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
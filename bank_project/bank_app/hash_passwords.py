@@ -0,0 +1,78 @@
+# bank_project/bank_app/hash_passwords.py
+
+import argparse
+import time
+
+from bank_project.bank_app.services import storage as json_storage
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services import shard_router
+from bank_project.bank_app.services.passwords import (
+    PasswordHasher, ScryptParams, DEFAULT_PARAMS, is_hashed)
+
+# Accounts hashed per round trip to the worker pool (and per SQLite transaction)
+DEFAULT_BATCH_SIZE = 1000
+
+
+def hash_existing_passwords(batch_size=DEFAULT_BATCH_SIZE, hasher=None, report=print,
+                            db=db_storage):
+    """
+    One-time migration, safe to re-run:
+    - Hash every plaintext password in SQLite (bank.db, or the shards behind
+      a ShardRouter `db`) in parallel batches
+    - Rewrite the JSON mirror (accounts.json) with the stored hashes
+    Returns the number of accounts updated in SQLite.
+    """
+    hasher = hasher or PasswordHasher()
+    db.init_db()
+
+    updated = 0
+    after = ""
+    start = time.perf_counter()
+
+    while True:
+        rows = db.plaintext_passwords(after, batch_size)
+        if not rows:
+            break
+        after = rows[-1][0]
+
+        hashes = hasher.hash_many(password for _, password in rows)
+        updated += db.replace_passwords(
+            [(hashed, name, password) for (name, password), hashed in zip(rows, hashes)])
+
+        elapsed = time.perf_counter() - start
+        report(f"  {updated} passwords hashed, {updated / elapsed:,.1f} hashes/s")
+
+    # The mirror must not keep plaintext copies around
+    def mirror_password(name, info):
+        stored = db.load_password(name)
+        if stored is not None:
+            info["password"] = stored
+        elif not is_hashed(info["password"]):
+            info["password"] = hasher.hash(info["password"])
+        return info
+
+    json_storage.rewrite_snapshot(mirror_password)
+
+    report(f"Password migration complete ✅  Hashed {updated} accounts.")
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash plaintext passwords in bank.db and accounts.json")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--scrypt-n", type=int, default=DEFAULT_PARAMS.n)
+    parser.add_argument("--scrypt-r", type=int, default=DEFAULT_PARAMS.r)
+    parser.add_argument("--scrypt-p", type=int, default=DEFAULT_PARAMS.p)
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(ScryptParams(args.scrypt_n, args.scrypt_r, args.scrypt_p))
+    # BANK_SHARDS=N migrates the shard files instead of bank.db
+    db = shard_router.open_backend()
+    try:
+        hash_existing_passwords(args.batch_size, hasher, db=db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,16 @@
-from bank_project.account import bank
+from datetime import date, timedelta
+
+try:
+    import readline     # Tab completion of recipient names; missing on Windows
+except ImportError:
+    readline = None
+
+from bank_project.money import format_money, parse_amount
 from bank_project.bank_app.services import storage
+from bank_project.bank_app.services import metrics
+from bank_project.bank_app.services import analytics
+from bank_project.bank_app.services import shard_router
+from bank_project.bank_app.services import db_storage
 from bank_project.bank_app.services.storage import save_data, load_data
 from bank_project.bank_app.services.bank_service import BankService
 from bank_project.bank_app.services.dual_storage import DualStorage
@@ -26,6 +37,149 @@ ACCOUNT_ACTIONS = {
 }
 
 
+# Ledger rows shown per page in "check history"
+HISTORY_PAGE_SIZE = 10
+
+# Days covered by the dev-mode "check daily activity" report
+DAILY_ACTIVITY_DAYS = 7
+
+# Accounts listed by the dev-mode "check analytics" volume ranking
+TOP_ACCOUNTS_SHOWN = 10
+
+DEV_PROMPT = ("what would you like to do check number of accounts, check total bank balance, "
+              "check daily activity, check analytics, find accounts, verify totals, verify mirror, "
+              "check mirror lag, enable metrics, disable metrics, show metrics, export metrics, or quit?")
+
+# Default file for the dev-mode "export metrics" text dump
+METRICS_EXPORT_FILE = "bank_metrics.txt"
+
+# Typing a name prefix followed by this at the recipient prompt lists matches
+SEARCH_SUFFIX = "?"
+
+# Account names listed by recipient search and "find accounts"
+NAME_MATCHES_SHOWN = 10
+
+RECIPIENT_PROMPT = f"Enter recipient account holder name (end with {SEARCH_SUFFIX} to search):"
+
+
+# =============================
+# Dev Reports
+# =============================
+
+def daily_activity_lines(storage, days=DAILY_ACTIVITY_DAYS):
+    """Per-day, per-type transaction counts and volumes for the last `days` days."""
+    since = (date.today() - timedelta(days=days - 1)).isoformat()
+    stats = storage.daily_stats(since=since)
+    if not stats:
+        return [f"No transactions in the last {days} days."]
+    return [f"{s.day} {s.type}: {s.tx_count} transactions, {format_money(s.volume_cents)}"
+            for s in stats]
+
+
+def mirror_lines(storage):
+    """Accounts whose JSON mirror record no longer matches SQLite."""
+    problems = storage.verify_mirror()
+    if not problems:
+        return ["Mirror verified: accounts.json matches bank.db."]
+    return [f"{len(problems)} accounts out of sync:"] + [
+        f"  {p.name}: {p.problem}" for p in problems]
+
+
+def analytics_lines(storage, account_name, top_n=TOP_ACCOUNTS_SHOWN):
+    """Monthly statements for one account plus the bank's top accounts by volume."""
+    try:
+        statements = analytics.monthly_statements(account_name, db=storage.db)
+        top = analytics.top_accounts(top_n, db=storage.db)
+    except ImportError as e:
+        return [str(e)]
+
+    lines = [f"Monthly statements for {account_name}:"]
+    lines += [f"  {s.month}: opening {format_money(s.opening)}, in {format_money(s.credits)}, "
+              f"out {format_money(s.debits)}, closing {format_money(s.closing)} "
+              f"({s.tx_count} transactions)" for s in statements] or ["  No transactions yet."]
+    lines.append(f"Top {top_n} accounts by volume:")
+    lines += [f"  {i}. {t.account}: {format_money(t.volume)} over {t.tx_count} transactions"
+              for i, t in enumerate(top, 1)]
+    return lines
+
+
+# =============================
+# Recipient Search
+# =============================
+
+def name_matches_lines(service, prefix, limit=NAME_MATCHES_SHOWN):
+    """Account names starting with `prefix`, for the recipient prompt and dev search."""
+    names = service.find_accounts(prefix, limit)
+    if not names:
+        return [f"No accounts start with '{prefix}'."]
+    return [f"Accounts starting with '{prefix}': {', '.join(names)}"]
+
+
+def ask_recipient(service):
+    """Read a recipient name; 'prefix?' lists matching accounts and asks again."""
+    def complete(text, state):
+        matches = service.find_accounts(text, NAME_MATCHES_SHOWN)
+        return matches[state] if state < len(matches) else None
+
+    if readline is not None:
+        readline.set_completer(complete)
+        readline.parse_and_bind("tab: complete")
+    try:
+        while True:
+            name = input(RECIPIENT_PROMPT + " ").strip()
+            if not name.endswith(SEARCH_SUFFIX):
+                return name
+            print("\n".join(name_matches_lines(service, name[:-len(SEARCH_SUFFIX)])))
+    finally:
+        if readline is not None:
+            readline.set_completer(None)
+
+
+# =============================
+# History Paging
+# =============================
+
+def parse_date(text):
+    """Return a 'YYYY-MM-DD' string, None for blank input, or raise ValueError."""
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        return date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise ValueError("Dates must look like YYYY-MM-DD.")
+
+
+def show_history(storage, account_name):
+    """Page through an account's ledger, newest first, with optional filters."""
+    tx_type = input(
+        "Filter by type (e.g. DEPOSIT) or press Enter for all: ").strip().upper()
+    since = parse_date(input("From date (YYYY-MM-DD) or press Enter: "))
+    until = parse_date(input("To date (YYYY-MM-DD) or press Enter: "))
+
+    print("\n--- Transaction History ---")
+    before_id = None
+    shown = 0
+
+    while True:
+        rows, before_id = storage.history_page(
+            account_name, before_id, HISTORY_PAGE_SIZE,
+            tx_types=[tx_type] if tx_type else None, since=since, until=until)
+
+        for row in rows:
+            print(row)
+        shown += len(rows)
+
+        if before_id is None:
+            break
+        more = input("Type more for older transactions or press Enter to stop: ")
+        if more.strip().lower() != "more":
+            break
+
+    if shown == 0:
+        print("No transactions yet.")
+
+
 # =============================
 # App Startup
 # =============================
@@ -35,9 +189,11 @@ def main():
     """Main entry point for the Bank Management System."""
 
     # Load existing accounts from file (if any)
-    storage = DualStorage()
-    accounts = storage.load_accounts()   # loads from SQLite, mirrors JSON snapshot
-    service = BankService(accounts)
+    # BANK_SHARDS=N spreads accounts over N SQLite files instead of bank.db
+    db_storage.mark_in_use()   # nightly jobs refuse to run under us
+    storage = DualStorage(mirror="journal", write_behind=True, db=shard_router.open_backend())
+    accounts = storage.open_accounts()   # lazily loads from SQLite, LRU-cached
+    service = BankService(accounts, storage)
 
     # =============================
     # Main Menu Loop (Create / Login / Exit)
@@ -58,7 +214,8 @@ def main():
         # Exit program safely
         # -------------------------
         if action == "done":
-            storage.save_all(service.accounts)
+            storage.flush(service.accounts, service.take_dirty())
+            storage.close()
             print("THANK YOU FOR USING THE BANK ACCOUNT APP")
             break
 
@@ -72,7 +229,7 @@ def main():
             # Create the account object and save immediately
             try:
                 service.create_account(name, password)
-                storage.save_all(service.accounts)
+                storage.flush(service.accounts, service.take_dirty())
                 storage.log_tx(name, "ACCOUNT_CREATED",
                                note="New account created")
                 print("Account created successfully!")
@@ -90,6 +247,8 @@ def main():
             # Check username exists and password matches
             try:
                 current_account = service.login(name, password)
+                # Login may have upgraded the stored password hash
+                storage.flush(service.accounts, service.take_dirty())
                 print("Access granted.")
             except ValueError as e:
                 print(e)
@@ -121,11 +280,11 @@ def main():
                     case "deposit":
 
                         try:
-                            amount = float(input("Enter amount to deposit: "))
+                            amount = parse_amount(input("Enter amount to deposit: "))
                             print(service.deposit(current_account, amount))
                             storage.log_tx(current_account.name,
                                            "DEPOSIT", amount)
-                            storage.save_all(service.accounts)
+                            storage.flush(service.accounts, service.take_dirty())
                         except ValueError as e:
                             print(e)
 
@@ -139,11 +298,11 @@ def main():
                     case "withdraw":
 
                         try:
-                            amount = float(input("Enter amount to withdraw: "))
+                            amount = parse_amount(input("Enter amount to withdraw: "))
                             print(service.withdraw(current_account, amount))
                             storage.log_tx(current_account.name,
                                            "WITHDRAW", amount)
-                            storage.save_all(service.accounts)
+                            storage.flush(service.accounts, service.take_dirty())
 
                         except ValueError as e:
                             print(e)
@@ -162,11 +321,11 @@ def main():
 
                         new_password = input(
                             "Enter new password: ").strip()
-                        print(current_account.change_accout_password(
-                            new_password))
+                        print(service.change_password(
+                            current_account, new_password))
                         storage.log_tx(
                             current_account.name, "PASSWORD_CHANGE", note="Password updated")
-                        storage.save_all(service.accounts)
+                        storage.flush(service.accounts, service.take_dirty())
 
                     # -------------------------
                     # Delete account (only if balance is zero)
@@ -188,7 +347,7 @@ def main():
                                 deleted_name, service.accounts)
                             storage.log_tx(
                                 deleted_name, "ACCOUNT_DELETED", note="Account deleted")
-                            storage.save_all(service.accounts)
+                            storage.flush(service.accounts, service.take_dirty())
 
                             print(
                                 f"\nSUCCESS: Account for {current_account.name} has been closed and deleted.")
@@ -200,26 +359,23 @@ def main():
                     # View transaction history
                     # -------------------------
                     case "check history":
-                        print("\n--- Transaction History ---")
-                        print(current_account.get_history())
+                        try:
+                            show_history(storage, current_account.name)
+                        except ValueError as e:
+                            print(e)
 
                     # -------------------------
                     # Transfer money to another user
                     # -------------------------
                     case "transfer":
 
-                        recipient_name = input(
-                            "Enter recipient account holder name: ").strip()
+                        recipient_name = ask_recipient(service)
 
                         try:
-                            amount = float(input("Enter amount to transfer: "))
+                            amount = parse_amount(input("Enter amount to transfer: "))
+                            # Balances and ledger rows are committed together by the service
                             print(service.transfer(
                                 current_account, recipient_name, amount))
-                            storage.log_tx(
-                                current_account.name, "TRANSFER_OUT", amount, f"to {recipient_name}")
-                            storage.log_tx(
-                                recipient_name, "TRANSFER_IN", amount, f"from {current_account.name}")
-                            storage.save_all(service.accounts)
 
                         except ValueError as e:
                             print(e)
@@ -238,16 +394,63 @@ def main():
                         while True:
 
                             dev_action = input(
-                                "what would you like to do check number of accounts, check total bank balance, or quit? ").strip().lower()
+                                DEV_PROMPT + " ").strip().lower()
 
                             match dev_action:
+                                # Totals come from the SQLite summary row (O(1))
                                 case "check number of accounts":
-                                    print(
-                                        f"Total bank accounts: {bank.num_bank_acc}")
+                                    count, _ = storage.totals()
+                                    print(f"Total bank accounts: {count}")
 
                                 case "check total bank balance":
+                                    _, total = storage.totals()
+                                    print(
+                                        f"Total bank balance across all accounts: {format_money(total)}")
+
+                                case "check daily activity":
+                                    print("\n".join(daily_activity_lines(storage)))
+
+                                case "check analytics":
+                                    print("\n".join(analytics_lines(storage, current_account.name)))
+
+                                case "find accounts":
+                                    prefix = input("Name prefix: ").strip()
+                                    print("\n".join(name_matches_lines(service, prefix)))
+
+                                case "verify totals":
+                                    problems = storage.verify_totals()
+                                    if not problems:
+                                        print("Totals verified: summary matches the ledger.")
+                                        continue
+                                    print("\n".join(problems))
+                                    if input("Type repair to rebuild the summary or press Enter: ").strip().lower() == "repair":
+                                        storage.verify_totals(repair=True)
+                                        print("Summary rebuilt.")
+
+                                case "verify mirror":
+                                    print("\n".join(mirror_lines(storage)))
+
+                                case "check mirror lag":
+                                    lag = storage.mirror_lag()
+                                    print(
+                                        f"JSON mirror: {lag['pending']} pending writes, {lag['lag_seconds']:.3f}s behind SQLite")
+
+                                case "enable metrics":
+                                    metrics.enable()
+                                    print("Metrics enabled.")
+
+                                case "disable metrics":
+                                    metrics.disable()
+                                    print("Metrics disabled.")
+
+                                case "show metrics":
+                                    print(metrics.report())
+
+                                case "export metrics":
+                                    path = input(
+                                        f"Export file (Enter for {METRICS_EXPORT_FILE}): ").strip()
                                     print(
-                                        f"Total bank balance across all accounts: ${bank.total_bank_balance}")
+                                        f"Metrics written to {metrics.export(path or METRICS_EXPORT_FILE)}")
 
                                 case "quit":
                                     print("Exiting developer mode.")
@@ -261,7 +464,7 @@ def main():
                     # -------------------------
                     case "exit":
                         print("Exiting account management.")
-                        storage.save_all(service.accounts)
+                        storage.flush(service.accounts, service.take_dirty())
                         break
 
                     case _:
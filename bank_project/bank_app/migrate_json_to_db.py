@@ -1,47 +1,106 @@
 # bank_project/bank_app/migrate_json_to_db.py
 
+import argparse
+import time
+from collections import namedtuple
+
 from bank_project.bank_app.services import storage as json_storage
 from bank_project.bank_app.services import db_storage
 
+# Accounts written per SQLite transaction (and per checkpoint)
+DEFAULT_BATCH_SIZE = 5000
+
+MigrationStats = namedtuple("MigrationStats", ["accounts", "history_rows", "seconds"])
 
-def migrate():
-    """
-    One-time migration:
-    - Load accounts from JSON (accounts.json)
-    - Upsert into SQLite (bank.db)
-    - Also migrate last 5 history lines into transactions table (optional)
-    """
 
-    # Load from JSON
-    accounts = json_storage.load_data()
+def _fingerprint(paths):
+    # A changed snapshot or journal invalidates the saved resume position:
+    # journaled accounts are read after the snapshot, so appending to the
+    # journal can shift which account a position points at
+    stats = [path.stat() if path.exists() else None for path in paths]
+    return ",".join(f"{stat.st_size}:{stat.st_mtime_ns}" if stat else "missing"
+                    for stat in stats)
 
-    if not accounts:
-        print("No accounts found in JSON. Nothing to migrate.")
-        return
+
+def migrate(batch_size=DEFAULT_BATCH_SIZE, restart=False, report=print):
+    """
+    One-time migration, safe to interrupt and re-run:
+    - Stream accounts from JSON (accounts.json + journal), one object at a time
+    - Upsert into SQLite (bank.db) in batches, one transaction per batch
+    - Replace each account's MIGRATED_HISTORY rows with its in-memory history
+    - Save a checkpoint with every batch so an interrupted run resumes
+    """
+    source = str(json_storage.DATA_FILE.resolve())
+    fingerprint = _fingerprint(json_storage.mirror_files())
 
     # Ensure DB is ready
     db_storage.init_db()
 
-    migrated_count = 0
+    checkpoint = None if restart else db_storage.load_checkpoint(source)
+    if checkpoint and checkpoint.fingerprint != fingerprint:
+        report("Accounts changed since the last run; starting over.")
+        checkpoint = None
+    skip = checkpoint.position if checkpoint else 0
+    history_before = history_total = checkpoint.history_rows if checkpoint else 0
+    if skip:
+        report(f"Resuming after {skip} accounts.")
+
+    position = 0
+    written_rows = 0
+    batch, history_rows = [], []
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal written_rows, history_total
+        db_storage.import_batch(
+            batch, "MIGRATED_HISTORY", history_rows, source,
+            db_storage.Checkpoint(
+                fingerprint, position, history_total + len(history_rows)))
+        history_total += len(history_rows)
+        written_rows += len(batch) + len(history_rows)
+        elapsed = time.perf_counter() - start
+        report(f"  {position} accounts, {written_rows} rows written, "
+               f"{written_rows / elapsed:,.0f} rows/s")
+        batch.clear()
+        history_rows.clear()
+
+    for name, info in json_storage.iter_data():
+        position += 1
+        if position <= skip:
+            continue
+
+        acc = json_storage.restore_account(info)
+        batch.append(acc)
+
+        # Keep the in-memory history as a readable record of the account
+        history_rows.extend(
+            (name, "MIGRATED_HISTORY", None, str(entry)) for entry in acc.history)
+
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
 
-    for name, acc in accounts.items():
-        # Upsert account into DB (safe to run multiple times)
-        db_storage.upsert_account(acc)
-        migrated_count += 1
+    if position == 0:
+        report("No accounts found in JSON. Nothing to migrate.")
+    else:
+        report(
+            f"Migration complete ✅  Migrated/updated {position} accounts into SQLite.")
+    # Counts cover this run only
+    return MigrationStats(
+        max(position - skip, 0), history_total - history_before,
+        time.perf_counter() - start)
 
-        # OPTIONAL: migrate history strings into DB transactions table
-        # (not perfect parsing, but keeps a record)
-        for entry in acc.history[-5:]:
-            db_storage.log_transaction(
-                account_name=name,
-                tx_type="MIGRATED_HISTORY",
-                amount=None,
-                note=str(entry)
-            )
 
-    print(
-        f"Migration complete ✅  Migrated/updated {migrated_count} accounts into SQLite.")
+def main():
+    parser = argparse.ArgumentParser(description="Migrate accounts.json into bank.db")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore any saved checkpoint and start from the first account")
+    args = parser.parse_args()
+    migrate(args.batch_size, args.restart)
 
 
 if __name__ == "__main__":
-    migrate()
+    main()
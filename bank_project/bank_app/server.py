@@ -0,0 +1,359 @@
+# bank_project/bank_app/server.py
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from bank_project.bank_app.main import (
+    MAIN_ACTIONS, ACCOUNT_ACTIONS, HISTORY_PAGE_SIZE, METRICS_EXPORT_FILE,
+    RECIPIENT_PROMPT, SEARCH_SUFFIX,
+    analytics_lines, daily_activity_lines, mirror_lines, name_matches_lines, parse_date)
+from bank_project.bank_app.services.account_repository import DEFAULT_CACHE_SIZE
+from bank_project.bank_app.services.bank_service import BankService
+from bank_project.bank_app.services.dual_storage import DualStorage
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services import metrics
+from bank_project.bank_app.services import shard_router
+from bank_project.money import format_money, parse_amount
+
+# =============================
+# Wire protocol
+# =============================
+# Plain UTF-8 text, one line per message. Lines starting with PROMPT are
+# questions; the client answers each one with a single line. Everything
+# else is output to show the user.
+PROMPT = "? "
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 32
+
+
+class SessionClosed(Exception):
+    """The client disconnected mid-conversation."""
+
+
+class Session:
+    """One connected teller: the same menus as main(), over a socket."""
+
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.service = server.service
+        self.reader = reader
+        self.writer = writer
+
+    # -------- I/O helpers --------
+    async def send(self, text):
+        self.writer.write((text + "\n").encode())
+        await self.writer.drain()
+
+    async def ask(self, prompt):
+        await self.send(PROMPT + prompt)
+        line = await self.reader.readline()
+        if not line:
+            raise SessionClosed()
+        return line.decode().strip()
+
+    async def call(self, fn, *args):
+        # Service and storage calls may hit SQLite: keep them off the event loop
+        return await self.server.run(fn, *args)
+
+    async def persist(self):
+        await self.call(self.server.flush)
+
+    # -------- Main menu --------
+    async def run(self):
+        while True:
+            action = (await self.ask(
+                "type new for new account, exi for existing account or done to exit out the program:")).lower()
+
+            if action not in MAIN_ACTIONS:
+                await self.send("Invalid action. Please try again.")
+                continue
+
+            if action == "done":
+                await self.send("THANK YOU FOR USING THE BANK ACCOUNT APP")
+                return
+
+            name = await self.ask("Enter account holder name:")
+            password = await self.ask("Enter account password:")
+
+            if action == "new":
+                try:
+                    await self.call(self.service.create_account, name, password)
+                    await self.persist()
+                    await self.call(self.server.storage.log_tx, name,
+                                    "ACCOUNT_CREATED", None, "New account created")
+                    await self.send("Account created successfully!")
+                except ValueError as e:
+                    await self.send(str(e))
+                continue
+
+            try:
+                acc = await self.call(self.service.login, name, password)
+            except ValueError as e:
+                await self.send(str(e))
+                continue
+            # Login may have upgraded the stored password hash
+            await self.persist()
+
+            await self.send("Access granted.")
+            await self.account_menu(acc)
+
+    # -------- Account menu --------
+    async def account_menu(self, acc):
+        while True:
+            user_action = (await self.ask("Enter action:")).lower()
+
+            if user_action not in ACCOUNT_ACTIONS:
+                await self.send("Invalid action. Please try again.")
+                continue
+
+            try:
+                match user_action:
+                    case "deposit":
+                        amount = parse_amount(await self.ask("Enter amount to deposit:"))
+                        await self.send(await self.call(self.service.deposit, acc, amount))
+                        await self.call(self.server.storage.log_tx, acc.name, "DEPOSIT", amount)
+                        await self.persist()
+
+                    case "withdraw":
+                        amount = parse_amount(await self.ask("Enter amount to withdraw:"))
+                        await self.send(await self.call(self.service.withdraw, acc, amount))
+                        await self.call(self.server.storage.log_tx, acc.name, "WITHDRAW", amount)
+                        await self.persist()
+
+                    case "check balance":
+                        await self.send(acc.check_balance())
+
+                    case "change password":
+                        new_password = await self.ask("Enter new password:")
+                        await self.send(await self.call(
+                            self.service.change_password, acc, new_password))
+                        await self.call(self.server.storage.log_tx, acc.name,
+                                        "PASSWORD_CHANGE", None, "Password updated")
+                        await self.persist()
+
+                    case "transfer":
+                        recipient_name = await self.ask_recipient()
+                        amount = parse_amount(await self.ask("Enter amount to transfer:"))
+                        await self.send(await self.call(
+                            self.service.transfer, acc, recipient_name, amount))
+
+                    case "check history":
+                        await self.show_history(acc.name)
+
+                    case "delete account":
+                        confirm = await self.ask(
+                            f"Type 'DELETE {acc.name.upper()}' to confirm:")
+                        await self.call(self.server.delete_account, acc, confirm)
+                        await self.send(
+                            f"SUCCESS: Account for {acc.name} has been closed and deleted.")
+                        return
+
+                    case "dev":
+                        await self.dev_menu(acc)
+
+                    case "exit":
+                        await self.send("Exiting account management.")
+                        await self.persist()
+                        return
+
+            except ValueError as e:
+                await self.send(str(e))
+
+    async def show_history(self, account_name):
+        tx_type = (await self.ask(
+            "Filter by type (e.g. DEPOSIT) or press Enter for all:")).upper()
+        since = parse_date(await self.ask("From date (YYYY-MM-DD) or press Enter:"))
+        until = parse_date(await self.ask("To date (YYYY-MM-DD) or press Enter:"))
+
+        await self.send("--- Transaction History ---")
+        before_id = None
+        shown = 0
+
+        while True:
+            rows, before_id = await self.call(
+                self.server.storage.history_page, account_name, before_id,
+                HISTORY_PAGE_SIZE, [tx_type] if tx_type else None, since, until)
+
+            for row in rows:
+                await self.send(str(row))
+            shown += len(rows)
+
+            if before_id is None:
+                break
+            more = await self.ask(
+                "Type more for older transactions or press Enter to stop:")
+            if more.lower() != "more":
+                break
+
+        if shown == 0:
+            await self.send("No transactions yet.")
+
+    async def ask_recipient(self):
+        # 'prefix?' lists matching accounts and asks again
+        while True:
+            name = await self.ask(RECIPIENT_PROMPT)
+            if not name.endswith(SEARCH_SUFFIX):
+                return name
+            lines = await self.call(
+                name_matches_lines, self.service, name[:-len(SEARCH_SUFFIX)])
+            await self.send("\n".join(lines))
+
+    async def dev_menu(self, acc):
+        await self.send("Developer mode activated.")
+        while True:
+            dev_action = (await self.ask(
+                "what would you like to do check number of accounts, check total bank balance, "
+                "check daily activity, check analytics, find accounts, verify totals, verify mirror, "
+                "check mirror lag, check sessions, enable metrics, disable metrics, show metrics, "
+                "export metrics, or quit?")).lower()
+            storage = self.server.storage
+
+            match dev_action:
+                case "check number of accounts":
+                    count, _ = await self.call(storage.totals)
+                    await self.send(f"Total bank accounts: {count}")
+                case "check total bank balance":
+                    _, total = await self.call(storage.totals)
+                    await self.send(
+                        f"Total bank balance across all accounts: {format_money(total)}")
+                case "check daily activity":
+                    lines = await self.call(daily_activity_lines, storage)
+                    await self.send("\n".join(lines))
+                case "check analytics":
+                    lines = await self.call(analytics_lines, storage, acc.name)
+                    await self.send("\n".join(lines))
+                case "find accounts":
+                    prefix = await self.ask("Name prefix:")
+                    lines = await self.call(name_matches_lines, self.service, prefix)
+                    await self.send("\n".join(lines))
+                case "verify totals":
+                    problems = await self.call(storage.verify_totals)
+                    if not problems:
+                        await self.send("Totals verified: summary matches the ledger.")
+                        continue
+                    await self.send("\n".join(problems))
+                    answer = await self.ask("Type repair to rebuild the summary or press Enter:")
+                    if answer.lower() == "repair":
+                        await self.call(storage.verify_totals, True)
+                        await self.send("Summary rebuilt.")
+                case "verify mirror":
+                    lines = await self.call(mirror_lines, storage)
+                    await self.send("\n".join(lines))
+                case "check mirror lag":
+                    lag = storage.mirror_lag()
+                    await self.send(
+                        f"JSON mirror: {lag['pending']} pending writes, {lag['lag_seconds']:.3f}s behind SQLite")
+                case "enable metrics":
+                    metrics.enable()
+                    await self.send("Metrics enabled.")
+                case "disable metrics":
+                    metrics.disable()
+                    await self.send("Metrics disabled.")
+                case "show metrics":
+                    await self.send(metrics.report())
+                case "export metrics":
+                    path = await self.ask(f"Export file (Enter for {METRICS_EXPORT_FILE}):")
+                    written = await self.call(metrics.export, path or METRICS_EXPORT_FILE)
+                    await self.send(f"Metrics written to {written}")
+                case "check sessions":
+                    await self.send(f"Active sessions: {self.server.active_sessions}")
+                case "quit":
+                    await self.send("Exiting developer mode.")
+                    return
+                case _:
+                    await self.send("Invalid developer action. Please try again.")
+
+
+class BankServer:
+    """
+    Serves many concurrent sessions from one process:
+    - one shared BankService (thread-safe) over one DualStorage
+    - the event loop only does socket I/O; service and storage calls run
+      in a bounded thread pool
+    """
+
+    def __init__(self, storage=None, max_workers=DEFAULT_WORKERS,
+                 cache_size=DEFAULT_CACHE_SIZE, shards=None):
+        db_storage.mark_in_use()   # nightly jobs refuse to run under a live server
+        self.storage = storage or DualStorage(
+            mirror="journal", write_behind=True, db=shard_router.open_backend(shards))
+        self.service = BankService(
+            self.storage.open_accounts(cache_size), self.storage)
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="bank-io")
+        self.active_sessions = 0
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args))
+
+    # -------- Storage helpers (run in the executor) --------
+    def flush(self):
+        self.storage.flush(self.service.accounts, self.service.take_dirty())
+
+    def delete_account(self, acc, confirm):
+        self.service.delete_account(acc, confirm)
+        self.storage.delete_account(acc.name, self.service.accounts)
+        self.storage.log_tx(acc.name, "ACCOUNT_DELETED", note="Account deleted")
+        self.flush()
+
+    # -------- Connection handling --------
+    async def handle(self, reader, writer):
+        self.active_sessions += 1
+        try:
+            await Session(self, reader, writer).run()
+        except (SessionClosed, ConnectionError):
+            pass
+        finally:
+            self.active_sessions -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle, path=unix_path, backlog=4096)
+        return await asyncio.start_server(self.handle, host, port, backlog=4096)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.flush()
+        self.storage.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None,
+                max_workers=DEFAULT_WORKERS, shards=None):
+    bank_server = BankServer(max_workers=max_workers, shards=shards)
+    server = await bank_server.start(host, port, unix_path)
+    where = unix_path or f"{host}:{port}"
+    print(f"Bank server listening on {where}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        bank_server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-session bank server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="serve on a Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--shards", type=int, default=shard_router.SHARDS,
+                        help="spread accounts over this many SQLite files (default: BANK_SHARDS)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.shards))
+    except KeyboardInterrupt:
+        print("Server stopped.")
+
+
+if __name__ == "__main__":
+    main()
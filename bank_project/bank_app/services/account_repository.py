@@ -0,0 +1,177 @@
+# bank_project/bank_app/services/account_repository.py
+
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from bank_project.account import bank
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services.name_index import StoredNameIndex
+
+DEFAULT_CACHE_SIZE = 10_000
+
+
+class AccountRepository(MutableMapping):
+    """
+    Drop-in replacement for the {name: bank} dict used by BankService:
+    - accounts are fetched from SQLite the first time they are looked up
+    - the most recently used ones stay in a bounded LRU cache
+    - clean entries are dropped on eviction, dirty ones are written back first
+    - while anything (a logged-in session) still holds an evicted account,
+      lookups return that same object instead of a second copy from SQLite
+
+    All cache bookkeeping runs under one re-entrant lock, so the repository
+    can back a BankService shared by several threads.
+    """
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE, write_back=None, db=db_storage):
+        if cache_size < 1:
+            raise ValueError("Cache size must be at least 1.")
+
+        self.cache_size = cache_size
+        self._cache = OrderedDict()   # name -> bank, least recently used first
+        self._dirty = set()           # cached names changed since last flush
+        self._unsaved = set()         # created here but not yet in the DB
+        self._live = weakref.WeakValueDictionary()  # name -> bank, while referenced
+        self._names = None            # StoredNameIndex handed out by name_index()
+        self._lock = threading.RLock()
+
+        # SQLite backend: db_storage, or a ShardRouter with the same functions
+        self._db = db
+
+        # Called with a list of accounts that must reach storage before eviction
+        self._write_back = write_back or self._db.upsert_accounts
+
+        # Bank-wide counters come from the DB, not from replaying every account
+        bank.num_bank_acc, bank.total_bank_balance = self._db.load_totals()
+
+    # -------- Cache internals --------
+    def _get(self, name):
+        with self._lock:
+            acc = self._cache.get(name)
+            if acc is not None:
+                self._cache.move_to_end(name)
+                return acc
+
+            # Evicted but still held somewhere: that object is the newest copy
+            acc = self._live.get(name)
+            if acc is None:
+                acc = self._db.load_account(name)
+            if acc is not None:
+                self._put(name, acc)
+            return acc
+
+    def _put(self, name, acc):
+        self._cache[name] = acc
+        self._live[name] = acc
+        self._cache.move_to_end(name)
+        self._evict()
+
+    def _evict(self):
+        while len(self._cache) > self.cache_size:
+            name, acc = self._cache.popitem(last=False)
+            if name in self._dirty:
+                self._write_back([acc])
+                self._dirty.discard(name)
+                self._unsaved.discard(name)
+                self.committed([name])
+
+    # -------- Change tracking (used by BankService) --------
+    def mark_dirty(self, acc):
+        # Re-pin the object: it may have been evicted clean since it was fetched
+        with self._lock:
+            current = self._cache.get(acc.name) or self._live.get(acc.name)
+            if current is not None and current is not acc:
+                # Deleted and re-created since this object was fetched
+                raise ValueError(f"Account '{acc.name}' has changed; log in again.")
+            self._put(acc.name, acc)
+            self._dirty.add(acc.name)
+
+    def committed(self, names):
+        """Called once changes to `names` (saves or deletes) are in the DB."""
+        if self._names is not None:
+            self._names.settle(names)
+
+    def take_dirty(self):
+        """Return cached accounts changed since the last call and reset tracking."""
+        with self._lock:
+            changed = [self._cache[name] for name in self._dirty]
+            self._dirty.clear()
+            self._unsaved.clear()
+        return changed
+
+    # -------- Mapping protocol --------
+    def __getitem__(self, name):
+        acc = self._get(name)
+        if acc is None:
+            raise KeyError(name)
+        return acc
+
+    def get(self, name, default=None):
+        acc = self._get(name)
+        return default if acc is None else acc
+
+    def __contains__(self, name):
+        return self._get(name) is not None
+
+    def __setitem__(self, name, acc):
+        with self._lock:
+            if self._get(name) is None:
+                self._unsaved.add(name)
+            self._put(name, acc)
+            self._dirty.add(name)
+
+    def __delitem__(self, name):
+        with self._lock:
+            if self._get(name) is None:
+                raise KeyError(name)
+            del self._cache[name]
+            self._live.pop(name, None)
+            self._dirty.discard(name)
+            self._unsaved.discard(name)
+
+    def __len__(self):
+        count, _ = self._db.load_totals()
+        return count + len(self._unsaved)
+
+    def __iter__(self):
+        yield from self._db.iter_account_names()
+        yield from list(self._unsaved)
+
+    def items(self):
+        """Stream every account without pulling them all into the cache."""
+        for acc in self._db.iter_accounts():
+            yield acc.name, self._cache.get(acc.name, acc)
+        for name in list(self._unsaved):
+            yield name, self._cache[name]
+
+    def values(self):
+        for _, acc in self.items():
+            yield acc
+
+    def name_index(self):
+        # Names live in SQLite: search them there rather than in memory
+        if self._names is None:
+            self._names = StoredNameIndex(self._db)
+        return self._names
+
+    # -------- Maintenance --------
+    def invalidate(self):
+        """
+        Drop clean cached entries so the next lookup re-reads the DB. Clean
+        accounts sessions still hold are refreshed in place instead.
+        """
+        with self._lock:
+            for name in list(self._cache):
+                if name not in self._dirty:
+                    del self._cache[name]
+            for name, acc in list(self._live.items()):
+                if name in self._dirty:
+                    continue
+                fresh = self._db.load_account(name)
+                if fresh is None:
+                    self._live.pop(name, None)
+                    continue
+                acc.balance = fresh.balance
+                acc.set_history(fresh.history)
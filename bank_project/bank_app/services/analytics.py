@@ -0,0 +1,234 @@
+# bank_project/bank_app/services/analytics.py
+
+from collections import namedtuple
+
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services import metrics
+
+# =============================
+# Ledger analytics
+# =============================
+# Statements, running balances and volume rankings computed over the full
+# SQLite ledger. Rows are streamed in chunks of LEDGER_CHUNK_ROWS, packed
+# into NumPy arrays and reduced with array operations, so memory stays
+# bounded by one chunk plus the size of the result, whatever the ledger size.
+# Every function reads through `db`: the db_storage module or a ShardRouter.
+#
+# NumPy is an optional dependency: it is only imported when an analytics
+# function runs, and the rest of the app works without it.
+
+LEDGER_CHUNK_ROWS = 250_000
+
+Statement = namedtuple(
+    "Statement",
+    ["account", "month", "opening", "credits", "debits", "closing", "tx_count"])
+
+AccountVolume = namedtuple("AccountVolume", ["account", "volume", "tx_count"])
+
+RunningBalance = namedtuple("RunningBalance", ["ids", "balances"])
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            "Ledger analytics needs NumPy. Install it with: pip install numpy") from None
+    return numpy
+
+
+def _columns(np, rows, dtypes):
+    """Transpose a chunk of row tuples into one array per column."""
+    if object not in dtypes:
+        return list(np.array(rows, dtype=np.int64).T)
+    table = np.array(rows, dtype=object)
+    return [table[:, i] if dtype is object else table[:, i].astype(dtype)
+            for i, dtype in enumerate(dtypes)]
+
+
+def _segment_starts(np, names):
+    """Indexes where a new account begins in a chunk sorted by account."""
+    changed = np.empty(len(names), dtype=bool)
+    changed[0] = True
+    np.not_equal(names[1:], names[:-1], out=changed[1:])
+    return np.flatnonzero(changed)
+
+
+def _month_label(month):
+    return f"{month // 100:04d}-{month % 100:02d}"
+
+
+def _month_number(label):
+    year, month = label.split("-")[:2]
+    return int(year) * 100 + int(month)
+
+
+# =============================
+# Running balances
+# =============================
+
+@metrics.timed("analytics.running_balance")
+def running_balance(account_name: str, since=None, db=db_storage):
+    """
+    Return RunningBalance(ids, balances): the account's balance in cents
+    after each ledger row (ledger order), optionally from `since`
+    ('YYYY-MM-DD') on. Anchored to the stored balance, so the last value is
+    always the current balance even when early history was never ledgered.
+    """
+    np = _numpy()
+    ids, deltas = [], []
+    for rows in db.iter_ledger(("id", "delta"), LEDGER_CHUNK_ROWS,
+                               account_name=account_name, since=since):
+        chunk_ids, chunk_deltas = _columns(np, rows, (np.int64, np.int64))
+        ids.append(chunk_ids)
+        deltas.append(chunk_deltas)
+
+    if not ids:
+        return RunningBalance(np.empty(0, np.int64), np.empty(0, np.int64))
+
+    balances = np.cumsum(np.concatenate(deltas))
+    current = db.load_balances(account_name).get(account_name, 0)
+    balances += current - balances[-1]
+    return RunningBalance(np.concatenate(ids), balances)
+
+
+# =============================
+# Monthly statements
+# =============================
+
+@metrics.timed("analytics.monthly_statements")
+def monthly_statements(account_name=None, since=None, until=None, db=db_storage):
+    """
+    Return Statements (one per account and month with activity), ordered by
+    account then month. `since` / `until` are inclusive 'YYYY-MM' months.
+
+    Opening and closing balances are derived backwards from each account's
+    current balance, so only rows from `since` onwards are scanned.
+    """
+    np = _numpy()
+    scan_since = f"{since[:7]}-01" if since else None
+    names = []              # account name per global code, in scan order
+    parts = []              # per-chunk (code, month, credits, debits, count) arrays
+    last_name = None
+
+    for rows in db.iter_ledger(("account_name", "month", "delta"), LEDGER_CHUNK_ROWS,
+                               account_name=account_name, since=scan_since):
+        chunk_names, months, deltas = _columns(np, rows, (object, np.int64, np.int64))
+
+        # Rows arrive sorted by account, so global account codes are just a
+        # running count of name changes (an account may straddle chunks)
+        starts = _segment_starts(np, chunk_names)
+        new_account = np.zeros(len(chunk_names), dtype=np.int64)
+        new_account[starts] = 1
+        if chunk_names[0] == last_name:
+            new_account[0] = 0
+        codes = len(names) - 1 + np.cumsum(new_account)
+        names.extend(chunk_names[starts[1:]] if chunk_names[0] == last_name
+                     else chunk_names[starts])
+        last_name = chunk_names[-1]
+
+        parts.append(_group_months(
+            np, codes, months, np.maximum(deltas, 0), np.maximum(-deltas, 0),
+            np.ones(len(deltas), dtype=np.int64)))
+
+    if not parts:
+        return []
+
+    # Merge groups split across chunk boundaries
+    codes, months, credits, debits, counts = _group_months(
+        np, *(np.concatenate(column) for column in zip(*parts)))
+
+    # Closing balance per (account, month): cumulative net within the
+    # account, shifted so the account's final closing is its current balance
+    net = credits - debits
+    cumulative = np.cumsum(net)
+    first = _segment_starts(np, codes)
+    last = np.append(first[1:], len(codes)) - 1
+    lengths = np.diff(np.append(first, len(codes)))
+    before_account = np.repeat(cumulative[first] - net[first], lengths)
+    within = cumulative - before_account
+
+    balances = db.load_balances(account_name)
+    current = np.array([balances.get(name, 0) for name in names], dtype=np.int64)
+    closing = within + np.repeat(current - within[last], lengths)
+    opening = closing - net
+
+    keep = np.ones(len(codes), dtype=bool)
+    if until:
+        keep &= months <= _month_number(until)
+    labels = {month: _month_label(month) for month in np.unique(months).tolist()}
+    return [
+        Statement(names[code], labels[month], *values)
+        for code, month, *values in zip(*(column[keep].tolist() for column in (
+            codes, months, opening, credits, debits, closing, counts)))]
+
+
+def _group_months(np, codes, months, credits, debits, counts):
+    """Sum rows into one group per (account code, month), sorted by both."""
+    order = np.lexsort((months, codes))
+    codes, months = codes[order], months[order]
+    boundary = np.empty(len(codes), dtype=bool)
+    boundary[0] = True
+    boundary[1:] = (codes[1:] != codes[:-1]) | (months[1:] != months[:-1])
+    starts = np.flatnonzero(boundary)
+
+    return (codes[starts], months[starts],
+            np.add.reduceat(credits[order], starts),
+            np.add.reduceat(debits[order], starts),
+            np.add.reduceat(counts[order], starts))
+
+
+# =============================
+# Volume rankings
+# =============================
+
+@metrics.timed("analytics.top_accounts")
+def top_accounts(n: int = 10, since=None, until=None, db=db_storage):
+    """
+    Return the `n` AccountVolumes with the largest volume (sum of absolute
+    amounts moved, in cents), largest first. `since` / `until` are
+    inclusive 'YYYY-MM-DD' dates.
+    """
+    if n < 1:
+        raise ValueError("n must be at least 1.")
+    np = _numpy()
+
+    # Candidates: the best n accounts seen so far, trimmed after each chunk
+    best_names = np.empty(0, dtype=object)
+    best_volumes = np.empty(0, dtype=np.int64)
+    best_counts = np.empty(0, dtype=np.int64)
+
+    for rows in db.iter_ledger(("account_name", "delta"), LEDGER_CHUNK_ROWS,
+                               since=since, until=until):
+        chunk_names, deltas = _columns(np, rows, (object, np.int64))
+        starts = _segment_starts(np, chunk_names)
+        names = chunk_names[starts]
+        volumes = np.add.reduceat(np.abs(deltas), starts)
+        counts = np.diff(np.append(starts, len(chunk_names)))
+
+        # The previous chunk's last account may continue here; fold it in
+        if len(best_names) and best_names[-1] == names[0]:
+            volumes[0] += best_volumes[-1]
+            counts[0] += best_counts[-1]
+            best_names, best_volumes, best_counts = (
+                best_names[:-1], best_volumes[:-1], best_counts[:-1])
+
+        # Keep the chunk's last account as the final entry even if it is not
+        # a top-n candidate yet, since the next chunk may add to it
+        names = np.concatenate((best_names, names))
+        volumes = np.concatenate((best_volumes, volumes))
+        counts = np.concatenate((best_counts, counts))
+        keep = _largest(np, volumes[:-1], n)
+        keep = np.append(np.sort(keep), len(names) - 1)
+        best_names, best_volumes, best_counts = names[keep], volumes[keep], counts[keep]
+
+    order = np.argsort(-best_volumes, kind="stable")[:n]
+    return [AccountVolume(best_names[i], int(best_volumes[i]), int(best_counts[i]))
+            for i in order.tolist()]
+
+
+def _largest(np, values, n):
+    """Indexes of the n largest values (any order)."""
+    if len(values) <= n:
+        return np.arange(len(values))
+    return np.argpartition(values, len(values) - n)[-n:]
@@ -1,14 +1,93 @@
 # bank_project/bank_app/services/bank_service.py
 
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
 from bank_project.account import bank
+from bank_project.money import format_money, MAX_AMOUNT, MAX_BALANCE
+from bank_project.bank_app.services import metrics
+from bank_project.bank_app.services.name_index import NameIndex
+from bank_project.bank_app.services.passwords import PasswordHasher
+
+# Outcome of one operation in apply_batch()
+BatchResult = namedtuple("BatchResult", ["op", "ok", "message"])
+
+# Number of account locks; names hash onto one of these stripes
+LOCK_STRIPES = 64
+
+# Names offered by "did you mean" hints
+SUGGESTIONS_SHOWN = 3
 
 
 class BankService:
-    """Business logic layer (no input/print here)."""
+    """
+    Business logic layer (no input/print here).
+
+    Safe to share between threads: every balance change runs under the lock
+    of the account(s) it touches, and multi-account operations take their
+    locks in a fixed order so they can never deadlock each other.
+    """
 
-    def __init__(self, accounts):
+    def __init__(self, accounts, storage=None, hasher=None):
         self.accounts = accounts
 
+        # Optional persistence backend (DualStorage) for multi-row commits
+        self.storage = storage
+
+        # Passwords are only ever stored as salted KDF hashes
+        self.hasher = hasher or PasswordHasher()
+        self._dummy_hash = None
+
+        # Accounts changed since the last flush, keyed by name
+        self.dirty = {}
+        self._dirty_lock = threading.Lock()
+
+        # Striped per-account locks: bounded memory however many accounts exist
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+        # Name search; lazily loaded account stores search their own backend
+        self.names = (accounts.name_index() if hasattr(accounts, "name_index")
+                      else NameIndex(accounts))
+
+    # -------- Locking --------
+    @contextmanager
+    def _locked(self, *names):
+        # Sorted stripe order is the global lock order
+        stripes = sorted({hash(name) % LOCK_STRIPES for name in names})
+        for i in stripes:
+            self._locks[i].acquire()
+        try:
+            yield
+        finally:
+            for i in reversed(stripes):
+                self._locks[i].release()
+
+    # -------- Change tracking --------
+    def mark_dirty(self, acc):
+        # Write-back account caches keep track of their own dirty entries
+        if hasattr(self.accounts, "mark_dirty"):
+            self.accounts.mark_dirty(acc)
+        else:
+            with self._dirty_lock:
+                self.dirty[acc.name] = acc
+
+    def take_dirty(self):
+        """Return the accounts changed since the last call and reset tracking."""
+        if hasattr(self.accounts, "take_dirty"):
+            return self.accounts.take_dirty()
+
+        with self._dirty_lock:
+            changed = list(self.dirty.values())
+            self.dirty.clear()
+        return changed
+
+    @staticmethod
+    def _restore(acc, balance, history):
+        # Undo in-memory changes after a rejected batch or failed commit
+        bank.adjust_totals(balance=balance - acc.balance)
+        acc.balance = balance
+        acc.set_history(history)
+
     # -------- Validation helpers --------
     @staticmethod
     def validate_name(name):
@@ -19,36 +98,84 @@ class BankService:
 
     @staticmethod
     def validate_amount(amount):
+        # Amounts are integer cents; floats would reintroduce rounding drift
+        if not isinstance(amount, int) or isinstance(amount, bool):
+            raise ValueError("Amount must be a whole number of cents.")
         if amount <= 0:
             raise ValueError("Amount must be positive.")
+        if amount > MAX_AMOUNT:
+            raise ValueError(f"Amount cannot exceed {format_money(MAX_AMOUNT)}.")
+
+    @staticmethod
+    def validate_credit(acc, amount):
+        # Checked before anything changes: SQLite cannot store a larger balance
+        if acc.balance + amount > MAX_BALANCE:
+            raise ValueError(f"Account '{acc.name}' cannot hold a larger balance.")
 
     # -------- Account actions --------
+    @metrics.timed("service.create_account")
     def create_account(self, name, password):
         self.validate_name(name)
-        if name in self.accounts:
-            raise ValueError("Username already exists.")
-        acc = bank(name, password, 0)
-        self.accounts[name] = acc
+        hashed = self.hasher.hash(password)
+        with self._locked(name):
+            if name in self.accounts:
+                raise ValueError("Username already exists.")
+            acc = bank(name, hashed, 0)
+            self.accounts[name] = acc
+            self.names.add(name)
+            self.mark_dirty(acc)
         return acc
 
+    @metrics.timed("service.login")
     def login(self, name, password):
         self.validate_name(name)
         acc = self.accounts.get(name)
-        if not acc or acc.password != password:
+
+        # Unknown names still pay for one hash, so timing does not reveal them
+        if acc is None and self._dummy_hash is None:
+            self._dummy_hash = self.hasher.hash("")
+        stored = acc.password if acc else self._dummy_hash
+
+        ok, new_hash = self.hasher.verify(password, stored)
+        if not acc or not ok:
             raise ValueError("Access denied. Incorrect name or password.")
+
+        # Plaintext or outdated cost settings: upgrade now that we know the password
+        if new_hash:
+            with self._locked(name):
+                if acc.password == stored:
+                    acc.password = new_hash
+                    self.mark_dirty(acc)
         return acc
 
+    @metrics.timed("service.deposit")
     def deposit(self, acc, amount):
         self.validate_amount(amount)
-        return acc.deposit(amount)
+        with self._locked(acc.name):
+            self.validate_credit(acc, amount)
+            msg = acc.deposit(amount)
+            self.mark_dirty(acc)
+        return msg
 
+    @metrics.timed("service.withdraw")
     def withdraw(self, acc, amount):
         self.validate_amount(amount)
-        msg = acc.withdraw(amount)
-        if msg.lower().startswith("insufficient"):
-            raise ValueError(msg)
+        with self._locked(acc.name):
+            msg = acc.withdraw(amount)
+            if msg.lower().startswith("insufficient"):
+                raise ValueError(msg)
+            self.mark_dirty(acc)
+        return msg
+
+    @metrics.timed("service.change_password")
+    def change_password(self, acc, new_password):
+        hashed = self.hasher.hash(new_password)
+        with self._locked(acc.name):
+            msg = acc.change_accout_password(hashed)
+            self.mark_dirty(acc)
         return msg
 
+    @metrics.timed("service.transfer")
     def transfer(self, sender, recipient_name, amount):
         self.validate_name(recipient_name)
 
@@ -57,26 +184,190 @@ class BankService:
 
         recipient = self.accounts.get(recipient_name)
         if not recipient:
-            raise ValueError(f"Account '{recipient_name}' not found.")
+            raise ValueError(self.not_found_message(recipient_name))
 
         self.validate_amount(amount)
 
-        withdraw_msg = sender.withdraw(amount)
-        if withdraw_msg.lower().startswith("insufficient"):
-            raise ValueError(withdraw_msg)
+        with self._locked(sender.name, recipient_name):
+            before = [(acc, acc.balance, tuple(acc.history))
+                      for acc in (sender, recipient)]
+
+            self.validate_credit(recipient, amount)
+            withdraw_msg = sender.withdraw(amount)
+            if withdraw_msg.lower().startswith("insufficient"):
+                raise ValueError(withdraw_msg)
+            recipient.deposit(amount)
+
+            if self.storage is None:
+                self.mark_dirty(sender)
+                self.mark_dirty(recipient)
+            else:
+                # Both balances and both ledger rows in one SQLite transaction
+                try:
+                    self.storage.commit_batch(self.accounts, [sender, recipient], [
+                        (sender.name, "TRANSFER_OUT", amount, f"to {recipient_name}"),
+                        (recipient_name, "TRANSFER_IN", amount, f"from {sender.name}"),
+                    ])
+                except Exception:
+                    for acc, balance, history in before:
+                        self._restore(acc, balance, history)
+                    raise
 
-        recipient.deposit(amount)
-        return f"Transferred ${amount} to {recipient_name}."
+        return f"Transferred {format_money(amount)} to {recipient_name}."
 
+    # -------- Bulk operations --------
+    @metrics.timed("service.apply_batch")
+    def apply_batch(self, ops, atomic=True):
+        """
+        Validate and apply many operations, then persist them in one commit.
+
+        Each op is one of:
+            ("deposit", name, amount)
+            ("withdraw", name, amount)
+            ("transfer", sender_name, recipient_name, amount)
+
+        Returns one BatchResult per op. Invalid ops are skipped when
+        atomic=False; when atomic=True a single failure rolls back the whole
+        batch and every result is reported as not applied.
+
+        Every account named in the batch stays locked until it is committed.
+        """
+        ops = list(ops)
+        names = {name for op in ops if isinstance(op, (tuple, list))
+                 for name in op[1:-1] if isinstance(name, str)}
+
+        with self._locked(*names):
+            return self._apply_batch_locked(ops, atomic)
+
+    def _apply_batch_locked(self, ops, atomic):
+        results = []
+        touched = {}      # name -> account, keeps objects pinned for the batch
+        originals = {}    # name -> (balance, history) before the batch
+        tx_rows = []      # (account_name, type, amount, note)
+
+        def lookup(name):
+            acc = touched.get(name) or self.accounts.get(name)
+            if not acc:
+                raise ValueError(f"Account '{name}' not found.")
+            if name not in touched:
+                touched[name] = acc
+                originals[name] = (acc.balance, tuple(acc.history))
+            return acc
+
+        def undo():
+            for name, (balance, history) in originals.items():
+                self._restore(touched[name], balance, history)
+
+        failed = False
+        for op in ops:
+            try:
+                msg = self._apply_op(op, lookup, tx_rows)
+                results.append(BatchResult(op, True, msg))
+            except (ValueError, TypeError) as e:
+                failed = True
+                results.append(BatchResult(op, False, str(e)))
+
+        if failed and atomic:
+            undo()
+            return [r if not r.ok else BatchResult(
+                r.op, False, "Rolled back: batch contained invalid operations.")
+                for r in results]
+
+        changed = [touched[name] for name, (balance, _) in originals.items()
+                   if touched[name].balance != balance]
+
+        if self.storage is None:
+            for acc in changed:
+                self.mark_dirty(acc)
+            return results
+
+        try:
+            self.storage.commit_batch(self.accounts, changed, tx_rows)
+        except Exception:
+            # Storage rolled back its transaction; do the same in memory
+            undo()
+            raise
+        return results
+
+    def _apply_op(self, op, lookup, tx_rows):
+        kind, *args = op
+
+        match kind:
+            case "deposit":
+                name, amount = args
+                self.validate_amount(amount)
+                acc = lookup(name)
+                self.validate_credit(acc, amount)
+                msg = acc.deposit(amount)
+                tx_rows.append((name, "DEPOSIT", amount, None))
+                return msg
+
+            case "withdraw":
+                name, amount = args
+                self.validate_amount(amount)
+                msg = lookup(name).withdraw(amount)
+                if msg.lower().startswith("insufficient"):
+                    raise ValueError(msg)
+                tx_rows.append((name, "WITHDRAW", amount, None))
+                return msg
+
+            case "transfer":
+                sender_name, recipient_name, amount = args
+                self.validate_name(recipient_name)
+                if recipient_name == sender_name:
+                    raise ValueError("You cannot transfer money to yourself.")
+                self.validate_amount(amount)
+
+                sender = lookup(sender_name)
+                recipient = lookup(recipient_name)
+                self.validate_credit(recipient, amount)
+
+                withdraw_msg = sender.withdraw(amount)
+                if withdraw_msg.lower().startswith("insufficient"):
+                    raise ValueError(withdraw_msg)
+                recipient.deposit(amount)
+
+                tx_rows.append(
+                    (sender_name, "TRANSFER_OUT", amount, f"to {recipient_name}"))
+                tx_rows.append(
+                    (recipient_name, "TRANSFER_IN", amount, f"from {sender_name}"))
+                return f"Transferred {format_money(amount)} to {recipient_name}."
+
+            case _:
+                raise ValueError(f"Unknown batch operation '{kind}'.")
+
+    @metrics.timed("service.delete_account")
     def delete_account(self, acc, confirmation_text):
-        if acc.balance > 0:
-            raise ValueError(
-                "You cannot delete an account with a remaining balance.")
+        # Checked under the lock, so a transfer in cannot land in between
+        with self._locked(acc.name):
+            if acc.balance > 0:
+                raise ValueError(
+                    "You cannot delete an account with a remaining balance.")
+
+            required = f"DELETE {acc.name.upper()}"
+            if confirmation_text.strip() != required:
+                raise ValueError(
+                    "Deletion cancelled. Confirmation text did not match.")
+
+            self.accounts.pop(acc.name, None)
+            self.names.remove(acc.name)
+            with self._dirty_lock:
+                self.dirty.pop(acc.name, None)
+        bank.adjust_totals(accounts=-1)
+
+    # -------- Name search --------
+    @metrics.timed("service.find_accounts")
+    def find_accounts(self, prefix, limit=10):
+        """Account names starting with `prefix` (any case), in order."""
+        return self.names.complete(prefix, limit)
 
-        required = f"DELETE {acc.name.upper()}"
-        if confirmation_text.strip() != required:
-            raise ValueError(
-                "Deletion cancelled. Confirmation text did not match.")
+    @metrics.timed("service.suggest_accounts")
+    def suggest_accounts(self, name, limit=SUGGESTIONS_SHOWN):
+        """Existing account names closest to a mistyped `name`."""
+        return self.names.suggest(name, limit)
 
-        self.accounts.pop(acc.name, None)
-        bank.num_bank_acc -= 1
+    def not_found_message(self, name):
+        suggestions = self.suggest_accounts(name)
+        if not suggestions:
+            return f"Account '{name}' not found."
+        return f"Account '{name}' not found. Did you mean: {', '.join(suggestions)}?"
@@ -1,31 +1,413 @@
 # bank_project/bank_app/services/db_storage.py
 
+import atexit
+import functools
+import heapq
+import json
+import os
 import sqlite3
+import threading
+import time
+from collections import Counter, namedtuple
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from bank_project.account import bank
+
+try:
+    import fcntl        # Advisory file locks for the in-use marker; missing on Windows
+except ImportError:
+    fcntl = None
+
+from bank_project.account import bank, HistoryEntry, HISTORY_CAPACITY
+from bank_project.money import MAX_BALANCE
+from bank_project.bank_app.services import merkle
+from bank_project.bank_app.services import metrics
 
 DB_FILE = (Path(__file__).resolve().parents[2] / "data" / "bank.db")
 
+# Size of sqlite3's per-connection prepared statement cache. Every query in
+# this module is a constant SQL string, so a warm connection never re-parses.
+STATEMENT_CACHE_SIZE = 128
+
+
+# =============================
+# Durability
+# =============================
+# The database runs in WAL mode. DURABILITY picks how commits reach disk:
+#   strict   fsync (synchronous=FULL) on every operation's commit. Nothing
+#            acknowledged is ever lost, even on power failure.
+#   group    operations are grouped into one transaction that commits (and
+#            fsyncs) every GROUP_COMMIT_OPS operations or GROUP_COMMIT_MS,
+#            whichever comes first. A crash loses at most that window.
+#   relaxed  commit per operation but no fsync (synchronous=NORMAL). A
+#            process crash loses nothing; power loss can lose commits made
+#            since the last checkpoint. Never corrupts the database.
+
+DURABILITY_MODES = ("strict", "group", "relaxed")
+DURABILITY = os.environ.get("BANK_DURABILITY", "strict")
+
+GROUP_COMMIT_OPS = 100
+GROUP_COMMIT_MS = 10
+
+# WAL pages before SQLite checkpoints back into the main file (its default
+# is 1000); larger means fewer, bigger checkpoints
+WAL_AUTOCHECKPOINT_PAGES = 4000
+
+
+# =============================
+# Connection manager
+# =============================
+# One long-lived connection per thread, opened lazily and reused for every
+# call. The schema is created once per database file per process instead of
+# on every operation. In group mode every thread shares one connection, so
+# reads always see writes that are still waiting for their group commit
+# (but never an operation still in progress, see Reads below).
+# A thread bound to another file with bind_thread() (the shard workers in
+# shard_router.py) runs every function here against that file.
+
+_local = threading.local()
+_lock = threading.Lock()
+_open_conns = []        # every connection handed out, so close() can reach them all
+_schema_ready = set()   # database files whose tables already exist
+_generation = 0         # bumped by close() so threads drop stale connections
+
+
+# -------- Statement timing (metrics) --------
+# Every connection uses these subclasses; with metrics disabled the only
+# extra cost is one flag check per statement.
+
+_statement_labels = {}
+
+
+def _statement_label(sql):
+    label = _statement_labels.get(sql)
+    if label is None:
+        label = "sqlite." + " ".join(sql.split())[:56]
+        if len(_statement_labels) < 1024:
+            _statement_labels[sql] = label
+    return label
+
+
+class _TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        if not metrics.enabled():
+            return super().execute(sql, parameters)
+        with metrics.timer(_statement_label(sql)):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not metrics.enabled():
+            return super().executemany(sql, seq_of_parameters)
+        with metrics.timer(_statement_label(sql)):
+            return super().executemany(sql, seq_of_parameters)
+
+
+class _TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=_TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        if not metrics.enabled():
+            return super().execute(sql, parameters)
+        with metrics.timer(_statement_label(sql)):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not metrics.enabled():
+            return super().executemany(sql, seq_of_parameters)
+        with metrics.timer(_statement_label(sql)):
+            return super().executemany(sql, seq_of_parameters)
+
+
+def _connect(path):
+    if DURABILITY not in DURABILITY_MODES:
+        raise ValueError(f"Unknown durability mode '{DURABILITY}'.")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        path,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,  # close() may run on another thread
+        factory=_TimedConnection,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        f"PRAGMA synchronous={'NORMAL' if DURABILITY == 'relaxed' else 'FULL'}")
+    conn.execute(f"PRAGMA wal_autocheckpoint={WAL_AUTOCHECKPOINT_PAGES}")
+    return conn
+
+
+def _register(conn, path):
+    # Caller holds _lock
+    _open_conns.append(conn)
+    if path not in _schema_ready:
+        _create_schema(conn)
+        _schema_ready.add(path)
+
+
+def bind_thread(path):
+    """Point this thread's connection at `path` instead of DB_FILE (shard workers)."""
+    _local.db_file = Path(path)
+
 
 def get_conn():
-    DB_FILE.parent.mkdir(parents=True, exist_ok=True)
-    return sqlite3.connect(DB_FILE)
+    """Return this thread's connection to DB_FILE, opening it on first use."""
+    path = getattr(_local, "db_file", None) or Path(DB_FILE)
+    if DURABILITY == "group":
+        return _shared_conn(path)
 
+    conn = getattr(_local, "conn", None)
+
+    if conn is not None and _local.path == path and _local.generation == _generation:
+        return conn
+
+    # DB_FILE was repointed (tests, tools) or close() ran: start fresh
+    if conn is not None:
+        _release(conn)
+
+    conn = _connect(path)
+    with _lock:
+        _local.conn = conn
+        _local.path = path
+        _local.generation = _generation
+        _register(conn, path)
+    return conn
+
+
+_shared = None          # (conn, path, generation) used by every thread in group mode
+
+
+def _shared_conn(path):
+    global _shared
+    shared = _shared
+    if shared is not None and shared[1] == path and shared[2] == _generation:
+        return shared[0]
+
+    with _lock:
+        if _shared is None or _shared[1] != path or _shared[2] != _generation:
+            conn = _connect(path)
+            _register(conn, path)
+            _shared = (conn, path, _generation)
+        return _shared[0]
+
+
+def _release(conn):
+    with _lock:
+        if conn in _open_conns:
+            _open_conns.remove(conn)
+    conn.close()
+    _local.conn = None
+
+
+def close():
+    """Commit any pending group, then close every pooled connection. Safe to call more than once."""
+    global _generation, _shared, _group_pending
+    with _group_lock, _lock:
+        conns = list(_open_conns)
+        _open_conns.clear()
+        _schema_ready.clear()
+        _generation += 1
+        _shared = None
+        _group_pending = 0
+
+    for conn in conns:
+        try:
+            # The last connection to close also checkpoints and removes the WAL
+            conn.commit()
+            conn.close()
+        except sqlite3.ProgrammingError:
+            # Already closed by its owner
+            pass
+
+
+atexit.register(close)
+
+
+def set_durability(mode):
+    """Switch durability mode; open connections are closed so the new settings apply."""
+    global DURABILITY
+    if mode not in DURABILITY_MODES:
+        raise ValueError(f"Unknown durability mode '{mode}'.")
+    close()
+    DURABILITY = mode
+
+
+# =============================
+# In-use marker
+# =============================
+# The app and the server cache balances and write them back later, so a
+# maintenance job changing balances underneath them would be overwritten.
+# While running they hold a shared lock on a file next to DB_FILE; such a
+# job takes it exclusively and refuses to start while anyone else holds
+# it. The OS drops the locks when a process exits, however it exits.
+# Without fcntl (Windows) there is no check: stop the server first.
+
+_in_use = {}            # marker path -> open fd holding this process's shared lock
+
+
+def in_use_file():
+    path = Path(DB_FILE)
+    return path.with_name(path.name + ".inuse")
+
+
+def mark_in_use():
+    """Mark DB_FILE as in use by this process until it exits (waits for a running job)."""
+    path = in_use_file()
+    if fcntl is None or path in _in_use:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(fd, fcntl.LOCK_SH)
+    _in_use[path] = fd
+
+
+@contextmanager
+def exclusive_use(job):
+    """Run maintenance `job` with DB_FILE to itself; ValueError while another process uses it."""
+    path = in_use_file()
+    if fcntl is None:
+        yield
+        return
+
+    # This process's own marker is upgraded rather than counted as another user
+    own = _in_use.get(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = own if own is not None else os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise ValueError(
+                f"{Path(DB_FILE).name} is in use by a running app or server; "
+                f"stop it before running {job}.") from None
+        yield
+    finally:
+        if own is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+        else:
+            os.close(fd)
+
+
+# =============================
+# Write transactions
+# =============================
+# Every write goes through _write(). In strict/relaxed mode it is one
+# transaction per operation. In group mode each operation is a SAVEPOINT
+# inside a longer transaction: a failing operation rolls back alone, and
+# the group commits when it is big or old enough (or on close()).
+
+_group_lock = threading.RLock()
+_group_pending = 0          # operations in the open group transaction
+_group_started = 0.0        # monotonic time of the group's first operation
+_group_flusher = None
+
+
+@contextmanager
+def _write():
+    if DURABILITY != "group":
+        conn = get_conn()
+        with conn:  # commits on success, rolls back on any exception
+            yield conn
+        return
+
+    global _group_pending, _group_started
+    with _group_lock:
+        conn = get_conn()
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        conn.execute("SAVEPOINT op")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO op")
+            conn.execute("RELEASE op")
+            raise
+        conn.execute("RELEASE op")
+
+        if _group_pending == 0:
+            _group_started = time.monotonic()
+            _start_group_flusher()
+        _group_pending += 1
+        if (_group_pending >= GROUP_COMMIT_OPS
+                or time.monotonic() - _group_started >= GROUP_COMMIT_MS / 1000):
+            _commit_group(conn)
+
+
+def _commit_group(conn):
+    # Caller holds _group_lock
+    global _group_pending
+    conn.commit()
+    _group_pending = 0
+
+
+def flush_group():
+    """Commit the open group now (no-op outside group mode or when nothing is pending)."""
+    with _group_lock:
+        if _group_pending and _shared is not None:
+            _commit_group(_shared[0])
+
+
+def _start_group_flusher():
+    # Bounds the loss window in time even when no further writes arrive
+    global _group_flusher
+    if _group_flusher is not None and _group_flusher.is_alive():
+        return
+
+    def run():
+        while True:
+            time.sleep(GROUP_COMMIT_MS / 1000)
+            with _group_lock:
+                if _group_pending and (
+                        time.monotonic() - _group_started >= GROUP_COMMIT_MS / 1000):
+                    flush_group()
+
+    _group_flusher = threading.Thread(target=run, name="group-commit", daemon=True)
+    _group_flusher.start()
+
+
+# =============================
+# Reads
+# =============================
+# In group mode every thread shares one connection, so a read running while
+# another thread is inside _write() would see that operation half done, or
+# changes it is about to roll back. Reads therefore take _group_lock there
+# too; released operations waiting for their group commit stay visible.
+
+def _reads(fn):
+    """Run `fn` as one read: under _group_lock in group mode."""
+    @functools.wraps(fn)
+    def read(*args, **kwargs):
+        if DURABILITY != "group":
+            return fn(*args, **kwargs)
+        with _group_lock:
+            return fn(*args, **kwargs)
+    return read
 
-def init_db():
-    """Create tables if they don't exist."""
-    with get_conn() as conn:
-        cur = conn.cursor()
 
-        cur.execute("""
+def _pages(sql, params=(), size=1000):
+    """Yield fetchmany() pages of one query, each page read on its own (see _reads)."""
+    cur = _reads(get_conn().cursor().execute)(sql, params)
+    while rows := _reads(cur.fetchmany)(size):
+        yield rows
+
+
+# =============================
+# Schema migrations
+# =============================
+# Each entry upgrades the schema by exactly one version. PRAGMA user_version
+# records how many have been applied to a database file, so every migration
+# runs once per file, in order, inside its own transaction. Only ever append.
+
+MIGRATIONS = [
+    # 1: base tables
+    [
+        """
         CREATE TABLE IF NOT EXISTS accounts (
             name TEXT PRIMARY KEY,
             password TEXT NOT NULL,
             balance REAL NOT NULL DEFAULT 0
         )
-        """)
-
-        cur.execute("""
+        """,
+        """
         CREATE TABLE IF NOT EXISTS transactions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             account_name TEXT NOT NULL,
@@ -35,90 +417,1471 @@ def init_db():
             created_at TEXT NOT NULL DEFAULT (datetime('now')),
             FOREIGN KEY (account_name) REFERENCES accounts(name)
         )
-        """)
+        """,
+    ],
+    # 2: per-account history lookups and keyset paging walk this index
+    #    instead of scanning the whole ledger
+    [
+        """
+        CREATE INDEX IF NOT EXISTS idx_transactions_account_id
+        ON transactions (account_name, id)
+        """,
+    ],
+    # 3: REAL dollars -> INTEGER cents. SQLite cannot change a column's
+    #    type, so both tables are rebuilt (keeping transaction ids).
+    [
+        """
+        CREATE TABLE accounts_v3 (
+            name TEXT PRIMARY KEY,
+            password TEXT NOT NULL,
+            balance_cents INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        INSERT INTO accounts_v3 (name, password, balance_cents)
+        SELECT name, password, CAST(ROUND(balance * 100) AS INTEGER)
+        FROM accounts
+        """,
+        "DROP TABLE accounts",
+        "ALTER TABLE accounts_v3 RENAME TO accounts",
+        """
+        CREATE TABLE transactions_v3 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account_name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            amount_cents INTEGER,
+            note TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            FOREIGN KEY (account_name) REFERENCES accounts(name)
+        )
+        """,
+        """
+        INSERT INTO transactions_v3
+            (id, account_name, type, amount_cents, note, created_at)
+        SELECT id, account_name, type,
+               CAST(ROUND(amount * 100) AS INTEGER), note, created_at
+        FROM transactions
+        """,
+        "DROP TABLE transactions",
+        "ALTER TABLE transactions_v3 RENAME TO transactions",
+        """
+        CREATE INDEX idx_transactions_account_id
+        ON transactions (account_name, id)
+        """,
+    ],
+    # 4: bank-wide aggregates kept up to date by triggers, in the same
+    #    transaction as the row change that moves them
+    [
+        """
+        CREATE TABLE bank_summary (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            account_count INTEGER NOT NULL DEFAULT 0,
+            total_balance_cents INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE daily_tx_stats (
+            day TEXT NOT NULL,
+            type TEXT NOT NULL,
+            tx_count INTEGER NOT NULL,
+            volume_cents INTEGER NOT NULL,
+            PRIMARY KEY (day, type)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TRIGGER accounts_summary_insert AFTER INSERT ON accounts
+        BEGIN
+            UPDATE bank_summary
+            SET account_count = account_count + 1,
+                total_balance_cents = total_balance_cents + NEW.balance_cents
+            WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER accounts_summary_update AFTER UPDATE OF balance_cents ON accounts
+        BEGIN
+            UPDATE bank_summary
+            SET total_balance_cents =
+                total_balance_cents + NEW.balance_cents - OLD.balance_cents
+            WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER accounts_summary_delete AFTER DELETE ON accounts
+        BEGIN
+            UPDATE bank_summary
+            SET account_count = account_count - 1,
+                total_balance_cents = total_balance_cents - OLD.balance_cents
+            WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER transactions_stats_insert AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO daily_tx_stats (day, type, tx_count, volume_cents)
+            VALUES (date(NEW.created_at), NEW.type, 1, COALESCE(NEW.amount_cents, 0))
+            ON CONFLICT (day, type) DO UPDATE SET
+                tx_count = tx_count + 1,
+                volume_cents = volume_cents + excluded.volume_cents;
+        END
+        """,
+        """
+        CREATE TRIGGER transactions_stats_delete AFTER DELETE ON transactions
+        BEGIN
+            UPDATE daily_tx_stats
+            SET tx_count = tx_count - 1,
+                volume_cents = volume_cents - COALESCE(OLD.amount_cents, 0)
+            WHERE day = date(OLD.created_at) AND type = OLD.type;
+            DELETE FROM daily_tx_stats
+            WHERE day = date(OLD.created_at) AND type = OLD.type AND tx_count = 0;
+        END
+        """,
+        lambda conn: _rebuild_summary(conn),
+    ],
+    # 5: resume points for long-running imports (migrate_json_to_db)
+    [
+        """
+        CREATE TABLE migration_checkpoints (
+            source TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            history_rows INTEGER NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """,
+    ],
+    # 6: one row per posted business day, so end-of-day runs are idempotent
+    [
+        """
+        CREATE TABLE eod_runs (
+            business_date TEXT PRIMARY KEY,
+            interest_accounts INTEGER NOT NULL DEFAULT 0,
+            interest_cents INTEGER NOT NULL DEFAULT 0,
+            fee_accounts INTEGER NOT NULL DEFAULT 0,
+            fee_cents INTEGER NOT NULL DEFAULT 0,
+            completed_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """,
+    ],
+    # 7: per account and year, the id range moved into archive files
+    [
+        """
+        CREATE TABLE archived_ledger (
+            account_name TEXT NOT NULL,
+            period TEXT NOT NULL,
+            min_id INTEGER NOT NULL,
+            max_id INTEGER NOT NULL,
+            PRIMARY KEY (account_name, period)
+        ) WITHOUT ROWID
+        """,
+    ],
+    # 8: per-bucket account checksums for mirror reconciliation, kept
+    # current by the write paths in this module (see Account checksums)
+    [
+        "ALTER TABLE accounts ADD COLUMN merkle_bucket INTEGER NOT NULL DEFAULT 0",
+        """
+        CREATE TABLE merkle_buckets (
+            bucket INTEGER PRIMARY KEY,
+            digest INTEGER NOT NULL
+        )
+        """,
+        lambda conn: _fill_merkle_buckets(conn),
+        "CREATE INDEX idx_accounts_merkle_bucket ON accounts (merkle_bucket)",
+    ],
+    # 9: case-insensitive name order for prefix search (name_index.py)
+    [
+        "CREATE INDEX idx_accounts_name_nocase ON accounts (name COLLATE NOCASE, name)",
+    ],
+    # 10: shard files (shard_router.py): which shard a file is, batches
+    # prepared for a cross-shard commit, and the coordinator's decisions
+    [
+        """
+        CREATE TABLE shard_layout (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            shard INTEGER NOT NULL,
+            shard_count INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE prepared_batches (
+            xid TEXT PRIMARY KEY,
+            coordinator INTEGER NOT NULL,
+            accounts TEXT NOT NULL,
+            tx_rows TEXT NOT NULL,
+            prepared_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """,
+        """
+        CREATE TABLE batch_decisions (
+            xid TEXT PRIMARY KEY,
+            participants TEXT NOT NULL,
+            decided_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """,
+    ],
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn=None):
+    conn = conn or get_conn()
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
 
+def _create_schema(conn):
+    # BEGIN IMMEDIATE takes the write lock first, so two processes opening
+    # the same file cannot both apply a migration
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = schema_version(conn)
+        for target in range(version + 1, SCHEMA_VERSION + 1):
+            for step in MIGRATIONS[target - 1]:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {target}")
         conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
 
 
+def init_db():
+    """Create tables if they don't exist (once per process per database)."""
+    get_conn()
+
+
+@_reads
 def load_accounts():
     """Load accounts from DB into {name: bank(...)}."""
-    init_db()
-
     # reset global counters
     bank.num_bank_acc = 0
     bank.total_bank_balance = 0
 
     accounts = {}
 
-    with get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT name, password, balance FROM accounts")
-        rows = cur.fetchall()
+    rows = get_conn().execute(
+        "SELECT name, password, balance_cents FROM accounts").fetchall()
 
-        for name, password, balance in rows:
-            acc = bank(name, password, balance)
-            acc.history = load_recent_history(name, limit=5)
-            accounts[name] = acc
+    # One set-based query for every account's recent history
+    histories = load_recent_histories()
 
+    for name, password, balance in rows:
+        accounts[name] = bank.restore(
+            name, password, balance, histories.get(name, ()))
+
+    bank.adjust_totals(
+        accounts=len(accounts), balance=sum(acc.balance for acc in accounts.values()))
     return accounts
 
 
+@_reads
+def load_account(name: str):
+    """Load a single account (or None) without touching the global counters."""
+    row = get_conn().execute(
+        "SELECT name, password, balance_cents FROM accounts WHERE name = ?", (name,)
+    ).fetchone()
+    if row is None:
+        return None
+    return bank.restore(*row, load_recent_history(name))
+
+
+def iter_accounts(batch_size: int = 1000):
+    """Stream every stored account in name order, one batch of rows at a time."""
+    for rows in _pages(
+            "SELECT name, password, balance_cents FROM accounts ORDER BY name", size=batch_size):
+        histories = load_recent_histories(names=[name for name, _, _ in rows])
+        for name, password, balance in rows:
+            yield bank.restore(name, password, balance, histories.get(name, ()))
+
+
+def iter_account_names(batch_size: int = 1000):
+    for rows in _pages("SELECT name FROM accounts ORDER BY name", size=batch_size):
+        for (name,) in rows:
+            yield name
+
+
+@_reads
+def load_accounts_page(after_name: str = "", limit: int = 1000):
+    """Up to `limit` accounts named after `after_name`, in name order (keyset page)."""
+    rows = get_conn().execute(
+        "SELECT name, password, balance_cents FROM accounts WHERE name > ? ORDER BY name LIMIT ?",
+        (after_name, limit)).fetchall()
+    histories = load_recent_histories(names=[name for name, _, _ in rows]) if rows else {}
+    return [bank.restore(name, password, balance, histories.get(name, ()))
+            for name, password, balance in rows]
+
+
+@_reads
+def load_account_names_page(after_name: str = "", limit: int = 1000):
+    return [name for (name,) in get_conn().execute(
+        "SELECT name FROM accounts WHERE name > ? ORDER BY name LIMIT ?", (after_name, limit))]
+
+
+# Sorts after every character, so prefix + _MAX_CHAR bounds a prefix range
+_MAX_CHAR = "\U0010ffff"
+
+
+@metrics.timed("db.scan_account_names")
+@_reads
+def scan_account_names(prefix: str, start: str, limit: int, descending: bool = False):
+    """
+    Up to `limit` names that start with `prefix` ignoring ASCII case, read
+    from idx_accounts_name_nocase: from `start` upwards (inclusive), or
+    with descending=True from just below `start` downwards.
+    """
+    if descending:
+        low, high, order = prefix, start, "DESC"
+    else:
+        low, high, order = max(prefix, start), prefix + _MAX_CHAR, "ASC"
+    return [name for (name,) in get_conn().execute(f"""
+        SELECT name FROM accounts
+        WHERE name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE
+        ORDER BY name COLLATE NOCASE {order}, name {order}
+        LIMIT ?
+    """, (low, high, limit))]
+
+
+@_reads
+def find_account_names(keys):
+    """Names equal to any of `keys` ignoring ASCII case."""
+    keys = list(keys)
+    names = []
+    conn = get_conn()
+    for i in range(0, len(keys), _NAMES_PER_QUERY):
+        chunk = keys[i:i + _NAMES_PER_QUERY]
+        names += [name for (name,) in conn.execute(f"""
+            SELECT name FROM accounts
+            WHERE name COLLATE NOCASE IN ({', '.join('?' * len(chunk))})
+        """, chunk)]
+    return names
+
+
+# =============================
+# Bank-wide aggregates
+# =============================
+# bank_summary and daily_tx_stats are maintained by the triggers in
+# migration 4, so reading them is O(1) and correct for every process that
+# shares the file. verify_summary() recomputes them from scratch.
+
+DailyStat = namedtuple("DailyStat", ["day", "type", "tx_count", "volume_cents"])
+
+_ACTUAL_TOTALS_SQL = "SELECT COUNT(*), COALESCE(SUM(balance_cents), 0) FROM accounts"
+_ACTUAL_DAILY_SQL = """
+    SELECT date(created_at), type, COUNT(*), COALESCE(SUM(amount_cents), 0)
+    FROM transactions
+    GROUP BY 1, 2
+"""
+
+
+def _rebuild_summary(conn, archived_daily=()):
+    conn.execute("DELETE FROM bank_summary")
+    conn.execute(
+        "INSERT INTO bank_summary (id, account_count, total_balance_cents) "
+        f"SELECT 1, * FROM ({_ACTUAL_TOTALS_SQL})")
+    conn.execute("DELETE FROM daily_tx_stats")
+    conn.execute(
+        f"INSERT INTO daily_tx_stats (day, type, tx_count, volume_cents) {_ACTUAL_DAILY_SQL}")
+    _adjust_daily_stats(conn, archived_daily)
+
+
+def _adjust_daily_stats(conn, rows, sign=1):
+    """Add (or with sign=-1 subtract) (day, type, count, volume) rows."""
+    conn.executemany("""
+        INSERT INTO daily_tx_stats (day, type, tx_count, volume_cents)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (day, type) DO UPDATE
+        SET tx_count = tx_count + excluded.tx_count,
+            volume_cents = volume_cents + excluded.volume_cents
+    """, [(day, tx_type, sign * count, sign * volume) for day, tx_type, count, volume in rows])
+    if sign < 0:
+        conn.execute("DELETE FROM daily_tx_stats WHERE tx_count <= 0")
+
+
+@_reads
+def load_totals():
+    """Return (number of accounts, total balance in cents) from the summary row."""
+    count, total = get_conn().execute(
+        "SELECT account_count, total_balance_cents FROM bank_summary WHERE id = 1"
+    ).fetchone()
+    return count, total
+
+
+@_reads
+def daily_tx_stats(since=None, until=None):
+    """
+    Return DailyStat rows (per day and type: count and volume in cents),
+    oldest day first. `since` / `until` are inclusive 'YYYY-MM-DD' dates.
+    """
+    clauses, params = [], []
+    if since:
+        clauses.append("day >= ?")
+        params.append(since)
+    if until:
+        clauses.append("day <= ?")
+        params.append(until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    rows = get_conn().execute(f"""
+        SELECT day, type, tx_count, volume_cents
+        FROM daily_tx_stats
+        {where}
+        ORDER BY day, type
+    """, params).fetchall()
+    return [DailyStat(*row) for row in rows]
+
+
+def verify_summary(repair: bool = False):
+    """
+    Recompute the aggregates from accounts/transactions and compare.
+    Returns a list of human-readable mismatches (empty when consistent);
+    with repair=True the stored aggregates are rebuilt in the same transaction.
+    Archived rows count towards the daily stats.
+    """
+    archived_daily = _archived_daily_stats()
+    with _write() as conn:
+        # Read both sides inside one transaction so concurrent writers
+        # cannot make a consistent summary look drifted
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE" if repair else "BEGIN")
+        problems = []
+
+        stored = conn.execute(
+            "SELECT account_count, total_balance_cents FROM bank_summary WHERE id = 1"
+        ).fetchone()
+        actual = conn.execute(_ACTUAL_TOTALS_SQL).fetchone()
+        if stored != actual:
+            problems.append(
+                f"accounts/balance: stored {stored}, actual {actual}")
+
+        stored_daily = {
+            (day, tx_type): (count, volume) for day, tx_type, count, volume
+            in conn.execute("SELECT day, type, tx_count, volume_cents FROM daily_tx_stats")}
+        actual_daily = {
+            (day, tx_type): (count, volume) for day, tx_type, count, volume
+            in conn.execute(_ACTUAL_DAILY_SQL)}
+        for day, tx_type, count, volume in archived_daily:
+            hot_count, hot_volume = actual_daily.get((day, tx_type), (0, 0))
+            actual_daily[(day, tx_type)] = (hot_count + count, hot_volume + volume)
+        for key in sorted(stored_daily.keys() | actual_daily.keys()):
+            if stored_daily.get(key) != actual_daily.get(key):
+                problems.append(
+                    f"{key[0]} {key[1]}: stored {stored_daily.get(key)}, "
+                    f"actual {actual_daily.get(key)}")
+
+        if problems and repair:
+            _rebuild_summary(conn, archived_daily)
+    return problems
+
+
+# (name, password, balance_cents, merkle_bucket); use _store_accounts(),
+# which also keeps the bucket digests current
+UPSERT_ACCOUNT_SQL = """
+    INSERT INTO accounts (name, password, balance_cents, merkle_bucket)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(name) DO UPDATE SET
+      password=excluded.password,
+      balance_cents=excluded.balance_cents
+"""
+
+
 def upsert_account(acc: bank):
     """Insert or update an account row."""
-    init_db()
-    with get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO accounts (name, password, balance)
-            VALUES (?, ?, ?)
-            ON CONFLICT(name) DO UPDATE SET
-              password=excluded.password,
-              balance=excluded.balance
-        """, (acc.name, acc.password, acc.balance))
-        conn.commit()
+    with _write() as conn:
+        _store_accounts(conn, [(acc.name, acc.password, acc.balance)])
+
+
+def upsert_accounts(accs):
+    """Insert or update many account rows in a single transaction."""
+    rows = [(acc.name, acc.password, acc.balance) for acc in accs]
+    if not rows:
+        return
+
+    with _write() as conn:
+        _store_accounts(conn, rows)
 
 
 def delete_account(name: str):
-    """Delete account and its transactions."""
-    init_db()
-    with get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM transactions WHERE account_name = ?", (name,))
-        cur.execute("DELETE FROM accounts WHERE name = ?", (name,))
-        conn.commit()
+    """Delete account and its transactions, archived ones included."""
+    archived_daily = _delete_archived(name, _archived_periods(name))
+    with _write() as conn:
+        _adjust_daily_stats(conn, archived_daily, sign=-1)
+        conn.execute("DELETE FROM archived_ledger WHERE account_name = ?", (name,))
+        conn.execute("DELETE FROM transactions WHERE account_name = ?", (name,))
+        _remove_account(conn, name)
+
+
+INSERT_TRANSACTION_SQL = """
+    INSERT INTO transactions (account_name, type, amount_cents, note)
+    VALUES (?, ?, ?, ?)
+"""
 
 
 def log_transaction(account_name: str, tx_type: str, amount=None, note=None):
-    """Write a transaction record."""
-    init_db()
-    with get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO transactions (account_name, type, amount, note)
+    """Write a transaction record (amount in integer cents, or None)."""
+    with _write() as conn:
+        conn.execute(INSERT_TRANSACTION_SQL, (account_name, tx_type, amount, note))
+
+
+def write_batch(accs, tx_rows):
+    """
+    Upsert accounts and insert (account_name, type, amount_cents, note) transaction
+    rows in ONE transaction: either everything lands or nothing does.
+    """
+    with _write() as conn:
+        _store_accounts(conn, [(acc.name, acc.password, acc.balance) for acc in accs])
+        conn.executemany(INSERT_TRANSACTION_SQL, tx_rows)
+
+
+# =============================
+# Cross-shard batches
+# =============================
+# The participant side of shard_router's two-phase commit. Every shard but
+# the coordinator first stores its part of a batch in prepared_batches
+# without applying it. The coordinator then applies its own part and
+# records the decision in batch_decisions in one transaction, and the
+# other shards apply and drop their parts. A prepared part with no
+# decision anywhere is rolled back.
+
+def claim_shard(shard: int, shard_count: int):
+    """Record which shard of how many this file is; ValueError on a mismatch."""
+    with _write() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO shard_layout (id, shard, shard_count) VALUES (1, ?, ?)",
+            (shard, shard_count))
+        stored = conn.execute("SELECT shard, shard_count FROM shard_layout").fetchone()
+    if stored != (shard, shard_count):
+        raise ValueError(
+            f"This database is shard {stored[0]} of {stored[1]}, "
+            f"not shard {shard} of {shard_count}.")
+
+
+def prepare_batch(xid: str, coordinator: int, accs, tx_rows):
+    """Stage this shard's accounts and transaction rows for batch `xid`."""
+    with _write() as conn:
+        conn.execute(
+            "INSERT INTO prepared_batches (xid, coordinator, accounts, tx_rows) "
+            "VALUES (?, ?, ?, ?)",
+            (xid, coordinator,
+             json.dumps([(acc.name, acc.password, acc.balance) for acc in accs]),
+             json.dumps([list(row) for row in tx_rows])))
+
+
+def commit_prepared(xid: str):
+    """Apply and drop the staged part of `xid`; False if there is none (already applied)."""
+    with _write() as conn:
+        row = conn.execute(
+            "SELECT accounts, tx_rows FROM prepared_batches WHERE xid = ?", (xid,)).fetchone()
+        if row is None:
+            return False
+        _store_accounts(conn, json.loads(row[0]))
+        conn.executemany(INSERT_TRANSACTION_SQL, json.loads(row[1]))
+        conn.execute("DELETE FROM prepared_batches WHERE xid = ?", (xid,))
+    return True
+
+
+def abort_prepared(xid: str):
+    with _write() as conn:
+        conn.execute("DELETE FROM prepared_batches WHERE xid = ?", (xid,))
+
+
+def record_decision(xid: str, participants, accs, tx_rows):
+    """
+    Commit point of batch `xid`: apply the coordinator's own part and record
+    that every other participant must apply theirs, in one transaction.
+    """
+    with _write() as conn:
+        _store_accounts(conn, [(acc.name, acc.password, acc.balance) for acc in accs])
+        conn.executemany(INSERT_TRANSACTION_SQL, tx_rows)
+        conn.execute(
+            "INSERT INTO batch_decisions (xid, participants) VALUES (?, ?)",
+            (xid, json.dumps(sorted(participants))))
+
+
+def forget_decision(xid: str):
+    with _write() as conn:
+        conn.execute("DELETE FROM batch_decisions WHERE xid = ?", (xid,))
+
+
+@_reads
+def load_prepared():
+    """xids of batches staged on this shard and not yet applied or rolled back."""
+    return [xid for (xid,) in get_conn().execute(
+        "SELECT xid FROM prepared_batches ORDER BY prepared_at, xid")]
+
+
+@_reads
+def load_decisions():
+    """{xid: participant shards} for decisions recorded on this shard."""
+    return {xid: json.loads(participants) for xid, participants in get_conn().execute(
+        "SELECT xid, participants FROM batch_decisions")}
+
+
+# =============================
+# Credentials
+# =============================
+
+@_reads
+def load_password(name: str):
+    """Stored password hash for one account, or None."""
+    row = get_conn().execute(
+        "SELECT password FROM accounts WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+@_reads
+def plaintext_passwords(after_name: str = "", limit: int = 1000):
+    """Next `limit` (name, password) rows, in name order, not yet hashed."""
+    return get_conn().execute("""
+        SELECT name, password FROM accounts
+        WHERE name > ?
+          AND password NOT LIKE 'scrypt$%'
+          AND password NOT LIKE 'pbkdf2_sha256$%'
+        ORDER BY name
+        LIMIT ?
+    """, (after_name, limit)).fetchall()
+
+
+def replace_passwords(rows):
+    """
+    Apply (new_password, name, old_password) rows in one transaction. A row
+    is skipped if the password changed since it was read; returns rows updated.
+    """
+    rows = list(rows)
+    with _write() as conn:
+        stored = _stored_accounts(conn, [name for _, name, _ in rows])
+        changed = [(name, new_password, stored[name][1]) for new_password, name, old_password
+                   in rows if name in stored and stored[name][0] == old_password]
+        _store_accounts(conn, changed)
+    return len(changed)
+
+
+# =============================
+# Bulk import checkpoints
+# =============================
+
+Checkpoint = namedtuple("Checkpoint", ["fingerprint", "position", "history_rows"])
+
+
+@_reads
+def load_checkpoint(source: str):
+    """Return the saved Checkpoint for an import source, or None."""
+    row = get_conn().execute(
+        "SELECT fingerprint, position, history_rows FROM migration_checkpoints "
+        "WHERE source = ?", (source,)).fetchone()
+    return Checkpoint(*row) if row else None
+
+
+def clear_checkpoint(source: str):
+    with _write() as conn:
+        conn.execute("DELETE FROM migration_checkpoints WHERE source = ?", (source,))
+
+
+def import_batch(accs, history_type: str, history_rows, source: str, checkpoint: Checkpoint):
+    """
+    One import step in ONE transaction: upsert `accs`, replace their
+    `history_type` rows with `history_rows` ((account_name, type, amount_cents,
+    note) tuples) and move the source's checkpoint forward. Re-running a
+    batch therefore never duplicates history.
+    """
+    with _write() as conn:
+        _store_accounts(conn, [(acc.name, acc.password, acc.balance) for acc in accs])
+        conn.executemany(
+            "DELETE FROM transactions WHERE account_name = ? AND type = ?",
+            [(acc.name, history_type) for acc in accs])
+        conn.executemany(INSERT_TRANSACTION_SQL, history_rows)
+        conn.execute("""
+            INSERT INTO migration_checkpoints (source, fingerprint, position, history_rows)
             VALUES (?, ?, ?, ?)
-        """, (account_name, tx_type, amount, note))
-        conn.commit()
+            ON CONFLICT(source) DO UPDATE SET
+              fingerprint=excluded.fingerprint,
+              position=excluded.position,
+              history_rows=excluded.history_rows,
+              updated_at=datetime('now')
+        """, (source, *checkpoint))
+
+
+# =============================
+# End-of-day postings
+# =============================
+# Interest and fees for every account are computed and posted by a handful
+# of set-based statements in one transaction. The eod_runs row is claimed
+# first, so a date is posted at most once however often the job is re-run.
+
+EodRun = namedtuple(
+    "EodRun",
+    ["business_date", "interest_accounts", "interest_cents", "fee_accounts", "fee_cents"])
+
+# Annual basis points -> daily rate: amount = balance * bps / (10_000 * 365)
+_DAILY_BPS_DIVISOR = 10_000 * 365
+
+
+@_reads
+def load_eod_run(business_date: str):
+    row = get_conn().execute("""
+        SELECT business_date, interest_accounts, interest_cents, fee_accounts, fee_cents
+        FROM eod_runs WHERE business_date = ?
+    """, (business_date,)).fetchone()
+    return EodRun(*row) if row else None
+
+
+def post_end_of_day(business_date: str, interest_tiers, fee_cents: int = 0,
+                    fee_waiver_balance: int = 0):
+    """
+    Post one business day: daily INTEREST on every balance and a FEE on
+    balances below `fee_waiver_balance`, as ledger rows dated the end of
+    that day. `interest_tiers` holds (min_balance, annual_bps) pairs; each
+    account earns the rate of the highest tier it reaches (rounded half up
+    to the cent). Fees never take a balance below zero.
+
+    Returns the EodRun, or None when the date had already been posted.
+    """
+    tiers = sorted(interest_tiers, reverse=True)
+    rate = "CASE " + " ".join("WHEN balance_cents >= ? THEN ?" for _ in tiers) + " ELSE 0 END"
+    rate_params = [value for tier in tiers for value in tier]
+    posted_at = f"{business_date} 23:59:59"
+    note = f"End of day {business_date}"
+
+    with _write() as conn:
+        claimed = conn.execute(
+            "INSERT OR IGNORE INTO eod_runs (business_date) VALUES (?)", (business_date,))
+        if claimed.rowcount == 0:
+            return None
+
+        # Every amount is computed once, from the opening balance
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS eod_postings (
+                name TEXT PRIMARY KEY,
+                interest INTEGER NOT NULL,
+                fee INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        conn.execute(f"""
+            INSERT INTO temp.eod_postings (name, interest, fee)
+            SELECT name, interest, fee FROM (
+                SELECT name,
+                       (balance_cents * ({rate}) + {_DAILY_BPS_DIVISOR // 2})
+                           / {_DAILY_BPS_DIVISOR} AS interest,
+                       CASE WHEN balance_cents < ? THEN MIN(?, balance_cents) ELSE 0 END AS fee
+                FROM accounts
+            )
+            WHERE interest > 0 OR fee > 0
+        """, (*rate_params, fee_waiver_balance, fee_cents))
+
+        # Raising rolls the whole day back, eod_runs claim included
+        too_large = conn.execute("""
+            SELECT p.name FROM temp.eod_postings AS p JOIN accounts AS a ON a.name = p.name
+            WHERE typeof(p.interest) != 'integer' OR a.balance_cents > ? - p.interest
+            LIMIT 1
+        """, (MAX_BALANCE,)).fetchone()
+        if too_large:
+            raise ValueError(f"Account '{too_large[0]}' cannot hold a larger balance.")
+
+        for tx_type, column in (("INTEREST", "interest"), ("FEE", "fee")):
+            conn.execute(f"""
+                INSERT INTO transactions (account_name, type, amount_cents, note, created_at)
+                SELECT name, ?, {column}, ?, ?
+                FROM temp.eod_postings
+                WHERE {column} > 0
+            """, (tx_type, note, posted_at))
+        # Checksums move with every posted balance
+        deltas = Counter()
+        for name, password, balance, change in conn.execute("""
+            SELECT a.name, a.password, a.balance_cents, p.interest - p.fee
+            FROM accounts AS a JOIN temp.eod_postings AS p ON p.name = a.name
+        """):
+            deltas[merkle.bucket_of(name)] += (merkle.leaf(name, password, balance + change)
+                                               - merkle.leaf(name, password, balance))
+        conn.execute("""
+            UPDATE accounts
+            SET balance_cents = balance_cents + p.interest - p.fee
+            FROM temp.eod_postings AS p
+            WHERE accounts.name = p.name
+        """)
+        _adjust_merkle(conn, deltas)
+
+        conn.execute("""
+            UPDATE eod_runs
+            SET (interest_accounts, interest_cents, fee_accounts, fee_cents) = (
+                SELECT COUNT(*) FILTER (WHERE interest > 0), COALESCE(SUM(interest), 0),
+                       COUNT(*) FILTER (WHERE fee > 0), COALESCE(SUM(fee), 0)
+                FROM temp.eod_postings)
+            WHERE business_date = ?
+        """, (business_date,))
+        conn.execute("DROP TABLE temp.eod_postings")
+    return load_eod_run(business_date)
+
+
+# =============================
+# Account checksums
+# =============================
+# merkle_buckets holds one digest per account bucket. Every write path in
+# this module adjusts it in the same transaction as the account rows, so
+# the file stays a plain SQLite database any client can open. Comparing it
+# with the JSON mirror's tree (see merkle.py) finds drifted accounts
+# without loading either store.
+
+def _actual_merkle(conn):
+    tree = merkle.MerkleTree()
+    for name, password, balance in conn.execute(
+            "SELECT name, password, balance_cents FROM accounts"):
+        tree.add(merkle.bucket_of(name), merkle.leaf(name, password, balance))
+    return tree
+
+
+def _rebuild_merkle(conn, tree=None):
+    tree = tree or _actual_merkle(conn)
+    conn.execute("DELETE FROM merkle_buckets")
+    conn.executemany(
+        "INSERT INTO merkle_buckets (bucket, digest) VALUES (?, ?)", enumerate(tree.buckets))
+
+
+def _fill_merkle_buckets(conn):
+    names = conn.execute("SELECT name FROM accounts").fetchall()
+    conn.executemany(
+        "UPDATE accounts SET merkle_bucket = ? WHERE name = ?",
+        ((merkle.bucket_of(name), name) for (name,) in names))
+    _rebuild_merkle(conn)
+
+
+def _stored_accounts(conn, names):
+    """{name: (password, balance_cents)} for those of `names` that exist."""
+    # Take the write lock before reading: checksum deltas computed from rows
+    # another connection is about to change would leave the digests wrong
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    names = list(dict.fromkeys(names))
+    stored = {}
+    for i in range(0, len(names), _NAMES_PER_QUERY):
+        chunk = names[i:i + _NAMES_PER_QUERY]
+        stored.update((name, (password, balance)) for name, password, balance in conn.execute(f"""
+            SELECT name, password, balance_cents FROM accounts
+            WHERE name IN ({', '.join('?' * len(chunk))})
+        """, chunk))
+    return stored
+
+
+def _adjust_merkle(conn, deltas):
+    """Add {bucket: leaf hash delta} to the stored bucket digests."""
+    conn.executemany(
+        f"UPDATE merkle_buckets SET digest = (digest + ?) % {merkle.DIGEST_MOD} WHERE bucket = ?",
+        [(delta % merkle.DIGEST_MOD, bucket) for bucket, delta in deltas.items()
+         if delta % merkle.DIGEST_MOD])
+
+
+def _store_accounts(conn, rows):
+    """Upsert (name, password, balance_cents) rows and their checksums."""
+    rows = [(name, password, balance, merkle.bucket_of(name))
+            for name, password, balance in rows]
+    if not rows:
+        return
+    stored = _stored_accounts(conn, [row[0] for row in rows])
+    deltas = Counter()
+    for name, password, balance, bucket in rows:
+        if name in stored:
+            deltas[bucket] -= merkle.leaf(name, *stored[name])
+        deltas[bucket] += merkle.leaf(name, password, balance)
+        stored[name] = (password, balance)
+    conn.executemany(UPSERT_ACCOUNT_SQL, rows)
+    _adjust_merkle(conn, deltas)
+
+
+def _remove_account(conn, name):
+    stored = _stored_accounts(conn, [name]).get(name)
+    conn.execute("DELETE FROM accounts WHERE name = ?", (name,))
+    if stored is not None:
+        _adjust_merkle(conn, {merkle.bucket_of(name): -merkle.leaf(name, *stored)})
+
+
+def verify_merkle(repair: bool = False):
+    """
+    Recompute the bucket digests from the accounts table and compare.
+    Returns human-readable mismatches (empty when consistent); with
+    repair=True the stored digests are rebuilt in the same transaction.
+    """
+    with _write() as conn:
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE" if repair else "BEGIN")
+        stored = dict(conn.execute("SELECT bucket, digest FROM merkle_buckets"))
+        actual = _actual_merkle(conn)
+        problems = [f"checksum bucket {bucket}: stored {stored.get(bucket)}, actual {digest}"
+                    for bucket, digest in enumerate(actual.buckets)
+                    if stored.get(bucket) != digest]
+        if problems and repair:
+            _rebuild_merkle(conn, actual)
+    return problems
+
+
+@_reads
+def load_merkle_tree():
+    """MerkleTree over the stored bucket digests."""
+    rows = get_conn().execute("SELECT digest FROM merkle_buckets ORDER BY bucket").fetchall()
+    return merkle.MerkleTree(digest for (digest,) in rows)
+
+
+@_reads
+def load_bucket_leaves(buckets):
+    """{name: leaf hash} for the accounts in `buckets`, read through the bucket index."""
+    buckets = list(buckets)
+    leaves = {}
+    conn = get_conn()
+    for i in range(0, len(buckets), _NAMES_PER_QUERY):
+        chunk = buckets[i:i + _NAMES_PER_QUERY]
+        leaves.update((name, merkle.leaf(name, password, balance)) for name, password, balance
+                      in conn.execute(f"""
+            SELECT name, password, balance_cents
+            FROM accounts
+            WHERE merkle_bucket IN ({', '.join('?' * len(chunk))})
+        """, chunk))
+    return leaves
+
 
+# =============================
+# Archive partitions
+# =============================
+# Rows older than the hot window are moved (by the archive_transactions job)
+# into one SQLite file per year under archive_dir(). archived_ledger keeps,
+# per account and year, the id range that was moved, so history queries
+# ATTACH an archive only when rows they need can be in it. Archived rows
+# still count in daily_tx_stats.
+#
+# Each batch is copied into the archives and committed before it is
+# deleted from the hot table, so an interrupted run can leave a row in
+# both places but never in neither. Readers dedupe by id.
 
-def load_recent_history(account_name: str, limit: int = 5):
-    """Return the last N transactions as strings (newest first)."""
-    init_db()
-    with get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT type, amount, note, created_at
+ARCHIVE_COLUMNS = "id, account_name, type, amount_cents, note, created_at"
+
+# SQLite attaches at most 10 databases per connection; queries spanning
+# more years run in batches of this many
+ARCHIVE_ATTACH_BATCH = 8
+
+# Account names per IN (...) list when looking up archived ranges
+_NAMES_PER_QUERY = 500
+
+ArchiveBatch = namedtuple("ArchiveBatch", ["rows", "last_id", "periods"])
+
+
+def archive_dir():
+    return DB_FILE.parent / "archive"
+
+
+def archive_path(period: str):
+    return archive_dir() / f"{DB_FILE.stem}-{period}.db"
+
+
+@contextmanager
+def _attached(periods, create=False):
+    """
+    ATTACH the archive files for `periods` (at most ARCHIVE_ATTACH_BATCH) to
+    this thread's connection; yields (conn, aliases). Missing files are
+    skipped unless create=True, which creates them and their table.
+    """
+    # In group mode the connection is shared: keep other writers out until
+    # everything is detached again
+    with _group_lock:
+        conn = get_conn()
+        # ATTACH / DETACH are refused inside a transaction
+        flush_group()
+        aliases = []
+        try:
+            for period in periods:
+                path = archive_path(period)
+                if not create and not path.exists():
+                    continue
+                path.parent.mkdir(parents=True, exist_ok=True)
+                alias = f"archive_{period}"
+                conn.execute(f"ATTACH DATABASE ? AS {alias}", (str(path),))
+                aliases.append(alias)
+                if create:
+                    conn.execute(f"""
+                        CREATE TABLE IF NOT EXISTS {alias}.transactions (
+                            id INTEGER PRIMARY KEY,
+                            account_name TEXT NOT NULL,
+                            type TEXT NOT NULL,
+                            amount_cents INTEGER,
+                            note TEXT,
+                            created_at TEXT NOT NULL
+                        )
+                    """)
+                    conn.execute(f"""
+                        CREATE INDEX IF NOT EXISTS {alias}.idx_transactions_account_id
+                        ON transactions (account_name, id)
+                    """)
+            yield conn, aliases
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            for alias in aliases:
+                conn.execute(f"DETACH DATABASE {alias}")
+
+
+def _query_archives(periods, sql, where, params, outer_params=()):
+    """
+    Run `sql` with {source} replaced by the UNION ALL of the archived rows
+    matching `where` / `params`, ARCHIVE_ATTACH_BATCH periods at a time.
+    Returns the rows of every batch; callers merge them.
+    """
+    rows = []
+    periods = list(periods)
+    for i in range(0, len(periods), ARCHIVE_ATTACH_BATCH):
+        with _attached(periods[i:i + ARCHIVE_ATTACH_BATCH]) as (conn, aliases):
+            if not aliases:
+                continue
+            source = " UNION ALL ".join(
+                f"SELECT {ARCHIVE_COLUMNS} FROM {alias}.transactions WHERE {where}"
+                for alias in aliases)
+            rows += conn.execute(
+                sql.format(source=source), (*list(params) * len(aliases), *outer_params)
+            ).fetchall()
+    return rows
+
+
+@_reads
+def _archived_periods(account_name=None, before_id=None, above_id=None, since=None, until=None):
+    """Archive years (newest first) that may hold the account's (or anyone's) rows in the given range."""
+    clauses, params = [], []
+    if account_name is not None:
+        clauses.append("account_name = ?")
+        params.append(account_name)
+    if before_id is not None:
+        clauses.append("min_id < ?")
+        params.append(before_id)
+    if above_id is not None:
+        clauses.append("max_id > ?")
+        params.append(above_id)
+    if since:
+        clauses.append("period >= ?")
+        params.append(since[:4])
+    if until:
+        clauses.append("period <= ?")
+        params.append(until[:4])
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return [period for (period,) in get_conn().execute(f"""
+        SELECT DISTINCT period FROM archived_ledger
+        {where}
+        ORDER BY period DESC
+    """, params)]
+
+
+@_reads
+def _archived_ranges(names=None):
+    """(account, period, max_id) for every archived range, or only `names`'."""
+    conn = get_conn()
+    if names is None:
+        return conn.execute("SELECT account_name, period, max_id FROM archived_ledger").fetchall()
+    rows = []
+    for i in range(0, len(names), _NAMES_PER_QUERY):
+        chunk = names[i:i + _NAMES_PER_QUERY]
+        rows += conn.execute(f"""
+            SELECT account_name, period, max_id FROM archived_ledger
+            WHERE account_name IN ({', '.join('?' * len(chunk))})
+        """, chunk).fetchall()
+    return rows
+
+
+@_reads
+def archived_periods():
+    """Every year that has an archive file in use, oldest first."""
+    return [period for (period,) in get_conn().execute(
+        "SELECT DISTINCT period FROM archived_ledger ORDER BY period")]
+
+
+@contextmanager
+def _archive_reader(periods):
+    """
+    A private connection with the archive files for `periods` (at most
+    ARCHIVE_ATTACH_BATCH) attached, for scans that outlive one call. Unlike
+    _attached() it holds no lock, so writers carry on while it is read.
+    """
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    try:
+        aliases = []
+        for period in periods:
+            path = archive_path(period)
+            if path.exists():
+                alias = f"archive_{period}"
+                conn.execute(f"ATTACH DATABASE ? AS {alias}", (str(path),))
+                aliases.append(alias)
+        yield conn, aliases
+    finally:
+        conn.close()
+
+
+def _archived_daily_stats():
+    """(day, type, count, volume) over all archived rows."""
+    totals = {}
+    for day, tx_type, count, volume in _query_archives(
+            archived_periods(),
+            "SELECT date(created_at), type, COUNT(*), COALESCE(SUM(amount_cents), 0) "
+            "FROM ({source}) GROUP BY 1, 2", "1", ()):
+        old_count, old_volume = totals.get((day, tx_type), (0, 0))
+        totals[(day, tx_type)] = (old_count + count, old_volume + volume)
+    return [(day, tx_type, *values) for (day, tx_type), values in totals.items()]
+
+
+def _delete_archived(account_name, periods):
+    """Delete an account's archived rows; returns their daily aggregates."""
+    daily = []
+    for i in range(0, len(periods), ARCHIVE_ATTACH_BATCH):
+        with _attached(periods[i:i + ARCHIVE_ATTACH_BATCH]) as (conn, aliases):
+            for alias in aliases:
+                daily += conn.execute(f"""
+                    SELECT date(created_at), type, COUNT(*), COALESCE(SUM(amount_cents), 0)
+                    FROM {alias}.transactions WHERE account_name = ?
+                    GROUP BY 1, 2
+                """, (account_name,)).fetchall()
+                conn.execute(
+                    f"DELETE FROM {alias}.transactions WHERE account_name = ?", (account_name,))
+            conn.commit()
+    return daily
+
+
+def archive_batch(cutoff: str, after_id: int = 0, batch_size: int = 10_000):
+    """
+    Move up to `batch_size` transactions created before `cutoff`
+    ('YYYY-MM-DD') with id > after_id into their year's archive file.
+    Returns ArchiveBatch(rows moved, last id moved, years touched); pass
+    last_id back in to continue. rows == 0 means nothing is left.
+    """
+    batch = get_conn().execute("""
+        SELECT id, substr(created_at, 1, 4)
+        FROM transactions
+        WHERE id > ? AND created_at < ?
+        ORDER BY id
+        LIMIT ?
+    """, (after_id, cutoff, batch_size)).fetchall()
+    if not batch:
+        return ArchiveBatch(0, after_id, ())
+
+    periods = sorted({period for _, period in batch})
+    for i in range(0, len(periods), ARCHIVE_ATTACH_BATCH):
+        group = periods[i:i + ARCHIVE_ATTACH_BATCH]
+        with _attached(group, create=True) as (conn, aliases):
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_ids (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.archive_ids")
+            conn.executemany(
+                "INSERT INTO temp.archive_ids (id) VALUES (?)",
+                [(row_id,) for row_id, period in batch if period in group])
+
+            # 1) copy into the archives and make that durable
+            for period, alias in zip(group, aliases):
+                conn.execute(f"""
+                    INSERT OR IGNORE INTO {alias}.transactions ({ARCHIVE_COLUMNS})
+                    SELECT {ARCHIVE_COLUMNS} FROM main.transactions
+                    WHERE id IN (SELECT id FROM temp.archive_ids)
+                      AND substr(created_at, 1, 4) = ?
+                """, (period,))
+            conn.commit()
+
+            # 2) record the ranges, keep the rows in the daily stats, drop them
+            conn.execute("""
+                INSERT INTO archived_ledger (account_name, period, min_id, max_id)
+                SELECT account_name, substr(created_at, 1, 4), MIN(id), MAX(id)
+                FROM main.transactions
+                WHERE id IN (SELECT id FROM temp.archive_ids)
+                GROUP BY 1, 2
+                ON CONFLICT (account_name, period) DO UPDATE
+                SET min_id = MIN(min_id, excluded.min_id),
+                    max_id = MAX(max_id, excluded.max_id)
+            """)
+            _adjust_daily_stats(conn, conn.execute("""
+                SELECT date(created_at), type, COUNT(*), COALESCE(SUM(amount_cents), 0)
+                FROM main.transactions
+                WHERE id IN (SELECT id FROM temp.archive_ids)
+                GROUP BY 1, 2
+            """).fetchall())
+            conn.execute(
+                "DELETE FROM main.transactions WHERE id IN (SELECT id FROM temp.archive_ids)")
+            conn.execute("DELETE FROM temp.archive_ids")
+            conn.commit()
+
+    return ArchiveBatch(len(batch), batch[-1][0], tuple(periods))
+
+
+def vacuum():
+    """Rebuild bank.db so space freed by archiving is returned to the OS."""
+    with _group_lock:
+        flush_group()
+        get_conn().execute("VACUUM")
+
+
+def _history_entry(tx_type, amount, note, created_at):
+    return HistoryEntry(
+        tx_type, amount, HistoryEntry.parse_timestamp(created_at), note)
+
+
+@_reads
+def load_recent_history(account_name: str, limit: int = HISTORY_CAPACITY):
+    """Return the last N transactions as HistoryEntry records (oldest first)."""
+    rows, _ = query_history(account_name, limit=limit)
+    return [_history_entry(*row[1:]) for row in reversed(rows)]
+
+
+_RECENT_ARCHIVED_SQL = """
+    SELECT account_name, type, amount_cents, note, created_at, id
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (
+                      PARTITION BY account_name ORDER BY id DESC
+                  ) AS rn
+        FROM ({source})
+    )
+    WHERE rn <= ?
+"""
+
+
+@_reads
+def load_recent_histories(limit: int = HISTORY_CAPACITY, names=None):
+    """
+    Return {name: last N transactions as HistoryEntry records (oldest first)}.
+    Covers every account, or only `names` when given.
+    """
+    where, params = "", []
+    if names is not None:
+        names = list(names)
+        if not names:
+            return {}
+        where = f"WHERE account_name IN ({', '.join('?' * len(names))})"
+        params = names
+
+    cur = get_conn().cursor()
+    cur.execute(f"""
+        SELECT account_name, type, amount_cents, note, created_at, id
+        FROM (
+            SELECT account_name, type, amount_cents, note, created_at, id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY account_name ORDER BY id DESC
+                   ) AS rn
             FROM transactions
-            WHERE account_name = ?
+            {where}
+        )
+        WHERE rn <= ?
+        ORDER BY account_name, id
+    """, (*params, limit))
+    rows = cur.fetchall()
+
+    by_account = {}
+    for account_name, *row in rows:
+        by_account.setdefault(account_name, []).append(row)
+
+    # Accounts with too few hot rows, or with archived rows newer than the
+    # oldest hot one, take the rest from the archives
+    short, periods = set(), set()
+    for account_name, period, max_id in _archived_ranges(names):
+        hot = by_account.get(account_name, ())
+        if len(hot) < limit or max_id > hot[0][-1]:
+            short.add(account_name)
+            periods.add(period)
+
+    short = sorted(short)
+    for i in range(0, len(short), _NAMES_PER_QUERY):
+        chunk = short[i:i + _NAMES_PER_QUERY]
+        for account_name, *row in _query_archives(
+                sorted(periods, reverse=True), _RECENT_ARCHIVED_SQL,
+                f"account_name IN ({', '.join('?' * len(chunk))})", chunk, (limit,)):
+            by_account.setdefault(account_name, []).append(row)
+    for account_name in short:
+        # Dedupe by id: a row can sit in both places after an interrupted archive run
+        merged = {row[-1]: row for row in by_account.get(account_name, ())}
+        by_account[account_name] = [merged[i] for i in sorted(merged)][-limit:]
+
+    return {
+        account_name: [_history_entry(*row[:-1]) for row in account_rows]
+        for account_name, account_rows in by_account.items()}
+
+
+# =============================
+# Paged history
+# =============================
+
+class TxRow(namedtuple("TxRow", ["id", "type", "amount", "note", "created_at"])):
+    """One ledger row; str() gives the same line format as the history view."""
+    __slots__ = ()
+
+    def __str__(self):
+        return str(_history_entry(self.type, self.amount, self.note, self.created_at))
+
+
+@_reads
+def query_history(account_name: str, before_id=None, limit: int = 10,
+                  tx_types=None, since=None, until=None):
+    """
+    Return (rows, next_before_id): up to `limit` TxRows for one account,
+    newest first, strictly older than `before_id` when given.
+
+    Filters: `tx_types` is an iterable of type names; `since` / `until` are
+    inclusive 'YYYY-MM-DD' dates. Pass next_before_id back in to get the
+    next (older) page; it is None once the history is exhausted.
+
+    Keyset paging walks idx_transactions_account_id from the cursor, so a
+    page costs the same no matter how deep into the ledger it is.
+    """
+    clauses = ["account_name = ?"]
+    params = [account_name]
+
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+    if tx_types:
+        tx_types = list(tx_types)
+        clauses.append(f"type IN ({', '.join('?' * len(tx_types))})")
+        params.extend(tx_types)
+    if since:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until:
+        clauses.append("created_at < date(?, '+1 day')")
+        params.append(until)
+
+    where = " AND ".join(clauses)
+    rows = get_conn().execute(f"""
+        SELECT id, type, amount_cents, note, created_at
+        FROM transactions
+        WHERE {where}
+        ORDER BY id DESC
+        LIMIT ?
+    """, (*params, limit)).fetchall()
+
+    # Past the hot window: the page is short, or archived rows interleave
+    # with it. Either way only the archive years that can match are attached.
+    periods = _archived_periods(
+        account_name, before_id, rows[-1][0] if len(rows) == limit else None, since, until)
+    if periods:
+        rows += _query_archives(periods, """
+            SELECT id, type, amount_cents, note, created_at
+            FROM ({source})
             ORDER BY id DESC
             LIMIT ?
-        """, (account_name, limit))
-        rows = cur.fetchall()
+        """, where, params, (limit,))
+        rows = sorted({row[0]: row for row in rows}.values(), reverse=True)[:limit]
 
-    history = []
-    for tx_type, amount, note, created_at in rows:
-        if amount is None:
-            history.append(f"{created_at} | {tx_type} | {note or ''}".strip())
-        else:
-            history.append(
-                f"{created_at} | {tx_type} | ${amount} | {note or ''}".strip())
-    return history
+    rows = [TxRow(*row) for row in rows]
+    next_before_id = rows[-1].id if len(rows) == limit else None
+    return rows, next_before_id
+
+
+# =============================
+# Ledger scans (analytics)
+# =============================
+# Column expressions analytics and exports can pull in bulk. SQLite does
+# the per-row decoding (signed amount, YYYYMM month, unix timestamp) so
+# values arrive ready to be packed into arrays.
+
+LEDGER_COLUMNS = {
+    "account_name": "account_name",
+    "id": "id",
+    "type": "type",
+    "amount": "amount_cents",
+    "note": "note",
+    "created_at": "created_at",
+    "created_ts": "CAST(strftime('%s', created_at) AS INTEGER)",
+    "month": "CAST(substr(created_at, 1, 4) || substr(created_at, 6, 2) AS INTEGER)",
+    "delta": """COALESCE(CASE type
+                    WHEN 'DEPOSIT' THEN amount_cents
+                    WHEN 'TRANSFER_IN' THEN amount_cents
+                    WHEN 'INTEREST' THEN amount_cents
+                    WHEN 'WITHDRAW' THEN -amount_cents
+                    WHEN 'TRANSFER_OUT' THEN -amount_cents
+                    WHEN 'FEE' THEN -amount_cents
+                END, 0)""",
+}
+
+
+def iter_ledger(columns, chunk_rows: int = 100_000, account_name=None,
+                since=None, until=None, tx_types=None):
+    """
+    Yield lists of up to `chunk_rows` row tuples holding `columns` (keys of
+    LEDGER_COLUMNS), ordered by account then id, so each account's rows are
+    contiguous and in ledger order. `since` / `until` are inclusive
+    'YYYY-MM-DD' dates; `tx_types` is an iterable of type names. Rows moved
+    to the yearly archives are included. Only one chunk is held in memory
+    at a time.
+    """
+    clauses, params = [], []
+    if account_name is not None:
+        clauses.append("account_name = ?")
+        params.append(account_name)
+    if tx_types:
+        tx_types = list(tx_types)
+        clauses.append(f"type IN ({', '.join('?' * len(tx_types))})")
+        params.extend(tx_types)
+    if since:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until:
+        clauses.append("created_at < date(?, '+1 day')")
+        params.append(until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    select = ", ".join(LEDGER_COLUMNS[c] for c in columns)
+
+    periods = _archived_periods(account_name, since=since, until=until)
+    if not periods:
+        # A dedicated cursor keeps its place while the caller works on a chunk
+        yield from _pages(f"""
+            SELECT {select}
+            FROM transactions
+            {where}
+            ORDER BY account_name, id
+        """, params, chunk_rows)
+        return
+
+    # Archived rows too: merge the hot table with every batch of archive
+    # files, each read in the same order. Rows an interrupted archive run
+    # left in two places are adjacent in the merge and kept once.
+    yield from _chunked(_merged_ledger(select, where, params, periods, chunk_rows), chunk_rows)
+
+
+def _ledger_stream(conn, sql, params, chunk_rows):
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    while rows := cur.fetchmany(chunk_rows):
+        yield from rows
+
+
+def _hot_ledger_stream(sql, params, chunk_rows):
+    for rows in _pages(sql, params, chunk_rows):
+        yield from rows
+
+
+def _merged_ledger(select, where, params, periods, chunk_rows):
+    """Rows of `select` from the hot table and `periods`' archives, in ledger order."""
+    sql = f"SELECT account_name, id, {select} FROM {{source}} {where} ORDER BY account_name, id"
+    streams = [_hot_ledger_stream(sql.format(source="transactions"), params, chunk_rows)]
+    with ExitStack() as stack:
+        for i in range(0, len(periods), ARCHIVE_ATTACH_BATCH):
+            conn, aliases = stack.enter_context(
+                _archive_reader(periods[i:i + ARCHIVE_ATTACH_BATCH]))
+            if aliases:
+                source = " UNION ALL ".join(
+                    f"SELECT {ARCHIVE_COLUMNS} FROM {alias}.transactions" for alias in aliases)
+                streams.append(_ledger_stream(
+                    conn, sql.format(source=f"({source})"), params, chunk_rows))
+
+        last = None
+        for row in heapq.merge(*streams, key=lambda row: row[:2]):
+            if row[:2] != last:
+                last = row[:2]
+                yield row[2:]
+
+
+def _chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@_reads
+def load_balances(account_name=None):
+    """Return {name: balance in cents} for every account, or just one."""
+    if account_name is None:
+        rows = get_conn().execute("SELECT name, balance_cents FROM accounts")
+    else:
+        rows = get_conn().execute(
+            "SELECT name, balance_cents FROM accounts WHERE name = ?", (account_name,))
+    return dict(rows)
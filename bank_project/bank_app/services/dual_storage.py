@@ -1,7 +1,36 @@
 # bank_project/bank_app/services/dual_storage.py
 
+import threading
+
 from bank_project.bank_app.services import storage as json_storage
 from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services import merkle
+from bank_project.bank_app.services import metrics
+from bank_project.bank_app.services.account_repository import (
+    AccountRepository, DEFAULT_CACHE_SIZE)
+from bank_project.bank_app.services.mirror_writer import (
+    MirrorWriter, DEFAULT_QUEUE_SIZE)
+
+MIRROR_MODES = {"snapshot", "journal"}
+
+# Journal size that triggers a background fold into accounts.json
+DEFAULT_COMPACT_BYTES = 8 * 1024 * 1024
+
+
+@metrics.timed("dual.verify_mirror")
+def verify_mirror(db=db_storage, repair=False):
+    """
+    Compare bank.db (or the shards behind a ShardRouter `db`) with the JSON
+    mirror through their account hash trees. Returns
+    merkle.Divergence(name, problem) for every account whose name, password
+    or balance differ (empty when the stores agree). With repair=True the
+    SQLite bucket digests are first rebuilt from its accounts.
+    """
+    if repair:
+        db.verify_merkle(repair=True)
+    return merkle.compare(
+        db.load_merkle_tree(), json_storage.mirror_tree(),
+        db.load_bucket_leaves, json_storage.mirror_bucket_leaves)
 
 
 class DualStorage:
@@ -9,27 +38,124 @@ class DualStorage:
     Mirror storage:
     - LOAD from SQLite (source of truth)
     - WRITE to both SQLite + JSON
+
+    The JSON mirror is either rewritten as a full snapshot on every write
+    ("snapshot") or appended to a journal that is compacted into the
+    snapshot in the background and on close ("journal").
+
+    With write_behind=True SQLite is still written synchronously, but JSON
+    mirror writes are queued and applied by a background MirrorWriter.
+
+    `db` is the SQLite backend: the db_storage module (one bank.db) or a
+    shard_router.ShardRouter spreading accounts over several files.
     """
 
+    def __init__(self, mirror="snapshot", compact_bytes=DEFAULT_COMPACT_BYTES,
+                 write_behind=False, queue_size=DEFAULT_QUEUE_SIZE, db=db_storage):
+        if mirror not in MIRROR_MODES:
+            raise ValueError(f"Unknown mirror mode '{mirror}'.")
+        self.db = db
+        self.mirror = mirror
+        self.compact_bytes = compact_bytes
+        self._compactor = None
+        self._writer = MirrorWriter(
+            self._apply_mirror, queue_size) if write_behind else None
+
+    @metrics.timed("dual.load_accounts")
     def load_accounts(self):
         # Source of truth
-        accounts = db_storage.load_accounts()
+        accounts = self.db.load_accounts()
 
         # Keep JSON in sync on startup too
-        json_storage.save_data(accounts)
+        self._submit("snapshot", accounts)
         return accounts
 
+    def open_accounts(self, cache_size=DEFAULT_CACHE_SIZE):
+        # Lazy alternative to load_accounts(): accounts are read from SQLite
+        # on first use and only the hot ones are kept in memory
+        return AccountRepository(cache_size, write_back=self._write_back, db=self.db)
+
+    @metrics.timed("dual.save_all")
     def save_all(self, accounts):
         # DB: upsert every account
         for acc in accounts.values():
-            db_storage.upsert_account(acc)
+            self.db.upsert_account(acc)
 
         # JSON: write full snapshot
-        json_storage.save_data(accounts)
+        self._submit("snapshot", accounts)
+
+    @metrics.timed("dual.flush")
+    def flush(self, accounts, changed):
+        """Persist only the accounts that changed since the last flush."""
+        if not changed:
+            return
+
+        # DB: one transaction for every touched account
+        self.db.upsert_accounts(changed)
+        self._committed(accounts, [acc.name for acc in changed])
+        self._mirror(accounts, changed)
+
+    @metrics.timed("dual.commit_batch")
+    def commit_batch(self, accounts, changed, tx_rows):
+        """Write balances and transaction rows atomically, then mirror them."""
+        self.db.write_batch(changed, tx_rows)
+        if changed:
+            self._committed(accounts, [acc.name for acc in changed])
+            self._mirror(accounts, changed)
+
+    def _write_back(self, changed):
+        # Accounts evicted dirty from the cache: same path as a flush, but
+        # the snapshot mode picks them up from the DB on its next rewrite
+        self.db.upsert_accounts(changed)
+        if self.mirror == "journal":
+            self._mirror(None, changed)
+
+    @staticmethod
+    def _committed(accounts, names):
+        # Lazily loaded account stores prune their pending name search entries
+        if hasattr(accounts, "committed"):
+            accounts.committed(names)
+
+    def _mirror(self, accounts, changed):
+        if self.mirror == "snapshot":
+            # JSON: snapshot file has to be rewritten as a whole
+            op = ("snapshot", accounts)
+        else:
+            # JSON: one journal line per changed account
+            op = ("journal", json_storage.put_records(changed))
+        self._submit(*op)
+
+    def _submit(self, kind, payload):
+        if self._writer is None:
+            self._apply_mirror([(kind, payload)])
+            return
+
+        # Hand the worker a stable view: the caller keeps mutating the dict
+        if kind == "snapshot" and isinstance(payload, dict):
+            payload = dict(payload)
+        self._writer.submit(kind, payload)
+
+    @metrics.timed("dual.mirror_apply")
+    def _apply_mirror(self, ops):
+        for kind, payload in ops:
+            if kind == "snapshot":
+                json_storage.save_data(payload)
+                continue
+
+            size = json_storage.append_journal(payload)
+            if size >= self.compact_bytes:
+                self._compact_in_background()
+
+    def _compact_in_background(self):
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(
+            target=json_storage.compact, name="json-compactor", daemon=True)
+        self._compactor.start()
 
     def sync_account(self, acc):
         # Write this account to DB
-        db_storage.upsert_account(acc)
+        self.db.upsert_account(acc)
 
         # JSON is a snapshot file, so easiest is save all accounts elsewhere.
         # But to keep this function simple, we just update snapshot later via save_all().
@@ -37,14 +163,69 @@ class DualStorage:
         # We'll keep it simple and let main call save_all after each change if you want true mirroring.
         pass
 
+    @metrics.timed("dual.delete_account")
     def delete_account(self, name: str, accounts):
         # Delete in DB
-        db_storage.delete_account(name)
+        self.db.delete_account(name)
+        self._committed(accounts, [name])
 
-        # Update JSON snapshot
-        json_storage.save_data(accounts)
+        # Update JSON mirror
+        if self.mirror == "journal":
+            self._submit("journal", [json_storage.delete_record(name)])
+        else:
+            self._submit("snapshot", accounts)
 
     def log_tx(self, account_name: str, tx_type: str, amount=None, note=None):
         # JSON doesn’t store transaction table; it stores history inside the account object.
         # DB gets the full transaction log:
-        db_storage.log_transaction(account_name, tx_type, amount, note)
+        self.db.log_transaction(account_name, tx_type, amount, note)
+
+    @metrics.timed("dual.history_page")
+    def history_page(self, account_name: str, before_id=None, limit=10,
+                     tx_types=None, since=None, until=None):
+        # Full ledger lives in SQLite only
+        return self.db.query_history(
+            account_name, before_id, limit, tx_types, since, until)
+
+    def totals(self):
+        """(account count, total balance in cents), kept current in SQLite."""
+        return self.db.load_totals()
+
+    def daily_stats(self, since=None, until=None):
+        return self.db.daily_tx_stats(since, until)
+
+    def verify_totals(self, repair=False):
+        return self.db.verify_summary(repair)
+
+    def verify_mirror(self, repair=False):
+        # Queued mirror writes would show up as drift
+        self.drain()
+        return verify_mirror(self.db, repair)
+
+    def mirror_lag(self):
+        """Pending JSON mirror writes and how far behind SQLite they are."""
+        if self._writer is None:
+            return {"pending": 0, "lag_seconds": 0.0}
+        return self._writer.lag()
+
+    def drain(self):
+        # Wait until the JSON mirror has caught up with SQLite
+        if self._writer is not None:
+            self._writer.drain()
+
+    def close(self):
+        # A mirror write error is re-raised here, after everything is closed
+        try:
+            if self._writer is not None:
+                self._writer.close()
+        finally:
+            try:
+                # Fold any pending journal into accounts.json before exiting
+                if self._compactor is not None:
+                    self._compactor.join()
+                if self.mirror == "journal":
+                    json_storage.compact()
+                json_storage.save_digests()
+            finally:
+                # Release pooled SQLite connections (call once on shutdown)
+                self.db.close()
@@ -0,0 +1,215 @@
+# bank_project/bank_app/services/merkle.py
+
+import hashlib
+import json
+import os
+import zlib
+from collections import namedtuple
+from pathlib import Path
+
+# =============================
+# Account hash tree
+# =============================
+# Both stores keep one digest per bucket of accounts: the sum of the leaf
+# hashes of (name, password, balance) of every account in it, so a put or
+# delete adjusts one bucket in O(1) whatever the order of writes. Buckets
+# are the leaves of a FANOUT-ary hash tree; two trees are compared from the
+# root down, and only buckets under differing nodes are looked at.
+
+FANOUT = 16
+DEPTH = 3
+BUCKETS = FANOUT ** DEPTH
+
+# Digests are kept below 2**62 so that adding two of them never overflows a
+# signed 64-bit SQLite INTEGER
+DIGEST_MOD = 1 << 62
+
+Divergence = namedtuple("Divergence", ["name", "problem"])
+
+MISSING_FROM_MIRROR = "missing from the JSON mirror"
+MISSING_FROM_DB = "missing from SQLite"
+DIFFERS = "balance or password differs"
+
+
+def bucket_of(name):
+    # Only spreads accounts over buckets, so a cheap checksum is enough
+    return zlib.crc32(name.encode()) % BUCKETS
+
+
+def leaf(name, password, balance_cents):
+    record = f"{name}\0{password}\0{balance_cents}".encode()
+    digest = hashlib.blake2b(record, digest_size=8, person=b"leaf").digest()
+    return int.from_bytes(digest, "big") % DIGEST_MOD
+
+
+class MerkleTree:
+    """
+    Hash tree over BUCKETS bucket digests. set() only marks the path to the
+    root stale; root() and diff() rehash just the stale nodes.
+    """
+
+    def __init__(self, buckets=None):
+        # levels[0] is the root, levels[DEPTH] the bucket digests
+        self.levels = [[b""] * FANOUT ** depth for depth in range(DEPTH)]
+        self.levels.append(list(buckets) if buckets is not None else [0] * BUCKETS)
+        if len(self.levels[DEPTH]) != BUCKETS:
+            raise ValueError(f"Expected {BUCKETS} bucket digests.")
+        self._stale = None      # None: every node
+
+    @property
+    def buckets(self):
+        return self.levels[DEPTH]
+
+    def set(self, bucket, digest):
+        self.levels[DEPTH][bucket] = digest
+        if self._stale is not None:
+            self._stale.add(bucket)
+
+    def add(self, bucket, leaf_hash, sign=1):
+        self.set(bucket, (self.levels[DEPTH][bucket] + sign * leaf_hash) % DIGEST_MOD)
+
+    def _refresh(self):
+        stale = self._stale if self._stale is not None else range(BUCKETS)
+        for depth in range(DEPTH - 1, -1, -1):
+            below = self.levels[depth + 1]
+            parents = {i // FANOUT for i in stale}
+            for parent in parents:
+                h = hashlib.blake2b(digest_size=16)
+                for child in below[parent * FANOUT:(parent + 1) * FANOUT]:
+                    h.update(child if isinstance(child, bytes) else child.to_bytes(8, "big"))
+                self.levels[depth][parent] = h.digest()
+            stale = parents
+        self._stale = set()
+
+    def root(self):
+        self._refresh()
+        return self.levels[0][0]
+
+    def diff(self, other):
+        """Buckets whose digests differ, descending only into differing subtrees."""
+        self._refresh()
+        other._refresh()
+        nodes = [0] if self.levels[0][0] != other.levels[0][0] else []
+        for depth in range(1, DEPTH + 1):
+            ours, theirs = self.levels[depth], other.levels[depth]
+            nodes = [child for node in nodes
+                     for child in range(node * FANOUT, (node + 1) * FANOUT)
+                     if ours[child] != theirs[child]]
+        return nodes
+
+
+class LeafIndex:
+    """
+    {name: leaf hash} of every account of a store at one point in time, on
+    disk as one JSON line per bucket; offsets[b]:offsets[b + 1] is bucket b's
+    line, so one bucket's leaves are read without touching the others.
+    """
+
+    def __init__(self, path, offsets):
+        self.path = Path(path)
+        self.offsets = offsets
+
+    @classmethod
+    def write(cls, path, grouped):
+        """Write `grouped` ({bucket: {name: leaf hash}}) to `path`."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        lines = [json.dumps(grouped[bucket], separators=(",", ":")).encode() + b"\n"
+                 if bucket in grouped else b"{}\n" for bucket in range(BUCKETS)]
+        offsets = [0]
+        for line in lines:
+            offsets.append(offsets[-1] + len(line))
+        with open(tmp, "wb") as f:
+            f.write(b"".join(lines))
+        os.replace(tmp, path)
+        return cls(path, offsets)
+
+    def bucket(self, bucket):
+        start, end = self.offsets[bucket], self.offsets[bucket + 1]
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return json.loads(f.read(end - start))
+
+
+class AccountDigests:
+    """
+    Bucket tree for a store that cannot look accounts up by bucket (the JSON
+    mirror). Leaves come from a LeafIndex written when the tree was built,
+    plus `changed`: the leaf of every account put or deleted since (None once
+    deleted). put() / delete() adjust one bucket, reading at most that
+    bucket's line of the index.
+    """
+
+    def __init__(self, buckets, index, changed=None):
+        self.tree = MerkleTree(buckets)
+        self.index = index
+        self.changed = dict(changed or {})
+
+    @classmethod
+    def build(cls, path, accounts):
+        """Tree and LeafIndex (written to `path`) over (name, password, balance_cents)."""
+        grouped = {}
+        for name, password, balance_cents in accounts:
+            grouped.setdefault(bucket_of(name), {})[name] = leaf(name, password, balance_cents)
+        buckets = [0] * BUCKETS
+        for bucket, leaves in grouped.items():
+            buckets[bucket] = sum(leaves.values()) % DIGEST_MOD
+        return cls(buckets, LeafIndex.write(path, grouped))
+
+    def put(self, name, password, balance_cents):
+        self._set(name, leaf(name, password, balance_cents))
+
+    def delete(self, name):
+        self._set(name, None)
+
+    def _set(self, name, leaf_hash):
+        bucket = bucket_of(name)
+        old = self.changed[name] if name in self.changed else self.index.bucket(bucket).get(name)
+        if old is not None:
+            self.tree.add(bucket, old, sign=-1)
+        if leaf_hash is not None:
+            self.tree.add(bucket, leaf_hash)
+        self.changed[name] = leaf_hash
+
+    def bucket_leaves(self, buckets):
+        """{name: leaf hash} for accounts in `buckets`."""
+        buckets = set(buckets)
+        leaves = {}
+        for bucket in buckets:
+            leaves.update(self.index.bucket(bucket))
+        for name, leaf_hash in self.changed.items():
+            if bucket_of(name) in buckets:
+                leaves.pop(name, None)
+                if leaf_hash is not None:
+                    leaves[name] = leaf_hash
+        return leaves
+
+
+def bucket_leaves(buckets, accounts):
+    """{name: leaf hash} for the (name, password, balance_cents) in `buckets`."""
+    buckets = set(buckets)
+    return {name: leaf(name, password, balance)
+            for name, password, balance in accounts if bucket_of(name) in buckets}
+
+
+def compare(db_tree, mirror_tree, db_leaves, mirror_leaves):
+    """
+    Divergences between two stores, sorted by name. db_leaves / mirror_leaves
+    are callables mapping a list of buckets to {name: leaf hash}; they are
+    only called for buckets whose digests differ.
+    """
+    buckets = db_tree.diff(mirror_tree)
+    if not buckets:
+        return []
+
+    ours, theirs = db_leaves(buckets), mirror_leaves(buckets)
+    problems = []
+    for name in sorted(ours.keys() | theirs.keys()):
+        if name not in theirs:
+            problems.append(Divergence(name, MISSING_FROM_MIRROR))
+        elif name not in ours:
+            problems.append(Divergence(name, MISSING_FROM_DB))
+        elif ours[name] != theirs[name]:
+            problems.append(Divergence(name, DIFFERS))
+    return problems
@@ -0,0 +1,182 @@
+# bank_project/bank_app/services/metrics.py
+
+import functools
+import os
+import threading
+import time
+
+# =============================
+# Opt-in instrumentation
+# =============================
+# Off unless BANK_METRICS=1 (or enable() is called, e.g. from dev mode).
+# While off, every hook is a single flag check before the real call.
+
+_enabled = os.environ.get("BANK_METRICS") == "1"
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+# Latency buckets: powers of two from 1 µs up to ~67 s
+BUCKET_BOUNDS_US = [2 ** i for i in range(27)]
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+class Histogram:
+    """Log-scale latency histogram: count, sum, max and per-bucket counts."""
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_US) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        micros = int(seconds * 1_000_000)
+        self.buckets[min(micros.bit_length(), len(BUCKET_BOUNDS_US))] += 1
+
+    def percentile(self, pct):
+        """Upper bound (seconds) of the bucket holding the pct-th percentile."""
+        rank = pct / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                bound = BUCKET_BOUNDS_US[i] if i < len(BUCKET_BOUNDS_US) else None
+                return min(bound / 1_000_000, self.max) if bound else self.max
+        return self.max
+
+
+# =============================
+# Recording
+# =============================
+
+def add(name, n=1):
+    """Increment counter `name` by n."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def observe(name, seconds):
+    """Record one latency sample for `name`."""
+    if not _enabled:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.add(seconds)
+
+
+def timed(name):
+    """Decorator: latency histogram for every call, plus `<name>.errors` on exceptions."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                add(name + ".errors")
+                raise
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class timer:
+    """Context manager form of timed(): `with metrics.timer("json.compact"): ...`"""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if _enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.start is not None:
+            observe(self.name, time.perf_counter() - self.start)
+            if exc_type is not None:
+                add(self.name + ".errors")
+
+
+# =============================
+# Reporting
+# =============================
+
+def snapshot():
+    """Copy of the current data: {"counters": {...}, "latency": {name: stats}}."""
+    with _lock:
+        counters = dict(_counters)
+        latency = {
+            name: {
+                "count": h.count,
+                "avg_ms": h.total / h.count * 1000,
+                "p50_ms": h.percentile(50) * 1000,
+                "p99_ms": h.percentile(99) * 1000,
+                "max_ms": h.max * 1000,
+            }
+            for name, h in _histograms.items()
+        }
+    return {"counters": counters, "latency": latency}
+
+
+def report():
+    """Human-readable text dump of every counter and latency histogram."""
+    data = snapshot()
+    lines = [f"metrics {'enabled' if _enabled else 'disabled'}"]
+
+    if data["counters"]:
+        lines.append("counters:")
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"  {name:64s} {value:>14,}")
+
+    if data["latency"]:
+        lines.append(f"latency:{'count':>67s} {'avg ms':>10s} {'p50 ms':>10s} "
+                     f"{'p99 ms':>10s} {'max ms':>10s}")
+        for name, s in sorted(data["latency"].items()):
+            lines.append(
+                f"  {name:64s} {s['count']:>8,} {s['avg_ms']:10.3f} {s['p50_ms']:10.3f} "
+                f"{s['p99_ms']:10.3f} {s['max_ms']:10.3f}")
+
+    if len(lines) == 1:
+        lines.append("no data recorded yet")
+    return "\n".join(lines)
+
+
+def export(path):
+    """Write report() to a text file; returns the path written."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(report() + "\n")
+    return path
@@ -0,0 +1,130 @@
+# bank_project/bank_app/services/mirror_writer.py
+
+import queue
+import threading
+import time
+from collections import deque
+
+DEFAULT_QUEUE_SIZE = 1024
+
+_STOP = object()
+
+
+class MirrorWriter:
+    """
+    Write-behind worker for the JSON mirror:
+    - callers enqueue ("snapshot", accounts) or ("journal", records) and return
+    - a background thread drains the queue in batches
+    - only the newest snapshot in a batch is written; journal records queued
+      after it are appended in one go, older ones are superseded
+
+    The queue is bounded, so a stalled disk slows callers down instead of
+    growing memory without limit.
+    """
+
+    def __init__(self, apply, maxsize=DEFAULT_QUEUE_SIZE):
+        # apply(ops) performs the real writes for a coalesced list of ops
+        self._apply = apply
+        self._queue = queue.Queue(maxsize)
+        self._pending_since = deque()   # enqueue time of every unapplied op
+        self._lock = threading.Lock()
+        self._closed = False
+        self.error = None
+
+        self.applied_ops = 0
+        self.coalesced_ops = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name="json-mirror", daemon=True)
+        self._thread.start()
+
+    # -------- Producer side --------
+    def submit(self, kind, payload):
+        if self._closed:
+            raise RuntimeError("Mirror writer is closed.")
+        with self._lock:
+            self._pending_since.append(time.monotonic())
+        self._queue.put((kind, payload))
+
+    def lag(self):
+        """Queue depth and age in seconds of the oldest unwritten op."""
+        with self._lock:
+            pending = len(self._pending_since)
+            oldest = self._pending_since[0] if pending else None
+        return {
+            "pending": pending,
+            "lag_seconds": time.monotonic() - oldest if oldest else 0.0,
+        }
+
+    def drain(self):
+        """Block until everything queued so far is on disk."""
+        self._queue.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    # -------- Worker side --------
+    @staticmethod
+    def coalesce(batch):
+        """Reduce a batch to at most one snapshot followed by one journal append."""
+        last_snapshot = None
+        records = []
+        for kind, payload in batch:
+            if kind == "snapshot":
+                # A full snapshot supersedes everything queued before it
+                last_snapshot = payload
+                records = []
+            else:
+                records.extend(payload)
+
+        ops = []
+        if last_snapshot is not None:
+            ops.append(("snapshot", last_snapshot))
+        if records:
+            ops.append(("journal", records))
+        return ops
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = [] if item is _STOP else [item]
+            stop = item is _STOP
+
+            # Grab whatever else is already waiting
+            while not stop:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                try:
+                    ops = self.coalesce(batch)
+                    self._apply(ops)
+                    self.applied_ops += len(batch)
+                    self.coalesced_ops += len(batch) - len(ops)
+                except Exception as e:  # surfaced to the caller by drain()/close()
+                    self.error = e
+                with self._lock:
+                    for _ in batch:
+                        self._pending_since.popleft()
+
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+
+            if stop:
+                return
@@ -0,0 +1,238 @@
+# bank_project/bank_app/services/name_index.py
+
+import threading
+from bisect import bisect_left, bisect_right
+
+from bank_project.bank_app.services import db_storage
+
+# =============================
+# Account name search
+# =============================
+# Prefix completion and "did you mean" suggestions over account names,
+# case-insensitive the way SQLite's NOCASE collation is (ASCII letters
+# only), so the in-memory and SQLite-backed indexes agree on every answer.
+#
+# Suggestions never scan: they look at the names sorted right around the
+# typed name plus any name equal to it with one letter dropped or two
+# neighbouring letters swapped, then rank that handful by edit distance.
+
+# Names looked at on each side of the typed name for suggestions
+SUGGEST_WINDOW = 8
+
+_ASCII_FOLD = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def fold(name):
+    return name.translate(_ASCII_FOLD)
+
+
+def edit_distance(a, b, limit):
+    """
+    Levenshtein distance with adjacent transpositions, or limit + 1 once
+    it is certain to exceed `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        row = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            row.append(cost)
+        if min(row) > limit:
+            return limit + 1
+        before, prev = prev, row
+    return prev[-1]
+
+
+def _shared(a, b):
+    n = 0
+    for ca, cb in zip(a, b):
+        if ca != cb:
+            break
+        n += 1
+    return n
+
+
+def _one_edit_variants(key):
+    """`key` with one letter dropped or two neighbouring letters swapped."""
+    variants = {key[:i] + key[i + 1:] for i in range(len(key))}
+    variants.update(key[:i] + key[i + 1] + key[i] + key[i + 2:] for i in range(len(key) - 1))
+    variants.discard(key)
+    variants.discard("")
+    return variants
+
+
+class _NameSearch:
+    """
+    complete() / suggest() on top of primitives subclasses provide:
+    _after(prefix, start, limit) and _before(prefix, start, limit) return
+    names whose folded form starts with `prefix`, from `start` upwards
+    (inclusive) or downwards (exclusive), nearest first; _matching(keys)
+    returns names whose folded form is one of `keys`.
+    """
+
+    def complete(self, prefix, limit=10):
+        """Up to `limit` names starting with `prefix` (any case), in order."""
+        prefix = fold(prefix)
+        return self._after(prefix, prefix, limit)
+
+    def suggest(self, name, limit=3):
+        """Up to `limit` existing names closest to `name`, closest first."""
+        key = fold(name)
+        if not key:
+            return []
+        neighbours = self._before("", key, 1) + self._after("", key, 1)
+        if name in neighbours:
+            return [name]
+
+        # Names sharing the longest prefix any stored name has with `key`
+        # catch typos late in the name; early extra or swapped letters are
+        # found by looking their corrections up directly
+        n = max((_shared(key, fold(other)) for other in neighbours), default=0)
+        prefix = key[:max(n, 1)]
+        candidates = set(self._matching(_one_edit_variants(key)))
+        candidates.update(self._before(prefix, key, SUGGEST_WINDOW))
+        candidates.update(self._after(prefix, key, SUGGEST_WINDOW))
+
+        # Allow about one typo per three letters
+        limit_distance = max(1, len(key) // 3)
+        ranked = sorted(
+            (distance, fold(other), other) for other in candidates
+            if (distance := edit_distance(key, fold(other), limit_distance)) <= limit_distance)
+        return [other for _, _, other in ranked[:limit]]
+
+
+class NameIndex(_NameSearch):
+    """
+    In-memory index over every account name: two parallel lists sorted by
+    (folded name, name), searched with bisect. Thread-safe.
+    """
+
+    def __init__(self, names=()):
+        entries = sorted((fold(name), name) for name in names)
+        self._keys = [key for key, _ in entries]
+        self._names = [name for _, name in entries]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        with self._lock:
+            return self._find(name) is not None
+
+    def _position(self, name):
+        key = fold(name)
+        lo, hi = bisect_left(self._keys, key), bisect_right(self._keys, key)
+        return key, bisect_left(self._names, name, lo, hi)
+
+    def _find(self, name):
+        _, i = self._position(name)
+        return i if i < len(self._names) and self._names[i] == name else None
+
+    def add(self, name):
+        with self._lock:
+            if self._find(name) is None:
+                key, i = self._position(name)
+                self._keys.insert(i, key)
+                self._names.insert(i, name)
+
+    def remove(self, name):
+        with self._lock:
+            i = self._find(name)
+            if i is not None:
+                del self._keys[i]
+                del self._names[i]
+
+    def _after(self, prefix, start, limit):
+        with self._lock:
+            i = bisect_left(self._keys, max(prefix, start))
+            found = []
+            while i < len(self._keys) and len(found) < limit and self._keys[i].startswith(prefix):
+                found.append(self._names[i])
+                i += 1
+            return found
+
+    def _matching(self, keys):
+        with self._lock:
+            found = []
+            for key in keys:
+                i = bisect_left(self._keys, key)
+                while i < len(self._keys) and self._keys[i] == key:
+                    found.append(self._names[i])
+                    i += 1
+            return found
+
+    def _before(self, prefix, start, limit):
+        with self._lock:
+            i = bisect_left(self._keys, start) - 1
+            found = []
+            while i >= 0 and len(found) < limit and self._keys[i].startswith(prefix):
+                found.append(self._names[i])
+                i -= 1
+            return found
+
+
+class StoredNameIndex(_NameSearch):
+    """
+    Same searches answered by range queries on SQLite's NOCASE name index,
+    for when accounts are not all in memory. Names added or removed through
+    this index but not yet flushed are overlaid on the query results, until
+    settle() sees the database agree. `db` is db_storage or a ShardRouter.
+    """
+
+    def __init__(self, db=db_storage):
+        self._db = db
+        self._added = NameIndex()
+        self._removed = set()
+        self._lock = threading.Lock()
+
+    def add(self, name):
+        with self._lock:
+            self._removed.discard(name)
+            self._added.add(name)
+
+    def remove(self, name):
+        with self._lock:
+            self._added.remove(name)
+            self._removed.add(name)
+
+    def settle(self, names):
+        """Drop the pending adds / removes of `names` the database now agrees with."""
+        with self._lock:
+            names = {name for name in names if name in self._removed or name in self._added}
+        if not names:
+            return
+        stored = set(self._db.find_account_names({fold(name) for name in names}))
+        with self._lock:
+            for name in names:
+                if name in stored:
+                    self._added.remove(name)
+                else:
+                    self._removed.discard(name)
+
+    def _merge(self, stored, pending, limit, descending):
+        with self._lock:
+            removed = set(self._removed)
+        names = {name for name in stored if name not in removed}.union(pending)
+        ordered = sorted(names, key=lambda name: (fold(name), name), reverse=descending)
+        return ordered[:limit]
+
+    def _after(self, prefix, start, limit):
+        return self._merge(
+            self._db.scan_account_names(prefix, start, limit + len(self._removed)),
+            self._added._after(prefix, start, limit), limit, False)
+
+    def _matching(self, keys):
+        with self._lock:
+            removed = set(self._removed)
+        stored = [name for name in self._db.find_account_names(keys) if name not in removed]
+        return stored + self._added._matching(keys)
+
+    def _before(self, prefix, start, limit):
+        return self._merge(
+            self._db.scan_account_names(prefix, start, limit + len(self._removed), descending=True),
+            self._added._before(prefix, start, limit), limit, True)
@@ -0,0 +1,182 @@
+# bank_project/bank_app/services/passwords.py
+
+import atexit
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# =============================
+# Hash format & cost parameters
+# =============================
+# Stored passwords look like
+#   scrypt$<n>$<r>$<p>$<salt b64>$<key b64>
+#   pbkdf2_sha256$<iterations>$<salt b64>$<key b64>   (only if scrypt is unavailable)
+# Anything else is a legacy plaintext password, accepted once and rehashed.
+
+ScryptParams = namedtuple("ScryptParams", ["n", "r", "p"])
+
+# ~60 ms and 16 MB per hash on a typical core; raise n as hardware improves
+DEFAULT_PARAMS = ScryptParams(n=2 ** 14, r=8, p=1)
+PBKDF2_ITERATIONS = 600_000
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+HAS_SCRYPT = hasattr(hashlib, "scrypt")
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii")
+
+
+def _scrypt(password, salt, params):
+    n, r, p = params
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p,
+        maxmem=256 * n * r + 1024 * 1024, dklen=KEY_BYTES)
+
+
+def hash_password(password, params=None):
+    """Return a salted, self-describing hash string for `password`."""
+    params = params or DEFAULT_PARAMS
+    salt = os.urandom(SALT_BYTES)
+    if HAS_SCRYPT:
+        key = _scrypt(password, salt, params)
+        return f"scrypt${params.n}${params.r}${params.p}${_b64(salt)}${_b64(key)}"
+
+    key = hashlib.pbkdf2_hmac(
+        "sha256", password.encode(), salt, PBKDF2_ITERATIONS, KEY_BYTES)
+    return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${_b64(salt)}${_b64(key)}"
+
+
+def is_hashed(stored):
+    return stored.startswith(("scrypt$", "pbkdf2_sha256$"))
+
+
+def verify_password(password, stored):
+    """Constant-time check of `password` against a stored hash (or legacy plaintext)."""
+    scheme, _, rest = stored.partition("$")
+
+    if scheme == "scrypt":
+        n, r, p, salt, key = rest.split("$")
+        expected = base64.b64decode(key)
+        actual = _scrypt(
+            password, base64.b64decode(salt), ScryptParams(int(n), int(r), int(p)))
+    elif scheme == "pbkdf2_sha256":
+        iterations, salt, key = rest.split("$")
+        expected = base64.b64decode(key)
+        actual = hashlib.pbkdf2_hmac(
+            "sha256", password.encode(), base64.b64decode(salt),
+            int(iterations), len(expected))
+    else:
+        expected, actual = stored.encode(), password.encode()
+
+    return hmac.compare_digest(actual, expected)
+
+
+def needs_rehash(stored, params=None):
+    """True for plaintext, the fallback scheme, or scrypt at other cost settings."""
+    params = params or DEFAULT_PARAMS
+    if not stored.startswith("scrypt$"):
+        return HAS_SCRYPT or not is_hashed(stored)
+    n, r, p = stored.split("$")[1:4]
+    return ScryptParams(int(n), int(r), int(p)) != params
+
+
+def check_password(password, stored, params=None):
+    """
+    Verify, and when the stored form is outdated also compute its replacement.
+    Returns (ok, new_hash or None). Runs in a worker process.
+    """
+    if not verify_password(password, stored):
+        return False, None
+    if needs_rehash(stored, params):
+        return True, hash_password(password, params)
+    return True, None
+
+
+# =============================
+# Worker pool
+# =============================
+# KDF work is CPU-bound on purpose, so it runs in a small process pool
+# shared by every PasswordHasher in this process. A semaphore bounds the
+# number of queued jobs: callers block instead of piling up work.
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+QUEUE_PER_WORKER = 4
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            # "spawn": forking a multi-threaded server process is unsafe
+            _pool = ProcessPoolExecutor(
+                DEFAULT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            _slots = threading.BoundedSemaphore(DEFAULT_WORKERS * QUEUE_PER_WORKER)
+        return _pool, _slots
+
+
+def _run(fn, *args):
+    pool, slots = _get_pool()
+    slots.acquire()
+    try:
+        future = pool.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future.result()
+
+
+def shutdown():
+    """Stop the worker processes. Safe to call more than once."""
+    global _pool, _slots
+    with _pool_lock:
+        pool, _pool, _slots = _pool, None, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+atexit.register(shutdown)
+
+
+class PasswordHasher:
+    """
+    Hashing policy used by BankService: cost parameters plus where the work
+    runs. With offload=True every hash/verify goes to the process pool, so
+    calling threads (CLI, server executor) only wait on a future.
+    """
+
+    def __init__(self, params=None, offload=True):
+        self.params = params or DEFAULT_PARAMS
+        self.offload = offload
+
+    def _call(self, fn, *args):
+        return _run(fn, *args) if self.offload else fn(*args)
+
+    def hash(self, password):
+        return self._call(hash_password, password, self.params)
+
+    def verify(self, password, stored):
+        """(ok, new_hash or None); new_hash is set when `stored` should be replaced."""
+        return self._call(check_password, password, stored, self.params)
+
+    def hash_many(self, passwords, chunksize=16):
+        """Hash many passwords in parallel, preserving order."""
+        passwords = list(passwords)
+        if not self.offload:
+            return [hash_password(pw, self.params) for pw in passwords]
+        pool, _ = _get_pool()
+        return list(pool.map(
+            hash_password, passwords, [self.params] * len(passwords),
+            chunksize=chunksize))
@@ -0,0 +1,426 @@
+# bank_project/bank_app/services/shard_router.py
+
+import heapq
+import os
+import threading
+import uuid
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+
+from bank_project.account import bank
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services import merkle
+from bank_project.bank_app.services import metrics
+from bank_project.bank_app.services.name_index import fold
+
+# =============================
+# Sharded SQLite storage
+# =============================
+# Accounts are spread over several SQLite files by a stable hash of the
+# name, and an account's transactions live in the same file. Every shard
+# has its own writer lock and its own worker thread, so writes to
+# different shards commit (and fsync) in parallel.
+#
+# ShardRouter offers the db_storage functions that DualStorage and
+# AccountRepository call, so it drops in wherever the module is used:
+#     DualStorage(db=ShardRouter(4))
+#
+# A batch that touches one shard is one local transaction, as before. A
+# batch spanning shards (a transfer between accounts on different shards)
+# uses two-phase commit, coordinated by the lowest shard involved:
+#   1. prepare  every other shard stages its part in prepared_batches
+#   2. decide   the coordinator applies its own part and records the
+#               decision; that one local commit is the commit point
+#   3. finish   the other shards apply their parts, then the decision is
+#               dropped
+# A crash before step 2 leaves staged parts without a decision: they are
+# rolled back. A crash after it leaves the decision: the remaining parts
+# are applied. recover() does both whenever a router opens the shards, so
+# only one process may write to a set of shard files at a time.
+#
+# A shard that fails step 3 keeps its staged part. Until that part is
+# applied, every write to the shard first retries it and fails if it still
+# cannot, so nothing newer is ever overwritten by a later recovery.
+
+# Shard count for the app (main.py, server.py); 0 or 1 keeps the single bank.db
+SHARDS = int(os.environ.get("BANK_SHARDS", "0") or 0)
+
+# Batches recover() found in doubt, by outcome
+Recovery = namedtuple("Recovery", ["committed", "rolled_back"])
+
+
+def shard_dir():
+    return Path(db_storage.DB_FILE).parent / "shards"
+
+
+def shard_path(shard: int):
+    return shard_dir() / f"{Path(db_storage.DB_FILE).stem}-{shard}.db"
+
+
+def shard_of(name, shard_count):
+    """Shard holding account `name`; the same in every process and run."""
+    return zlib.crc32(name.encode("utf-8")) % shard_count
+
+
+def require_unsharded(job):
+    """ValueError when the app runs sharded: `job` only knows the single bank.db."""
+    if SHARDS > 1:
+        raise ValueError(
+            f"{job} does not support sharded storage (BANK_SHARDS={SHARDS}); "
+            f"it would only see the unused {db_storage.DB_FILE.name}.")
+
+
+def open_backend(shards=None):
+    """A ShardRouter over `shards` files, or db_storage itself when unsharded."""
+    shards = SHARDS if shards is None else shards
+    return ShardRouter(shards) if shards > 1 else db_storage
+
+
+class ShardRouter:
+    """
+    db_storage-compatible backend over `shards` SQLite files:
+    - single-account calls go to the account's shard
+    - bank-wide reads fan out to every shard in parallel and are merged
+    - multi-shard writes commit atomically through two-phase commit
+
+    Each shard is served by one worker thread bound to its file, which is
+    the only thread that ever opens a connection to it.
+    """
+
+    def __init__(self, shards):
+        if shards < 1:
+            raise ValueError("Shard count must be at least 1.")
+        # Group commits reach each file's disk at different times, so a
+        # crash could keep one shard's half of a batch and lose its decision
+        if db_storage.DURABILITY == "group":
+            raise ValueError("Sharded storage needs 'strict' or 'relaxed' durability.")
+
+        self.shards = shards
+        self.paths = [shard_path(i) for i in range(shards)]
+        # xid -> (coordinator, shards yet to apply their part) after a failed finish
+        self._unfinished = {}
+        self._unfinished_lock = threading.Lock()
+        self._pools = [
+            ThreadPoolExecutor(1, f"shard-{i}",
+                               initializer=db_storage.bind_thread, initargs=(path,))
+            for i, path in enumerate(self.paths)]
+        try:
+            self._gather({i: (db_storage.claim_shard, i, shards) for i in range(shards)})
+            self.recovered = self.recover()
+        except BaseException:
+            self._shutdown()
+            raise
+
+    # -------- Worker pool --------
+    def run(self, shard, fn, *args):
+        """Call fn(*args) on `shard`'s worker thread and return the result."""
+        return self._pools[shard].submit(fn, *args).result()
+
+    def run_all(self, fn, *args):
+        """Call fn(*args) on every shard in parallel; results in shard order."""
+        results = self._gather({i: (fn, *args) for i in range(self.shards)})
+        return [results[i] for i in range(self.shards)]
+
+    def _gather(self, calls):
+        # {shard: (fn, *args)} -> {shard: result}. Every call finishes
+        # before the first failure is raised
+        futures = {shard: self._pools[shard].submit(*call) for shard, call in calls.items()}
+        wait(futures.values())
+        return {shard: future.result() for shard, future in futures.items()}
+
+    def _shutdown(self):
+        for pool in self._pools:
+            pool.shutdown()
+
+    def shard_of(self, name):
+        return shard_of(name, self.shards)
+
+    def _split(self, accs, tx_rows):
+        # {shard: (accounts, transaction rows)} for the shards a batch touches
+        parts = {}
+        for acc in accs:
+            parts.setdefault(self.shard_of(acc.name), ([], []))[0].append(acc)
+        for row in tx_rows:
+            parts.setdefault(self.shard_of(row[0]), ([], []))[1].append(row)
+        return parts
+
+    # -------- Writes --------
+    def init_db(self):
+        self.run_all(db_storage.init_db)
+
+    def upsert_account(self, acc):
+        shard = self.shard_of(acc.name)
+        self._settle({shard})
+        self.run(shard, db_storage.upsert_account, acc)
+
+    def upsert_accounts(self, accs):
+        self.write_batch(accs, [])
+
+    @metrics.timed("shards.write_batch")
+    def write_batch(self, accs, tx_rows):
+        """db_storage.write_batch across shards: everything lands or nothing does."""
+        parts = self._split(accs, tx_rows)
+        self._settle(parts)
+        if len(parts) > 1:
+            self._two_phase(parts)
+            return
+        for shard, (shard_accs, shard_rows) in parts.items():
+            self.run(shard, db_storage.write_batch, shard_accs, shard_rows)
+
+    def log_transaction(self, account_name, tx_type, amount=None, note=None):
+        shard = self.shard_of(account_name)
+        self._settle({shard})
+        self.run(shard, db_storage.log_transaction, account_name, tx_type, amount, note)
+
+    def delete_account(self, name):
+        shard = self.shard_of(name)
+        self._settle({shard})
+        self.run(shard, db_storage.delete_account, name)
+
+    # -------- Two-phase commit --------
+    @metrics.timed("shards.two_phase_commit")
+    def _two_phase(self, parts):
+        xid = uuid.uuid4().hex
+        coordinator = min(parts)
+
+        # The coordinator's part needs no staging: it lands with the decision
+        futures = {
+            shard: self._pools[shard].submit(
+                db_storage.prepare_batch, xid, coordinator, shard_accs, shard_rows)
+            for shard, (shard_accs, shard_rows) in parts.items() if shard != coordinator}
+        wait(futures.values())
+        prepared = [shard for shard, future in futures.items() if future.exception() is None]
+        try:
+            for future in futures.values():
+                future.result()
+            self._decide(xid, coordinator, parts)
+        except BaseException:
+            self._abort(xid, prepared)
+            raise
+        self._finish(xid, coordinator, set(parts) - {coordinator})
+
+    def _decide(self, xid, coordinator, parts):
+        self.run(coordinator, db_storage.record_decision, xid, list(parts), *parts[coordinator])
+
+    def _abort(self, xid, prepared):
+        try:
+            self._gather({shard: (db_storage.abort_prepared, xid) for shard in prepared})
+        except Exception:
+            # No decision was recorded, so recover() rolls these back later
+            metrics.add("shards.unfinished_batches")
+
+    def _finish(self, xid, coordinator, pending):
+        # The batch is committed once decided: a shard failing here is not
+        # the caller's error. Its part stays staged and _settle() retries it
+        futures = {shard: self._pools[shard].submit(db_storage.commit_prepared, xid)
+                   for shard in pending}
+        wait(futures.values())
+        pending = {shard for shard, future in futures.items() if future.exception() is not None}
+        with self._unfinished_lock:
+            if pending:
+                self._unfinished[xid] = (coordinator, pending)
+                metrics.add("shards.unfinished_batches")
+                return
+            self._unfinished.pop(xid, None)
+        try:
+            self.run(coordinator, db_storage.forget_decision, xid)
+        except Exception:
+            # Harmless: recover() drops decisions with nothing left to apply
+            pass
+
+    def _settle(self, shards):
+        """
+        Apply the parts of decided batches still staged on `shards`, so a
+        write there never lands before them. Raises if one still fails.
+        """
+        shards = set(shards)
+        with self._unfinished_lock:
+            unfinished = [(xid, coordinator, pending) for xid, (coordinator, pending)
+                          in self._unfinished.items() if pending & shards]
+        for xid, coordinator, pending in unfinished:
+            for shard in pending & shards:
+                self.run(shard, db_storage.commit_prepared, xid)
+                with self._unfinished_lock:
+                    pending.discard(shard)
+            if not pending:
+                self._finish(xid, coordinator, pending)
+
+    def recover(self):
+        """
+        Finish or roll back the cross-shard batches a crash left in doubt.
+        Returns Recovery(committed, rolled_back). Only safe while no batch
+        is in flight, which is why it runs when the router opens.
+        """
+        decided = {}
+        for shard, decisions in enumerate(self.run_all(db_storage.load_decisions)):
+            decided.update(dict.fromkeys(decisions, shard))
+
+        committed, rolled_back = set(), set()
+        for shard, xids in enumerate(self.run_all(db_storage.load_prepared)):
+            for xid in xids:
+                if xid in decided:
+                    self.run(shard, db_storage.commit_prepared, xid)
+                    committed.add(xid)
+                else:
+                    self.run(shard, db_storage.abort_prepared, xid)
+                    rolled_back.add(xid)
+
+        for xid, shard in decided.items():
+            self.run(shard, db_storage.forget_decision, xid)
+        return Recovery(len(committed), len(rolled_back))
+
+    # -------- Reads --------
+    def load_account(self, name):
+        return self.run(self.shard_of(name), db_storage.load_account, name)
+
+    @metrics.timed("shards.load_accounts")
+    def load_accounts(self):
+        accounts = {}
+        for part in self.run_all(db_storage.load_accounts):
+            accounts.update(part)
+
+        # Each shard's load set the counters to its own share: set the bank's
+        bank.num_bank_acc = len(accounts)
+        bank.total_bank_balance = sum(acc.balance for acc in accounts.values())
+        return accounts
+
+    def _paged(self, shard, load_page, key, batch_size):
+        after = ""
+        while True:
+            page = self.run(shard, load_page, after, batch_size)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after = key(page[-1])
+
+    def iter_accounts(self, batch_size=1000):
+        """Every account in name order, read from the shards a page at a time."""
+        return heapq.merge(*(
+            self._paged(i, db_storage.load_accounts_page, lambda acc: acc.name, batch_size)
+            for i in range(self.shards)), key=lambda acc: acc.name)
+
+    def iter_account_names(self, batch_size=1000):
+        return heapq.merge(*(
+            self._paged(i, db_storage.load_account_names_page, lambda name: name, batch_size)
+            for i in range(self.shards)))
+
+    def scan_account_names(self, prefix, start, limit, descending=False):
+        found = [name for names in self.run_all(
+                     db_storage.scan_account_names, prefix, start, limit, descending)
+                 for name in names]
+        found.sort(key=lambda name: (fold(name), name), reverse=descending)
+        return found[:limit]
+
+    def find_account_names(self, keys):
+        keys = list(keys)
+        return [name for names in self.run_all(db_storage.find_account_names, keys)
+                for name in names]
+
+    def query_history(self, account_name, before_id=None, limit=10,
+                      tx_types=None, since=None, until=None):
+        return self.run(self.shard_of(account_name), db_storage.query_history,
+                        account_name, before_id, limit, tx_types, since, until)
+
+    def load_balances(self, account_name=None):
+        if account_name is not None:
+            return self.run(self.shard_of(account_name), db_storage.load_balances, account_name)
+        balances = {}
+        for part in self.run_all(db_storage.load_balances):
+            balances.update(part)
+        return balances
+
+    def _stream(self, shard, chunks):
+        # Advance a db_storage generator on the shard's worker, a chunk at a time
+        try:
+            while (chunk := self.run(shard, next, chunks, None)) is not None:
+                yield chunk
+        finally:
+            self.run(shard, chunks.close)
+
+    def iter_ledger(self, columns, chunk_rows=100_000, account_name=None,
+                    since=None, until=None, tx_types=None):
+        """db_storage.iter_ledger over every shard, still ordered by account then id."""
+        if account_name is not None:
+            yield from self._stream(self.shard_of(account_name), db_storage.iter_ledger(
+                columns, chunk_rows, account_name, since, until, tx_types))
+            return
+
+        # An account's rows all live on one shard, so merging the shards by
+        # name keeps each account contiguous and in ledger order
+        def rows(shard):
+            for chunk in self._stream(shard, db_storage.iter_ledger(
+                    ("account_name", *columns), chunk_rows, None, since, until, tx_types)):
+                yield from chunk
+
+        chunk = []
+        for row in heapq.merge(*map(rows, range(self.shards)), key=lambda row: row[0]):
+            chunk.append(row[1:])
+            if len(chunk) == chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    # -------- Password migration (hash_passwords.py) --------
+    def load_password(self, name):
+        return self.run(self.shard_of(name), db_storage.load_password, name)
+
+    def plaintext_passwords(self, after_name="", limit=1000):
+        found = [row for rows in self.run_all(db_storage.plaintext_passwords, after_name, limit)
+                 for row in rows]
+        return sorted(found)[:limit]
+
+    def replace_passwords(self, rows):
+        parts = {}
+        for row in rows:
+            parts.setdefault(self.shard_of(row[1]), []).append(row)
+        self._settle(parts)
+        return sum(self._gather({shard: (db_storage.replace_passwords, part)
+                                 for shard, part in parts.items()}).values())
+
+    # -------- Bank-wide aggregates --------
+    def load_totals(self):
+        totals = self.run_all(db_storage.load_totals)
+        return sum(count for count, _ in totals), sum(total for _, total in totals)
+
+    def daily_tx_stats(self, since=None, until=None):
+        merged = {}
+        for stats in self.run_all(db_storage.daily_tx_stats, since, until):
+            for day, tx_type, count, volume in stats:
+                old_count, old_volume = merged.get((day, tx_type), (0, 0))
+                merged[(day, tx_type)] = (old_count + count, old_volume + volume)
+        return [db_storage.DailyStat(day, tx_type, count, volume)
+                for (day, tx_type), (count, volume) in sorted(merged.items())]
+
+    def verify_summary(self, repair=False):
+        return [f"shard {shard}: {problem}" for shard, problems
+                in enumerate(self.run_all(db_storage.verify_summary, repair))
+                for problem in problems]
+
+    def verify_merkle(self, repair=False):
+        return [f"shard {shard}: {problem}" for shard, problems
+                in enumerate(self.run_all(db_storage.verify_merkle, repair))
+                for problem in problems]
+
+    def load_merkle_tree(self):
+        # Bucket digests are sums of leaf hashes, so the shards' trees add up
+        tree = merkle.MerkleTree()
+        for part in self.run_all(db_storage.load_merkle_tree):
+            for bucket, digest in enumerate(part.buckets):
+                if digest:
+                    tree.add(bucket, digest)
+        return tree
+
+    def load_bucket_leaves(self, buckets):
+        buckets = list(buckets)
+        leaves = {}
+        for part in self.run_all(db_storage.load_bucket_leaves, buckets):
+            leaves.update(part)
+        return leaves
+
+    def close(self):
+        """Stop the shard workers and close every pooled connection."""
+        self._shutdown()
+        db_storage.close()
@@ -1,54 +1,466 @@
 # bank_project/bank_app/services/storage.py
 
 import json
+import os
+import threading
 from pathlib import Path
 from bank_project.account import bank
+from bank_project.bank_app.services import merkle
+from bank_project.bank_app.services import metrics
+from bank_project.money import to_cents
 
 # Always save/load to ONE location: bank_project/data/accounts.json
 DATA_FILE = (Path(__file__).resolve().parents[2] / "data" / "accounts.json")
 
+# Journal mode appends one compact line per change next to the snapshot:
+#   {"op": "put", "name": ..., "password": ..., "balance_cents": ..., "history": [...]}
+#   {"op": "del", "name": ...}
+# and compact() periodically folds the journal back into accounts.json.
+_journal_lock = threading.Lock()    # guards appends vs. journal rotation
+_snapshot_lock = threading.Lock()   # one writer of accounts.json at a time
 
-def save_data(accounts):
-    """Converts Bank objects into JSON-friendly dictionaries and saves to disk."""
+
+def journal_file():
+    return DATA_FILE.with_name(DATA_FILE.stem + ".journal.jsonl")
+
+
+def _compacting_file():
+    # The journal is renamed to this while it is being folded into the snapshot
+    return DATA_FILE.with_name(DATA_FILE.stem + ".journal.compacting.jsonl")
+
+
+def mirror_files():
+    """Every file the mirror's accounts are read from, snapshot first."""
+    return (DATA_FILE, _compacting_file(), journal_file())
+
+
+def serialize_account(acc):
+    return {
+        "name": acc.name,
+        "password": acc.password,
+        "balance_cents": acc.balance,
+        # Structured [type, amount_cents, timestamp, note] records
+        "history": [list(entry) for entry in acc.history]
+    }
+
+
+def _write_snapshot(serializable_data):
+    # Write to a temp file first so a crash never leaves a half-written snapshot
     DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = DATA_FILE.with_name(DATA_FILE.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(serializable_data, f, indent=4)
+        metrics.add("json.bytes_written", f.tell())
+    os.replace(tmp, DATA_FILE)
 
+
+@metrics.timed("json.save_data")
+def save_data(accounts):
+    """Converts Bank objects into JSON-friendly dictionaries and saves to disk."""
     serializable_data = {}
 
     # Convert each bank object into a dictionary
     for name, acc in accounts.items():
-        serializable_data[name] = {
-            "name": acc.name,
-            "password": acc.password,
-            "balance": acc.balance,
-            "history": acc.history
-        }
-
-    # Write the dictionary to accounts.json
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(serializable_data, f, indent=4)
+        serializable_data[name] = serialize_account(acc)
 
+    # Write the dictionary to accounts.json. A full snapshot supersedes any
+    # journal entries written before it.
+    with _snapshot_lock:
+        _write_snapshot(serializable_data)
+        with _journal_lock:
+            for path in (_compacting_file(), journal_file()):
+                path.unlink(missing_ok=True)
+            _install_digests(_build_digests(serializable_data.values()), persist=False)
 
-def load_data():
-    """Loads JSON data and reconstructs Bank objects into the accounts dictionary."""
+
+# =============================
+# Journal mirror
+# =============================
+
+@metrics.timed("json.append_journal")
+def append_journal(records):
+    """Append change records to the journal; returns the journal size in bytes."""
+    lines = "".join(
+        json.dumps(rec, separators=(",", ":")) + "\n" for rec in records)
+
+    path = journal_file()
+    with _journal_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            start = f.tell()
+            f.write(lines)
+            end = f.tell()
+        digests = _live_digests()
+        if digests is not None:
+            for rec in records:
+                if rec["op"] == "del":
+                    digests.delete(rec["name"])
+                else:
+                    _put_digest(digests, rec)
+            _digests[2] = _mirror_stamp()
+    metrics.add("json.bytes_written", end - start)
+    metrics.add("json.journal_records", len(records))
+    return end
+
+
+def put_records(accs):
+    return [{"op": "put", **serialize_account(acc)} for acc in accs]
+
+
+def delete_record(name):
+    return {"op": "del", "name": name}
+
+
+def journal_accounts(accs):
+    """Record the current state of each changed account."""
+    return append_journal(put_records(accs))
+
+
+def journal_delete(name):
+    """Record that an account was removed."""
+    return append_journal([delete_record(name)])
+
+
+def restore_account(info):
+    """Build a bank object from one stored account record."""
+    if "balance_cents" in info:
+        return bank.restore(
+            info["name"], info["password"], info["balance_cents"], info["history"])
+
+    # Older files stored dollars as floats: convert balance and history amounts
+    history = [
+        entry if isinstance(entry, str) else
+        [entry[0], None if entry[1] is None else to_cents(entry[1]), *entry[2:]]
+        for entry in info["history"]
+    ]
+    return bank.restore(
+        info["name"], info["password"], to_cents(info["balance"]), history)
+
+
+def _read_snapshot():
     if not DATA_FILE.exists():
         return {}
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _replay(raw_data, path, keep_deletes=False):
+    """
+    Apply journal records in file order onto a {name: info} dict.
+    With keep_deletes=True a deleted name maps to None instead of vanishing.
+    """
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                # Torn final line from a crash mid-append
+                continue
+            if rec.pop("op") == "del":
+                if keep_deletes:
+                    raw_data[rec["name"]] = None
+                else:
+                    raw_data.pop(rec["name"], None)
+            else:
+                raw_data[rec["name"]] = rec
+
+
+@metrics.timed("json.compact")
+def compact():
+    """Fold the journal into accounts.json and start a fresh journal."""
+    with _snapshot_lock:
+        with _journal_lock:
+            journal = journal_file()
+            compacting = _compacting_file()
+            # A leftover compacting file means a previous run was interrupted;
+            # its records are older than the live journal, so keep both.
+            if journal.exists():
+                if compacting.exists():
+                    with open(compacting, "a", encoding="utf-8") as dst, \
+                            open(journal, "r", encoding="utf-8") as src:
+                        dst.write(src.read())
+                    journal.unlink()
+                else:
+                    os.replace(journal, compacting)
+
+        if not compacting.exists():
+            return
+
+        raw_data = _read_snapshot()
+        _replay(raw_data, compacting)
+        _write_snapshot(raw_data)
+        compacting.unlink()
+
+        # Every account is in memory here anyway: refresh the checksums,
+        # including journal records appended while compacting
+        with _journal_lock:
+            _replay(raw_data, journal_file())
+            _install_digests(_build_digests(raw_data.values()))
+
+
+# =============================
+# Streaming reads
+# =============================
+# For snapshots too large to json.load() at once (e.g. migrations). Reads
+# the file in chunks and decodes one account object at a time.
+
+SNAPSHOT_CHUNK_SIZE = 1024 * 1024
+
+
+def iter_snapshot(path=None, chunk_size=SNAPSHOT_CHUNK_SIZE):
+    """Yield (name, info) pairs from a snapshot file in file order."""
+    path = Path(path or DATA_FILE)
+    if not path.exists() or path.stat().st_size == 0:
+        return
+
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos = "", 0
 
+        def read_more():
+            nonlocal buf, pos
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise ValueError(f"{path.name} is not a complete JSON snapshot.")
+            buf, pos = buf[pos:] + chunk, 0
+
+        def peek():
+            # Next non-whitespace character, reading further when needed
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos].isspace():
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                read_more()
+
+        def expect(char):
+            nonlocal pos
+            if peek() != char:
+                raise ValueError(
+                    f"{path.name}: expected '{char}' but found '{buf[pos]}'.")
+            pos += 1
+
+        def decode():
+            # Keys and account objects are self-delimiting, so a decode error
+            # just means the value runs past the end of the buffer
+            nonlocal pos
+            peek()
+            while True:
+                try:
+                    value, pos = decoder.raw_decode(buf, pos)
+                    return value
+                except json.JSONDecodeError:
+                    read_more()
+
+        expect("{")
+        if peek() == "}":
+            return
+        while True:
+            name = decode()
+            expect(":")
+            yield name, decode()
+            if peek() == "}":
+                return
+            expect(",")
+
+
+def iter_data(chunk_size=SNAPSHOT_CHUNK_SIZE):
+    """
+    Stream (name, info) for exactly the accounts load_data() would return.
+    Journals are small and read up front; the snapshot is streamed, and
+    journaled accounts are yielded after it with their latest state.
+    """
+    overrides = {}
+    for path in (_compacting_file(), journal_file()):
+        _replay(overrides, path, keep_deletes=True)
+
+    for name, info in iter_snapshot(DATA_FILE, chunk_size):
+        if name not in overrides:
+            yield name, info
+    for name, info in overrides.items():
+        if info is not None:
+            yield name, info
+
+
+def rewrite_snapshot(transform, chunk_size=SNAPSHOT_CHUNK_SIZE):
+    """
+    Stream every account through transform(name, info) -> info into a new
+    accounts.json (same layout as save_data), folding in and clearing the
+    journal. Memory use stays at one account regardless of file size.
+    """
+    DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = DATA_FILE.with_name(DATA_FILE.name + ".tmp")
+
+    def transformed(f):
+        first = True
+        for name, info in iter_data(chunk_size):
+            info = transform(name, info)
+            # Strip the braces from a one-entry dump: identical to json.dump(indent=4)
+            entry = json.dumps({name: info}, indent=4)[1:-2]
+            f.write(entry if first else "," + entry)
+            first = False
+            yield info
+        f.write("}" if first else "\n}")
+
+    with _snapshot_lock:
+        with _journal_lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write("{")
+                digests = _build_digests(transformed(f))
+                metrics.add("json.bytes_written", f.tell())
+            os.replace(tmp, DATA_FILE)
+            for path in (_compacting_file(), journal_file()):
+                path.unlink(missing_ok=True)
+            _install_digests(digests)
+
+
+@metrics.timed("json.load_data")
+def load_data():
+    """Loads JSON data and reconstructs Bank objects into the accounts dictionary."""
+    # Counters always describe what this call returned, even on failure
+    bank.num_bank_acc = 0
+    bank.total_bank_balance = 0
     try:
-        with open(DATA_FILE, "r") as f:
-            raw_data = json.load(f)
-            loaded_accounts = {}
+        raw_data = _read_snapshot()
+        _replay(raw_data, _compacting_file())
+        _replay(raw_data, journal_file())
+        loaded_accounts = {}
 
-            # Reset the class-level counter before rebuilding objects
-            bank.num_bank_acc = 0
+        # Reconstruct each account back into a bank object
+        # (history may hold structured records or legacy text lines)
+        for name, info in raw_data.items():
+            loaded_accounts[name] = restore_account(info)
 
-            # Reconstruct each account back into a bank object
-            for name, info in raw_data.items():
-                # Reconstruct the object
-                acc = bank(info["name"], info["password"], info["balance"])
-                acc.history = info["history"]  # Restore the history list
-                loaded_accounts[name] = acc
-            return loaded_accounts
+        # Rebuild the class-level counters from what was loaded
+        bank.adjust_totals(
+            accounts=len(loaded_accounts),
+            balance=sum(acc.balance for acc in loaded_accounts.values()))
+        return loaded_accounts
 
     # If JSON is broken or missing expected keys, fail safely
     except (json.JSONDecodeError, KeyError):
         return {}
+
+
+# =============================
+# Mirror checksums
+# =============================
+# The mirror's side of merkle.py's account tree. Every snapshot write
+# rebuilds it, along with a LeafIndex of the snapshot's accounts by bucket
+# (accounts.leaves.jsonl); journal writes adjust the buckets they touch,
+# reading the old leaf from that index. The bucket digests and the leaves
+# changed since the index was written are saved next to accounts.json (on
+# compaction, full rebuilds and shutdown) with the size and mtime of the
+# files they describe, so a fresh process can reuse them while nothing changed.
+
+_digests = None     # [DATA_FILE, AccountDigests, stamp after our last write]
+
+
+def digests_file():
+    return DATA_FILE.with_name(DATA_FILE.stem + ".merkle.json")
+
+
+def leaves_file():
+    return DATA_FILE.with_name(DATA_FILE.stem + ".leaves.jsonl")
+
+
+def _record_balance(info):
+    return info["balance_cents"] if "balance_cents" in info else to_cents(info["balance"])
+
+
+def _put_digest(digests, info):
+    digests.put(info["name"], info["password"], _record_balance(info))
+
+
+def _build_digests(infos):
+    # One pass over every account record; only the per-bucket index is kept
+    return merkle.AccountDigests.build(leaves_file(), (
+        (info["name"], info["password"], _record_balance(info)) for info in infos))
+
+
+def _live_digests():
+    # Caller holds _journal_lock
+    if _digests is not None and _digests[0] == DATA_FILE:
+        return _digests[1]
+    return None
+
+
+def _mirror_stamp():
+    return [[path.stat().st_size, path.stat().st_mtime_ns] if path.exists() else None
+            for path in mirror_files()]
+
+
+def _install_digests(digests, persist=True):
+    # Caller holds _journal_lock, so the stamp matches the digests
+    global _digests
+    _digests = [DATA_FILE, digests, _mirror_stamp()]
+    if persist:
+        _save_digests()
+
+
+def _save_digests():
+    # Caller holds _journal_lock
+    digests = _digests[1]
+    path = digests_file()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"stamp": _digests[2], "buckets": digests.tree.buckets,
+                   "offsets": digests.index.offsets, "changed": digests.changed}, f)
+    os.replace(tmp, path)
+
+
+def save_digests():
+    """Write the live checksums next to the mirror (e.g. on shutdown)."""
+    with _journal_lock:
+        if _live_digests() is not None and _digests[2] == _mirror_stamp():
+            _save_digests()
+
+
+def _saved_digests():
+    """AccountDigests from the checksum file, or None when the mirror changed since."""
+    try:
+        with open(digests_file(), "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if saved.get("stamp") != _mirror_stamp() or not leaves_file().exists():
+        return None
+    return merkle.AccountDigests(
+        saved["buckets"], merkle.LeafIndex(leaves_file(), saved["offsets"]), saved["changed"])
+
+
+def mirror_tree():
+    """
+    MerkleTree of the mirror as it is on disk: the live tree, else the saved
+    digests when the files are unchanged, else built by streaming the mirror
+    once (and kept live from then on).
+    """
+    global _digests
+    with _snapshot_lock, _journal_lock:
+        if _digests is not None and _digests[2] != _mirror_stamp():
+            # Another process rewrote the mirror since our last write
+            _digests = None
+        digests = _live_digests()
+        if digests is None:
+            digests = _saved_digests()
+            saved = digests is not None
+            if not saved:
+                digests = _build_digests(info for _, info in iter_data())
+            _install_digests(digests, persist=not saved)
+        return merkle.MerkleTree(digests.tree.buckets)
+
+
+def mirror_bucket_leaves(buckets):
+    """{name: leaf hash} for mirrored accounts in `buckets`."""
+    with _snapshot_lock, _journal_lock:
+        digests = _live_digests()
+        if digests is not None and _digests[2] == _mirror_stamp():
+            return digests.bucket_leaves(buckets)
+
+        # No tree for the files as they are: one pass over the mirror
+        return merkle.bucket_leaves(buckets, (
+            (name, info["password"], _record_balance(info)) for name, info in iter_data()))
@@ -0,0 +1,48 @@
+# bank_project/bank_app/verify_mirror.py
+
+import argparse
+import time
+
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services import shard_router
+from bank_project.bank_app.services import storage as json_storage
+from bank_project.bank_app.services.dual_storage import verify_mirror
+
+
+def verify(report=print, repair=False):
+    """
+    Compare bank.db (or the BANK_SHARDS shard files) with accounts.json and
+    report every account that differs. Returns the merkle.Divergence records.
+    With repair=True SQLite's bucket checksums are rebuilt from its accounts first.
+    """
+    db = shard_router.open_backend()
+    sharded = db is not db_storage
+    db.init_db()
+    start = time.perf_counter()
+    problems = verify_mirror(db, repair)
+    seconds = time.perf_counter() - start
+    source = f"{db.shards} shards" if sharded else db_storage.DB_FILE.name
+    if sharded:
+        db.close()
+
+    for p in problems:
+        report(f"  {p.name}: {p.problem}")
+    if problems:
+        report(f"{len(problems)} accounts out of sync ({seconds * 1000:.1f} ms)")
+    else:
+        report(f"Mirror verified ✅  {json_storage.DATA_FILE.name} matches "
+               f"{source} ({seconds * 1000:.1f} ms)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that the JSON mirror matches bank.db, listing accounts that differ")
+    parser.add_argument("--repair", action="store_true",
+                        help="rebuild bank.db's account checksums from its accounts first")
+    args = parser.parse_args()
+    verify(repair=args.repair)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import re
+from decimal import Decimal, ROUND_HALF_UP
+
+# All balances and amounts are integer cents ("minor units"). Conversion to
+# and from text happens only at the edges: CLI input, display, legacy data.
+
+CENTS_PER_UNIT = 100
+
+# Largest amount one deposit, withdrawal or transfer may move ($1 billion)
+MAX_AMOUNT = 1_000_000_000 * CENTS_PER_UNIT
+
+# Largest balance SQLite can store in an INTEGER column
+MAX_BALANCE = 2**63 - 1
+
+_AMOUNT_RE = re.compile(r"(?=\.?\d)(\d*)(?:\.(\d{1,2}))?")
+
+
+def parse_amount(text):
+    """
+    Parse user input such as '12', '12.5', '$1,234.56' into integer cents.
+    Works on the digits directly, so no value ever passes through float.
+    """
+    cleaned = text.strip().removeprefix("$").replace(",", "")
+    match = _AMOUNT_RE.fullmatch(cleaned)
+    if not match:
+        raise ValueError(
+            "Invalid input. Please enter an amount like 25 or 25.50.")
+
+    whole, frac = match.groups()
+    # Check the digit count first: int() of a huge string is itself costly
+    if len(whole.lstrip("0")) > len(str(MAX_AMOUNT // CENTS_PER_UNIT)):
+        raise ValueError(f"Amount cannot exceed {format_money(MAX_AMOUNT)}.")
+
+    cents = int(whole or 0) * CENTS_PER_UNIT + int((frac or "").ljust(2, "0"))
+    if cents > MAX_AMOUNT:
+        raise ValueError(f"Amount cannot exceed {format_money(MAX_AMOUNT)}.")
+    return cents
+
+
+def to_cents(value):
+    """Convert a legacy dollar value (REAL column, JSON float) to cents."""
+    cents = Decimal(str(value)) * CENTS_PER_UNIT
+    return int(cents.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def format_money(cents):
+    """Integer cents -> '$12.34' (or '-$12.34')."""
+    sign = "-" if cents < 0 else ""
+    whole, frac = divmod(abs(cents), CENTS_PER_UNIT)
+    return f"{sign}${whole}.{frac:02d}"
@@ -0,0 +1,67 @@
+# benchmarks/bench_account_memory.py
+"""
+Memory benchmark: bytes per account for the slotted bank model with its
+ring-buffer history, against the previous __dict__ + f-string list layout.
+
+Run from the project root:
+    python -m benchmarks.bench_account_memory --accounts 1000000 --tx-per-account 20
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from bank_project.account import bank
+
+
+class LegacyAccount:
+    # Previous layout, kept here only as the comparison baseline
+    def __init__(self, name, password, initial_balance=0):
+        self.name = name
+        self.password = password
+        self.balance = initial_balance
+        self.history = []
+        if initial_balance == 0:
+            self.history.append("Account created with $0")
+
+    def deposit(self, amount):
+        self.balance += amount
+        self.history.append(
+            f"Deposited: ${amount}. New balance: ${self.balance}.")
+
+
+def measure(factory, num_accounts, tx_per_account):
+    gc.collect()
+    tracemalloc.start()
+    accounts = {}
+    for i in range(num_accounts):
+        name = f"user{i}"
+        acc = factory(name, "pw", 0)
+        for t in range(tx_per_account):
+            acc.deposit(t + 1)
+        accounts[name] = acc
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / num_accounts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=1_000_000)
+    parser.add_argument("--tx-per-account", type=int, default=20)
+    parser.add_argument("--skip-legacy", action="store_true",
+                        help="only measure the current model")
+    args = parser.parse_args()
+
+    print(f"accounts={args.accounts} tx/account={args.tx_per_account}")
+    current = measure(bank, args.accounts, args.tx_per_account)
+    print(f"  slotted bank + ring buffer: {current:8.0f} bytes/account")
+
+    if not args.skip_legacy:
+        legacy = measure(LegacyAccount, args.accounts, args.tx_per_account)
+        print(f"  __dict__ + f-string list:   {legacy:8.0f} bytes/account")
+        print(f"  reduction:                  {legacy / current:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
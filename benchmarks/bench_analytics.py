@@ -0,0 +1,55 @@
+# benchmarks/bench_analytics.py
+"""
+Ledger analytics throughput: monthly statements, top accounts by volume
+and a single account's running balance over a synthetic SQLite ledger.
+Needs NumPy.
+
+Run from the project root:
+    python -m benchmarks.bench_analytics --accounts 100000 --tx-per-account 100
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from bank_project.bank_app.services import analytics, db_storage
+from benchmarks import synthetic
+
+
+def timed(label, rows, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - start
+    print(f"  {label:22s} {seconds:8.2f}s {rows / seconds:12,.0f} rows/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=20_000)
+    parser.add_argument("--tx-per-account", type=int, default=100)
+    parser.add_argument("--chunk-rows", type=int, default=analytics.LEDGER_CHUNK_ROWS)
+    parser.add_argument("--seed", type=int, default=synthetic.DEFAULT_SEED)
+    args = parser.parse_args()
+
+    analytics.LEDGER_CHUNK_ROWS = args.chunk_rows
+    rows = args.accounts * args.tx_per_account
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_storage.DB_FILE = Path(tmp) / "bank.db"
+        print(f"building {rows:,} ledger rows...")
+        synthetic.build_sqlite(args.accounts, args.tx_per_account, args.seed)
+
+        print(f"chunk_rows={args.chunk_rows:,}")
+        statements = timed("monthly_statements", rows, analytics.monthly_statements)
+        timed("top_accounts", rows, analytics.top_accounts, 10)
+        timed("running_balance", args.tx_per_account, analytics.running_balance,
+              synthetic.account_name(0))
+        print(f"  {len(statements):,} statements")
+        db_storage.close()
+
+
+if __name__ == "__main__":
+    main()
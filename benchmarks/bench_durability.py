@@ -0,0 +1,72 @@
+# benchmarks/bench_durability.py
+"""
+Write throughput per durability mode: single log_transaction calls and
+two-account transfers (write_batch), against the old rollback-journal
+setup (journal_mode=DELETE, synchronous=FULL, commit per call).
+
+Run from the project root:
+    python -m benchmarks.bench_durability --ops 2000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from bank_project.account import bank
+from bank_project.bank_app.services import db_storage
+
+
+def timed(fn, ops):
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    db_storage.flush_group()
+    return ops / (time.perf_counter() - start)
+
+
+def run_mode(mode, ops, workdir):
+    db_storage.DB_FILE = workdir / f"{mode}.db"
+    if mode == "rollback":
+        db_storage.set_durability("strict")
+        db_storage.get_conn().execute("PRAGMA journal_mode=DELETE")
+    else:
+        db_storage.set_durability(mode)
+
+    alice, bob = bank.restore("Alice", "pw", 10**9), bank.restore("Bob", "pw", 0)
+    db_storage.upsert_accounts([alice, bob])
+
+    log_rate = timed(
+        lambda i: db_storage.log_transaction("Alice", "DEPOSIT", i + 1), ops)
+    transfer_rate = timed(
+        lambda i: db_storage.write_batch([alice, bob], [
+            ("Alice", "TRANSFER_OUT", 1, "To Bob"),
+            ("Bob", "TRANSFER_IN", 1, "From Alice")]), ops)
+    db_storage.close()
+    return log_rate, transfer_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--group-ops", type=int, default=db_storage.GROUP_COMMIT_OPS)
+    parser.add_argument("--group-ms", type=int, default=db_storage.GROUP_COMMIT_MS)
+    args = parser.parse_args()
+
+    db_storage.GROUP_COMMIT_OPS = args.group_ops
+    db_storage.GROUP_COMMIT_MS = args.group_ms
+
+    print(f"ops={args.ops} group commit every {args.group_ops} ops / {args.group_ms} ms")
+    print(f"  {'mode':28s} {'log_transaction/s':>18s} {'transfers/s':>12s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, label in (("rollback", "rollback journal (old)"),
+                            ("strict", "WAL strict"),
+                            ("group", "WAL group commit"),
+                            ("relaxed", "WAL relaxed")):
+            log_rate, transfer_rate = run_mode(mode, args.ops, Path(tmp))
+            print(f"  {label:28s} {log_rate:18.0f} {transfer_rate:12.0f}")
+    db_storage.set_durability("strict")
+
+
+if __name__ == "__main__":
+    main()
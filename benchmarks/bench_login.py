@@ -0,0 +1,58 @@
+# benchmarks/bench_login.py
+"""
+Login throughput benchmark: BankService.login() with scrypt-hashed
+passwords, verified inline on the calling threads versus in the shared
+process pool.
+
+Run from the project root:
+    python -m benchmarks.bench_login --logins 200 --threads 8 --scrypt-n 16384
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bank_project.bank_app.services import passwords
+from bank_project.bank_app.services.bank_service import BankService
+from benchmarks.load_test_server import alpha_name
+
+
+def run(service, names, logins, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(
+            lambda i: service.login(names[i % len(names)], "pw"), range(logins)))
+    return logins / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--scrypt-n", type=int, default=passwords.DEFAULT_PARAMS.n)
+    parser.add_argument("--scrypt-r", type=int, default=passwords.DEFAULT_PARAMS.r)
+    parser.add_argument("--scrypt-p", type=int, default=passwords.DEFAULT_PARAMS.p)
+    parser.add_argument("--workers", type=int, default=passwords.DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    passwords.DEFAULT_WORKERS = args.workers
+    params = passwords.ScryptParams(args.scrypt_n, args.scrypt_r, args.scrypt_p)
+    names = [alpha_name(i, prefix="bench") for i in range(args.accounts)]
+
+    print(f"scrypt n={params.n} r={params.r} p={params.p} "
+          f"logins={args.logins} threads={args.threads} workers={args.workers}")
+    for label, offload in (("inline (calling threads)", False),
+                           ("process pool", True)):
+        hasher = passwords.PasswordHasher(params, offload=offload)
+        service = BankService({}, hasher=hasher)
+        for name in names:
+            service.create_account(name, "pw")
+        rate = run(service, names, args.logins, args.threads)
+        print(f"  {label:26s} {rate:8.1f} logins/s")
+
+    passwords.shutdown()
+
+
+if __name__ == "__main__":
+    main()
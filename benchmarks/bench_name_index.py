@@ -0,0 +1,83 @@
+# benchmarks/bench_name_index.py
+"""
+Account name search latency: prefix completion and typo suggestions from
+the in-memory NameIndex and from SQLite's NOCASE index (StoredNameIndex),
+plus NameIndex inserts, over random alphabetic names.
+
+Run from the project root:
+    python -m benchmarks.bench_name_index --names 1000000
+"""
+
+import argparse
+import random
+import string
+import tempfile
+import time
+from pathlib import Path
+
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services.name_index import NameIndex, StoredNameIndex
+from benchmarks import synthetic
+
+
+def random_names(n, rng):
+    names = set()
+    while len(names) < n:
+        length = rng.randint(4, 12)
+        names.add(rng.choice(string.ascii_uppercase)
+                  + "".join(rng.choices(string.ascii_lowercase, k=length - 1)))
+    return list(names)
+
+
+def typo(name, rng):
+    i = rng.randrange(1, len(name) - 1)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+def per_call_us(fn, inputs):
+    start = time.perf_counter()
+    for value in inputs:
+        fn(value)
+    return (time.perf_counter() - start) / len(inputs) * 1_000_000
+
+
+def report(label, index, prefixes, typos):
+    print(f"  {label:10s} complete {per_call_us(index.complete, prefixes):8.1f} µs"
+          f"   suggest {per_call_us(index.suggest, typos):8.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=synthetic.DEFAULT_SEED)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = random_names(args.names, rng)
+    sample = rng.sample(names, args.queries)
+    prefixes = [name[:rng.randint(1, 4)] for name in sample]
+    typos = [typo(name, rng) for name in sample]
+    print(f"{args.names:,} names, {args.queries:,} queries each")
+
+    start = time.perf_counter()
+    index = NameIndex(names)
+    print(f"  NameIndex built in {time.perf_counter() - start:.2f}s")
+    report("memory", index, prefixes, typos)
+    new_names = random_names(args.queries, random.Random(args.seed + 1))
+    print(f"  {'memory':10s} add      {per_call_us(index.add, new_names):8.1f} µs")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_storage.DB_FILE = Path(tmp) / "bank.db"
+        conn = db_storage.get_conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO accounts (name, password, balance_cents) VALUES (?, 'pw', 0)",
+                ((name,) for name in names))
+        report("sqlite", StoredNameIndex(), prefixes, typos)
+        db_storage.close()
+
+
+if __name__ == "__main__":
+    main()
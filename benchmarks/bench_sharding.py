@@ -0,0 +1,87 @@
+# benchmarks/bench_sharding.py
+"""
+Write throughput of the sharded SQLite backend by shard count: concurrent
+clients logging single-account deposits, then transferring between random
+accounts (two-phase commit whenever the two live on different shards).
+Every commit fsyncs in strict durability, so shards add parallel writers.
+
+Run from the project root:
+    python -m benchmarks.bench_sharding --shards 1 2 4 8 --clients 16
+"""
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from bank_project.account import bank
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services.shard_router import ShardRouter
+from benchmarks import synthetic
+
+
+def concurrent_rate(clients, ops_per_client, op):
+    """Total ops/s with `clients` threads each calling op(rng) ops_per_client times."""
+    def client(seed):
+        rng = random.Random(seed)
+        for _ in range(ops_per_client):
+            op(rng)
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return clients * ops_per_client / (time.perf_counter() - start)
+
+
+def run_shards(shards, args, workdir):
+    db_storage.DB_FILE = workdir / f"shards{shards}" / "bank.db"
+    router = ShardRouter(shards)
+    accounts = [bank.restore(synthetic.account_name(i), "pw", 10**9)
+                for i in range(args.accounts)]
+    router.upsert_accounts(accounts)
+
+    def deposit(rng):
+        acc = rng.choice(accounts)
+        router.write_batch([acc], [(acc.name, "DEPOSIT", 1, None)])
+
+    def transfer(rng):
+        sender, recipient = rng.sample(accounts, 2)
+        router.write_batch([sender, recipient], [
+            (sender.name, "TRANSFER_OUT", 1, None),
+            (recipient.name, "TRANSFER_IN", 1, None)])
+
+    deposit_rate = concurrent_rate(args.clients, args.ops, deposit)
+    transfer_rate = concurrent_rate(args.clients, args.ops, transfer)
+    router.close()
+    return deposit_rate, transfer_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=100, help="operations per client")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--durability", choices=("strict", "relaxed"), default="strict")
+    args = parser.parse_args()
+
+    db_storage.set_durability(args.durability)
+    print(f"{args.clients} clients x {args.ops} ops, {args.accounts:,} accounts, "
+          f"{args.durability} durability")
+    print(f"  {'shards':>6s} {'deposits/s':>11s} {'transfers/s':>12s} {'cross-shard':>12s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for shards in args.shards:
+            deposit_rate, transfer_rate = run_shards(shards, args, Path(tmp))
+            cross = 1 - 1 / shards
+            print(f"  {shards:6d} {deposit_rate:11.0f} {transfer_rate:12.0f} {cross:11.0%}")
+    db_storage.set_durability("strict")
+
+
+if __name__ == "__main__":
+    main()
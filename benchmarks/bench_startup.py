@@ -0,0 +1,74 @@
+# benchmarks/bench_startup.py
+"""
+Startup benchmark: time db_storage.load_accounts() against the old
+one-history-query-per-account approach.
+
+Run from the project root:
+    python -m benchmarks.bench_startup --accounts 50000 --tx-per-account 8
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from bank_project.account import bank
+from bank_project.bank_app.services import db_storage
+
+
+def build_db(num_accounts, tx_per_account):
+    conn = db_storage.get_conn()
+    conn.executemany(
+        "INSERT INTO accounts (name, password, balance_cents) VALUES (?, ?, ?)",
+        ((f"user{i}", "pw", 10000) for i in range(num_accounts)),
+    )
+    conn.executemany(
+        "INSERT INTO transactions (account_name, type, amount_cents) VALUES (?, ?, ?)",
+        ((f"user{i % num_accounts}", "DEPOSIT", 1000)
+         for i in range(num_accounts * tx_per_account)),
+    )
+    conn.commit()
+
+
+def load_accounts_n_plus_one():
+    # Previous implementation, kept here only as the comparison baseline
+    accounts = {}
+    rows = db_storage.get_conn().execute(
+        "SELECT name, password, balance_cents FROM accounts").fetchall()
+    for name, password, balance in rows:
+        acc = bank(name, password, balance)
+        acc.history = db_storage.load_recent_history(name, limit=5)
+        accounts[name] = acc
+    return accounts
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=20000)
+    parser.add_argument("--tx-per-account", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_storage.DB_FILE = Path(tmp) / "bank.db"
+        build_db(args.accounts, args.tx_per_account)
+
+        old_s, old = timed(load_accounts_n_plus_one)
+        new_s, new = timed(db_storage.load_accounts)
+        db_storage.close()
+
+    assert len(old) == len(new) == args.accounts
+
+    print(f"accounts={args.accounts} tx/account={args.tx_per_account}")
+    print(f"  per-account history queries: {old_s:8.3f}s")
+    print(f"  single windowed query:       {new_s:8.3f}s")
+    print(f"  speedup:                     {old_s / new_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
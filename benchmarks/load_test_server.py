@@ -0,0 +1,127 @@
+# benchmarks/load_test_server.py
+"""
+Load test for the asyncio bank server: drive thousands of concurrent
+simulated tellers through create / login / deposit / withdraw / transfer.
+
+Run from the project root (starts an in-process server on a temp database):
+    python -m benchmarks.load_test_server --sessions 2000 --concurrency 500
+
+Or point it at a running server:
+    python -m benchmarks.load_test_server --host 127.0.0.1 --port 8765
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from string import ascii_lowercase
+
+from bank_project.bank_app.server import BankServer, PROMPT
+from bank_project.bank_app.services import db_storage, storage
+
+
+def alpha_name(i, prefix="load"):
+    # Account names must be alphabetic, so spell the index in base 26
+    letters = ""
+    while True:
+        i, r = divmod(i, 26)
+        letters = ascii_lowercase[r] + letters
+        if i == 0:
+            return prefix + letters
+
+
+def session_script(i, run_id):
+    name = alpha_name(i, prefix=run_id)
+    partner = alpha_name(i ^ 1, prefix=run_id)
+    return [
+        "new", name, "pw",
+        "exi", name, "pw",
+        "deposit", "100",
+        "withdraw", "10",
+        "transfer", partner, "5",
+        "check balance",
+        "exit",
+        "done",
+    ]
+
+
+async def run_session(host, port, answers):
+    """Answer each prompt with the next scripted line; return the elapsed time."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    answers = iter(answers)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.decode().startswith(PROMPT):
+                writer.write((next(answers) + "\n").encode())
+                await writer.drain()
+    finally:
+        writer.close()
+    return time.perf_counter() - start
+
+
+async def drive(host, port, sessions, concurrency):
+    run_id = alpha_name(int(time.time()) % 10_000, prefix="r")
+    limit = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with limit:
+            try:
+                latencies.append(await run_session(host, port, session_script(i, run_id)))
+            except (OSError, StopIteration):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"sessions={sessions} concurrency={concurrency} errors={errors}")
+    print(f"  wall time:        {elapsed:8.2f}s")
+    print(f"  sessions/s:       {len(latencies) / elapsed:8.1f}")
+    if latencies:
+        print(f"  p50 session:      {statistics.median(latencies) * 1000:8.1f}ms")
+        print(f"  p99 session:      {latencies[int(len(latencies) * 0.99) - 1] * 1000:8.1f}ms")
+
+
+async def main_async(args):
+    if args.host:
+        await drive(args.host, args.port, args.sessions, args.concurrency)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_storage.DB_FILE = Path(tmp) / "bank.db"
+        storage.DATA_FILE = Path(tmp) / "accounts.json"
+
+        bank_server = BankServer(max_workers=args.workers)
+        server = await bank_server.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            await drive("127.0.0.1", port, args.sessions, args.concurrency)
+        finally:
+            server.close()
+            await server.wait_closed()
+            bank_server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", help="existing server (default: start one in-process)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=500,
+                        help="sessions connected at the same time")
+    parser.add_argument("--workers", type=int, default=32,
+                        help="server executor threads (in-process server only)")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
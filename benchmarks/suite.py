@@ -0,0 +1,260 @@
+# benchmarks/suite.py
+"""
+Benchmark suite for the service and storage layers.
+
+For each bank size and backend (json, sqlite, dual) a deterministic
+synthetic bank is generated in a temp directory, then these are timed:
+load_accounts, deposit, transfer, save_all, load_recent_history and
+migrate (JSON -> SQLite). Each result has ops/s and p50/p99 latency and
+the whole run is written to a JSON file for comparison between commits.
+
+Run from the project root:
+    python -m benchmarks.suite --accounts 1000 10000 --out results.json
+    python -m benchmarks.suite --accounts 1000 --compare results.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from bank_project.bank_app import migrate_json_to_db
+from bank_project.bank_app.services import db_storage, storage
+from bank_project.bank_app.services.bank_service import BankService
+from bank_project.bank_app.services.dual_storage import DualStorage
+from benchmarks import synthetic
+
+BACKENDS = ("json", "sqlite", "dual")
+
+
+# =============================
+# Timing helpers
+# =============================
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile of an already sorted list
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(fn, args_list):
+    """Call fn(*args) for each args tuple; return the result record."""
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "ops": len(latencies),
+        "seconds": round(total, 6),
+        "ops_per_s": round(len(latencies) / total, 1) if total else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+    }
+
+
+# =============================
+# Backends
+# =============================
+# Each backend loads, persists and bulk-saves the way the app does with
+# that storage configuration.
+
+class JsonBackend:
+    name = "json"
+    service_storage = None
+
+    def load(self):
+        return storage.load_data()
+
+    def commit(self, accounts, changed, tx_rows):
+        storage.journal_accounts(changed)
+
+    def save_all(self, accounts):
+        storage.save_data(accounts)
+
+    def close(self):
+        pass
+
+
+class SqliteBackend:
+    name = "sqlite"
+    service_storage = None
+
+    def load(self):
+        return db_storage.load_accounts()
+
+    def commit(self, accounts, changed, tx_rows):
+        db_storage.write_batch(changed, tx_rows)
+
+    def save_all(self, accounts):
+        db_storage.upsert_accounts(accounts.values())
+
+    def close(self):
+        db_storage.close()
+
+
+class DualBackend:
+    name = "dual"
+
+    def __init__(self):
+        self.service_storage = DualStorage(mirror="journal")
+
+    def load(self):
+        return self.service_storage.load_accounts()
+
+    def commit(self, accounts, changed, tx_rows):
+        for row in tx_rows:
+            self.service_storage.log_tx(*row)
+        self.service_storage.flush(accounts, changed)
+
+    def save_all(self, accounts):
+        self.service_storage.save_all(accounts)
+
+    def close(self):
+        self.service_storage.close()
+
+
+def make_backend(name):
+    return {"json": JsonBackend, "sqlite": SqliteBackend, "dual": DualBackend}[name]()
+
+
+# =============================
+# Scenario
+# =============================
+
+def run_backend(backend_name, num_accounts, args, workdir):
+    db_storage.DB_FILE = workdir / "bank.db"
+    storage.DATA_FILE = workdir / "accounts.json"
+
+    if backend_name in ("sqlite", "dual"):
+        synthetic.build_sqlite(num_accounts, args.tx_per_account, args.seed)
+    if backend_name in ("json", "dual"):
+        synthetic.build_json(num_accounts, args.tx_per_account, args.seed)
+
+    backend = make_backend(backend_name)
+    rng = random.Random(args.seed)
+    names = [synthetic.account_name(i) for i in range(num_accounts)]
+    results = {}
+
+    results["load_accounts"] = measure(backend.load, [()] * args.repeat)
+    accounts = backend.load()
+    service = BankService(accounts, backend.service_storage)
+
+    def deposit(name, amount):
+        acc = accounts[name]
+        service.deposit(acc, amount)
+        backend.commit(accounts, service.take_dirty(), [(name, "DEPOSIT", amount, None)])
+
+    results["deposit"] = measure(deposit, [
+        (rng.choice(names), rng.randint(1, 10_000)) for _ in range(args.ops)])
+
+    def transfer(sender, recipient, amount):
+        try:
+            service.transfer(accounts[sender], recipient, amount)
+        except ValueError:
+            return  # insufficient funds is a normal outcome
+        if backend.service_storage is None:
+            backend.commit(accounts, service.take_dirty(), [
+                (sender, "TRANSFER_OUT", amount, f"To {recipient}"),
+                (recipient, "TRANSFER_IN", amount, f"From {sender}")])
+
+    results["transfer"] = measure(transfer, [
+        (*rng.sample(names, 2), rng.randint(1, 5_000)) for _ in range(args.ops)])
+
+    results["save_all"] = measure(backend.save_all, [(accounts,)] * args.repeat)
+
+    # The full ledger only exists in SQLite
+    if backend_name != "json":
+        results["load_recent_history"] = measure(
+            db_storage.load_recent_history, [(rng.choice(names),) for _ in range(args.ops)])
+
+    backend.close()
+
+    if backend_name == "json":
+        # Fresh database each repeat so every run migrates the whole file
+        def migrate(i):
+            db_storage.DB_FILE = workdir / f"migrated{i}.db"
+            migrate_json_to_db.migrate(restart=True, report=lambda *_: None)
+            db_storage.close()
+
+        results["migrate"] = measure(migrate, [(i,) for i in range(args.repeat)])
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    baseline = {
+        (r["backend"], r["accounts"], r["op"]): r
+        for r in json.loads(Path(baseline_path).read_text())["results"]}
+    print(f"\nvs {baseline_path} (p50, negative is faster):")
+    for r in results:
+        old = baseline.get((r["backend"], r["accounts"], r["op"]))
+        if old and old["p50_ms"]:
+            change = (r["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100
+            print(f"  {r['backend']:6s} {r['accounts']:>8d} {r['op']:20s} {change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, nargs="+", default=[1000, 10_000],
+                        help="bank sizes to generate (e.g. 1000 100000 1000000)")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--tx-per-account", type=int, default=20)
+    parser.add_argument("--ops", type=int, default=1000,
+                        help="operations per latency-measured op")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="repetitions of whole-bank ops (load, save, migrate)")
+    parser.add_argument("--seed", type=int, default=synthetic.DEFAULT_SEED)
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = []
+    for num_accounts in args.accounts:
+        for backend_name in args.backends:
+            with tempfile.TemporaryDirectory() as tmp:
+                timings = run_backend(backend_name, num_accounts, args, Path(tmp))
+            for op, record in timings.items():
+                results.append({"backend": backend_name, "accounts": num_accounts,
+                                "op": op, **record})
+                print(f"{backend_name:6s} {num_accounts:>8d} {op:20s} "
+                      f"{record['ops_per_s'] or 0:12.1f} ops/s  "
+                      f"p50 {record['p50_ms']:10.3f}ms  p99 {record['p99_ms']:10.3f}ms")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    Path(args.out).write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {args.out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/synthetic.py
+"""
+Deterministic synthetic banks for benchmarks: the same seed always gives
+the same accounts, balances and ledgers, so runs are comparable.
+"""
+
+import random
+import time
+from collections import namedtuple
+
+from bank_project.account import HistoryEntry, HISTORY_CAPACITY, bank
+from bank_project.bank_app.services import db_storage, storage
+from bank_project.bank_app.services.passwords import ScryptParams, hash_password
+from benchmarks.load_test_server import alpha_name
+
+SyntheticAccount = namedtuple(
+    "SyntheticAccount", ["name", "password", "balance", "transactions"])
+
+DEFAULT_SEED = 1234
+
+# Transaction mix of a typical retail account (weights)
+TX_MIX = (("DEPOSIT", 40), ("WITHDRAW", 35), ("TRANSFER_OUT", 15), ("TRANSFER_IN", 10))
+
+# Histories are spread over the year before this fixed instant
+EPOCH = 1_700_000_000
+SPAN_SECONDS = 365 * 24 * 3600
+
+# Generating a real hash per account would dominate setup time; every
+# synthetic account shares one (cheap) hash of "pw"
+PASSWORD_HASH = hash_password("pw", ScryptParams(2 ** 4, 1, 1))
+
+
+def account_name(i):
+    return alpha_name(i, prefix="syn")
+
+
+def generate(num_accounts, tx_per_account, seed=DEFAULT_SEED):
+    """Yield SyntheticAccounts; transactions are (type, amount_cents, created_at)."""
+    rng = random.Random(seed)
+    types = [t for t, _ in TX_MIX]
+    weights = [w for _, w in TX_MIX]
+
+    for i in range(num_accounts):
+        stamps = sorted(EPOCH - rng.randrange(SPAN_SECONDS) for _ in range(tx_per_account))
+        balance = 0
+        txs = []
+        for n, stamp in enumerate(stamps):
+            tx_type = "DEPOSIT" if n == 0 else rng.choices(types, weights)[0]
+            # Log-normal amounts: mostly small, occasionally large
+            amount = max(1, int(rng.lognormvariate(8, 1.2)))
+            if tx_type in ("WITHDRAW", "TRANSFER_OUT"):
+                if amount > balance:
+                    tx_type = "DEPOSIT"
+                else:
+                    balance -= amount
+            if tx_type in ("DEPOSIT", "TRANSFER_IN"):
+                balance += amount
+            created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(stamp))
+            txs.append((tx_type, amount, created_at))
+        yield SyntheticAccount(account_name(i), PASSWORD_HASH, balance, txs)
+
+
+def build_sqlite(num_accounts, tx_per_account, seed=DEFAULT_SEED, batch_size=5000):
+    """Fill db_storage.DB_FILE with a synthetic bank."""
+    conn = db_storage.get_conn()
+    accounts, txs = [], []
+
+    def flush():
+        with conn:
+            conn.executemany(
+                "INSERT INTO accounts (name, password, balance_cents) VALUES (?, ?, ?)",
+                accounts)
+            conn.executemany(
+                "INSERT INTO transactions (account_name, type, amount_cents, created_at) "
+                "VALUES (?, ?, ?, ?)", txs)
+        accounts.clear()
+        txs.clear()
+
+    for acc in generate(num_accounts, tx_per_account, seed):
+        accounts.append((acc.name, acc.password, acc.balance))
+        txs.extend((acc.name, *tx) for tx in acc.transactions)
+        if len(accounts) >= batch_size:
+            flush()
+    flush()
+
+
+def build_json(num_accounts, tx_per_account, seed=DEFAULT_SEED):
+    """Write storage.DATA_FILE as a snapshot of the same synthetic bank."""
+    accounts = {}
+    for acc in generate(num_accounts, tx_per_account, seed):
+        history = [
+            (tx_type, amount, HistoryEntry.parse_timestamp(created_at), None)
+            for tx_type, amount, created_at in acc.transactions[-HISTORY_CAPACITY:]]
+        accounts[acc.name] = bank.restore(acc.name, acc.password, acc.balance, history)
+    storage.save_data(accounts)
@@ -0,0 +1,17 @@
+import pytest
+from bank_project.bank_app.services import db_storage, passwords, storage
+
+
+@pytest.fixture(autouse=True)
+def cheap_password_hashing(monkeypatch):
+    # Real KDF costs are deliberately slow; tests only need the behaviour
+    monkeypatch.setattr(passwords, "DEFAULT_PARAMS", passwords.ScryptParams(2 ** 4, 1, 1))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    # Point bank.db and the JSON mirror at a throwaway directory for each test
+    monkeypatch.setattr(db_storage, "DB_FILE", tmp_path / "bank.db")
+    monkeypatch.setattr(storage, "DATA_FILE", tmp_path / "accounts.json")
+    yield tmp_path
+    db_storage.close()
@@ -0,0 +1,99 @@
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services.account_repository import AccountRepository
+from bank_project.bank_app.services.bank_service import BankService
+
+
+@pytest.fixture
+def db(data_dir):
+    db_storage.upsert_accounts(
+        [bank("Alice", "pw", 100), bank("Bob", "pw", 0), bank("Cara", "pw", 5)])
+    return db_storage
+
+
+def test_accounts_are_loaded_on_first_lookup(db):
+    repo = AccountRepository(cache_size=10)
+
+    assert "Alice" in repo
+    assert repo["Alice"].balance == 100
+    assert "Nobody" not in repo
+    assert len(repo) == 3
+
+
+def test_cache_stays_bounded(db):
+    repo = AccountRepository(cache_size=2)
+
+    for name in ("Alice", "Bob", "Cara"):
+        repo.get(name)
+
+    assert len(repo._cache) == 2
+    assert "Alice" not in repo._cache
+
+
+def test_dirty_entries_are_written_back_before_eviction(db):
+    repo = AccountRepository(cache_size=1)
+    service = BankService(repo)
+
+    alice = service.login("Alice", "pw")
+    service.deposit(alice, 50)
+
+    # Looking up another account evicts Alice, which must hit the DB first
+    repo.get("Bob")
+
+    assert db.load_account("Alice").balance == 150
+
+
+def test_service_works_against_repository(db):
+    repo = AccountRepository(cache_size=1)
+    service = BankService(repo)
+
+    alice = service.login("Alice", "pw")
+    service.transfer(alice, "Bob", 30)
+    service.create_account("Dave", "pw")
+    db.upsert_accounts(service.take_dirty())
+
+    assert db.load_account("Alice").balance == 70
+    assert db.load_account("Bob").balance == 30
+    assert db.load_account("Dave") is not None
+    assert sorted(repo) == ["Alice", "Bob", "Cara", "Dave"]
+
+
+def test_evicted_account_held_by_a_session_is_not_reloaded(db):
+    repo = AccountRepository(cache_size=1)
+    service = BankService(repo)
+    alice = service.login("Alice", "pw")
+    db.upsert_accounts(service.take_dirty())
+
+    # Alice stays logged in while other lookups evict her clean entry
+    for _ in range(3):
+        repo.get("Bob")
+        service.transfer(repo["Alice"], "Bob", 10)
+        db.upsert_accounts(service.take_dirty())
+    service.deposit(alice, 1)
+    db.upsert_accounts(service.take_dirty())
+
+    assert repo["Alice"] is alice
+    assert db.load_account("Alice").balance == 71
+
+
+def test_stale_object_cannot_overwrite_a_recreated_account(db):
+    repo = AccountRepository(cache_size=10)
+    old = repo["Cara"]
+    del repo["Cara"]
+    repo["Cara"] = bank("Cara", "pw", 0)
+
+    with pytest.raises(ValueError, match="log in again"):
+        repo.mark_dirty(old)
+
+
+def test_invalidate_refreshes_accounts_sessions_hold(db):
+    repo = AccountRepository(cache_size=1)
+    alice = repo["Alice"]
+    repo.get("Bob")
+    db.upsert_account(bank.restore("Alice", "pw", 555))
+
+    repo.invalidate()
+
+    assert repo["Alice"] is alice
+    assert alice.balance == 555
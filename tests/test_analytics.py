@@ -0,0 +1,92 @@
+import random
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app.services import analytics, db_storage
+
+np = pytest.importorskip("numpy")
+
+SIGN = {"DEPOSIT": 1, "TRANSFER_IN": 1, "WITHDRAW": -1, "TRANSFER_OUT": -1}
+
+
+@pytest.fixture
+def ledger(data_dir, monkeypatch):
+    # Random ledger over a few months; tiny chunks so accounts straddle them
+    monkeypatch.setattr(analytics, "LEDGER_CHUNK_ROWS", 7)
+    rng = random.Random(7)
+    rows, balances = [], {}
+    for name in ("Alice", "Bob", "Carol", "Dave"):
+        balance = rng.randint(0, 5000)    # opening balance with no ledger rows
+        for _ in range(rng.randint(5, 30)):
+            tx_type = rng.choice(list(SIGN) + ["PASSWORD_CHANGE"])
+            amount = None if tx_type == "PASSWORD_CHANGE" else rng.randint(1, 900)
+            created_at = f"2024-{rng.randint(1, 4):02d}-{rng.randint(1, 28):02d} 12:00:00"
+            balance += SIGN.get(tx_type, 0) * (amount or 0)
+            rows.append((name, tx_type, amount, created_at))
+        balances[name] = balance
+    rng.shuffle(rows)
+
+    db_storage.upsert_accounts(bank.restore(n, "pw", b) for n, b in balances.items())
+    with db_storage.get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO transactions (account_name, type, amount_cents, created_at) "
+            "VALUES (?, ?, ?, ?)", rows)
+    return balances
+
+
+def ledger_rows(name):
+    return db_storage.get_conn().execute(
+        "SELECT id, type, COALESCE(amount_cents, 0), substr(created_at, 1, 7) "
+        "FROM transactions WHERE account_name = ? ORDER BY id", (name,)).fetchall()
+
+
+def test_running_balance_ends_at_current_balance(ledger):
+    rows = ledger_rows("Bob")
+    result = analytics.running_balance("Bob")
+
+    deltas = [SIGN.get(t, 0) * a for _, t, a, _ in rows]
+    assert result.ids.tolist() == [r[0] for r in rows]
+    assert result.balances[-1] == ledger["Bob"]
+    assert np.diff(result.balances).tolist() == deltas[1:]
+
+
+def test_monthly_statements_match_row_by_row(ledger):
+    statements = analytics.monthly_statements()
+
+    for name, balance in ledger.items():
+        expected = {}
+        for _, tx_type, amount, month in ledger_rows(name):
+            credits, debits, count = expected.get(month, (0, 0, 0))
+            delta = SIGN.get(tx_type, 0) * amount
+            expected[month] = (credits + max(delta, 0), debits + max(-delta, 0), count + 1)
+
+        mine = [s for s in statements if s.account == name]
+        assert [s.month for s in mine] == sorted(expected)
+        assert [(s.credits, s.debits, s.tx_count) for s in mine] == [
+            expected[m] for m in sorted(expected)]
+        assert mine[-1].closing == balance
+        for prev, cur in zip(mine, mine[1:]):
+            assert cur.opening == prev.closing
+            assert cur.closing == cur.opening + cur.credits - cur.debits
+
+
+def test_monthly_statements_window_keeps_anchored_balances(ledger):
+    full = analytics.monthly_statements("Alice")
+    window = analytics.monthly_statements("Alice", since="2024-02", until="2024-03")
+
+    assert window == [s for s in full if "2024-02" <= s.month <= "2024-03"]
+
+
+def test_top_accounts_ranks_by_volume(ledger):
+    volumes = {
+        name: (sum(a for _, t, a, _ in ledger_rows(name)), len(ledger_rows(name)))
+        for name in ledger}
+    expected = sorted(volumes.items(), key=lambda kv: -kv[1][0])[:2]
+
+    top = analytics.top_accounts(2)
+
+    assert [(t.account, (t.volume, t.tx_count)) for t in top] == expected
+
+
+def test_top_accounts_rejects_non_positive_n(ledger):
+    with pytest.raises(ValueError):
+        analytics.top_accounts(0)
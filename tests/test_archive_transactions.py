@@ -0,0 +1,122 @@
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app import archive_transactions
+from bank_project.bank_app.services import db_storage, shard_router
+
+
+@pytest.fixture
+def ledger(data_dir):
+    db_storage.upsert_accounts([bank.restore("Alice", "pw", 0), bank.restore("Bob", "pw", 0)])
+    rows = []
+    for i, day in enumerate(["2021-03-01", "2021-09-01", "2022-05-01", "2023-02-01",
+                             "2024-06-01", "2024-07-01"]):
+        rows.append(("Alice", "DEPOSIT", (i + 1) * 100, None, f"{day} 10:00:00"))
+        rows.append(("Bob", "WITHDRAW", i + 1, None, f"{day} 11:00:00"))
+    with db_storage._write() as conn:
+        conn.executemany(
+            "INSERT INTO transactions (account_name, type, amount_cents, note, created_at) "
+            "VALUES (?, ?, ?, ?, ?)", rows)
+
+
+def quiet(*_):
+    pass
+
+
+def hot_count():
+    return db_storage.get_conn().execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+
+def all_history(name, **filters):
+    rows, before = [], None
+    while True:
+        page, before = db_storage.query_history(name, before, limit=3, **filters)
+        rows += page
+        if before is None:
+            return rows
+
+
+def test_archives_old_rows_into_yearly_files(ledger):
+    history = all_history("Alice")
+    stats = archive_transactions.archive("2024-01-01", batch_size=2, report=quiet)
+
+    assert (stats.rows, stats.periods) == (8, ("2021", "2022", "2023"))
+    assert hot_count() == 4
+    assert sorted(p.name for p in db_storage.archive_dir().iterdir()) == [
+        "bank-2021.db", "bank-2022.db", "bank-2023.db"]
+    # Paging walks from the hot table into the archives without gaps
+    assert all_history("Alice") == history
+    assert db_storage.verify_summary() == []
+
+
+def test_recent_history_reaches_into_archives(ledger):
+    archive_transactions.archive("2024-01-01", report=quiet)
+
+    recent = db_storage.load_recent_history("Alice", limit=4)
+    assert [h.amount for h in recent] == [300, 400, 500, 600]
+    assert [h.amount for h in db_storage.load_recent_histories(limit=3)["Bob"]] == [4, 5, 6]
+    assert db_storage.load_recent_histories(limit=2)["Alice"] == recent[-2:]
+
+
+def test_hot_only_queries_do_not_attach_archives(ledger, monkeypatch):
+    archive_transactions.archive("2024-01-01", report=quiet)
+    monkeypatch.setattr(db_storage, "_attached", None)
+
+    rows, _ = db_storage.query_history("Alice", limit=2)
+    assert [r.amount for r in rows] == [600, 500]
+    assert [r.amount for r in all_history("Alice", since="2024-01-01")] == [600, 500]
+
+
+def test_date_filters_select_archive_years(ledger):
+    archive_transactions.archive("2024-01-01", report=quiet)
+
+    rows = all_history("Bob", since="2021-06-01", until="2022-12-31")
+    assert [r.amount for r in rows] == [3, 2]
+
+
+def test_rerun_and_interrupted_copy_do_not_duplicate(ledger):
+    archive_transactions.archive("2022-01-01", report=quiet)
+    assert archive_transactions.archive("2022-01-01", report=quiet).rows == 0
+
+    # A row copied to the archive but not yet deleted shows up once
+    with db_storage._attached(["2024"], create=True) as (conn, (alias,)):
+        conn.execute(f"INSERT INTO {alias}.transactions SELECT id, account_name, type, "
+                     "amount_cents, note, created_at FROM main.transactions "
+                     "WHERE created_at LIKE '2024-06%'")
+        conn.commit()
+    archive_transactions.archive("2024-06-15", report=quiet)
+    assert [r.amount for r in all_history("Alice")] == [600, 500, 400, 300, 200, 100]
+
+
+def test_delete_account_removes_archived_rows(ledger):
+    archive_transactions.archive("2024-01-01", vacuum=True, report=quiet)
+    db_storage.delete_account("Bob")
+
+    assert all_history("Bob") == []
+    assert db_storage.verify_summary() == []
+    assert len(all_history("Alice")) == 6
+
+
+def test_ledger_scans_include_archived_rows(ledger):
+    columns = ("account_name", "id", "amount")
+    before = [row for rows in db_storage.iter_ledger(columns, chunk_rows=5) for row in rows]
+    archive_transactions.archive("2024-01-01", report=quiet)
+
+    # A hot row also left in an archive by an interrupted run is read once
+    with db_storage._attached(["2023"]) as (conn, (alias,)):
+        conn.execute(f"INSERT INTO {alias}.transactions SELECT {db_storage.ARCHIVE_COLUMNS} "
+                     "FROM main.transactions WHERE created_at LIKE '2024-06%'")
+        conn.commit()
+
+    chunks = list(db_storage.iter_ledger(columns, chunk_rows=5))
+    assert [len(rows) for rows in chunks] == [5, 5, 2]
+    assert [row for rows in chunks for row in rows] == before
+    assert [amount for _, _, amount in next(db_storage.iter_ledger(
+        columns, account_name="Bob", since="2021-06-01", until="2022-12-31"))] == [2, 3]
+
+
+def test_refuses_sharded_storage(ledger, monkeypatch):
+    monkeypatch.setattr(shard_router, "SHARDS", 4)
+
+    with pytest.raises(ValueError, match="does not support sharded storage"):
+        archive_transactions.archive("2024-01-01", report=quiet)
+    assert hot_count() == 12
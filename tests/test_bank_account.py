@@ -48,3 +48,20 @@ def test_withdraw_negative_amount_does_not_change_balance():
 
     assert acc.balance == 75
     assert msg == "Withdrawal amount must be positive."
+
+
+def test_history_is_a_bounded_ring_of_structured_records():
+    acc = bank("Gina", "pw", 0)
+    for amount in range(1, 21):
+        acc.deposit(amount)
+
+    assert len(acc.history) == 5
+    assert [entry.amount for entry in acc.history] == [16, 17, 18, 19, 20]
+    assert acc.history[-1].type == "DEPOSIT"
+    assert "DEPOSIT | $0.20" in acc.get_history()
+
+
+def test_account_has_no_instance_dict():
+    acc = bank("Hank", "pw", 0)
+
+    assert not hasattr(acc, "__dict__")
@@ -58,3 +58,138 @@ def test_transfer_insufficient_funds_raises():
 
     with pytest.raises(ValueError):
         service.transfer(sender, "Bob", 999)
+
+
+def test_only_changed_accounts_are_marked_dirty():
+    accounts = {}
+    service = BankService(accounts)
+
+    alice = service.create_account("Alice", "pw")
+    bob = service.create_account("Bob", "pw")
+    service.create_account("Cara", "pw")
+    service.take_dirty()
+
+    service.deposit(alice, 100)
+    service.transfer(alice, "Bob", 40)
+
+    changed = service.take_dirty()
+
+    assert sorted(acc.name for acc in changed) == ["Alice", "Bob"]
+    assert service.take_dirty() == []
+    assert bob.balance == 40
+
+
+def test_apply_batch_reports_each_operation():
+    accounts = {}
+    service = BankService(accounts)
+    alice = service.create_account("Alice", "pw")
+    bob = service.create_account("Bob", "pw")
+
+    results = service.apply_batch([
+        ("deposit", "Alice", 100),
+        ("transfer", "Alice", "Bob", 30),
+        ("withdraw", "Bob", 500),
+        ("deposit", "Nobody", 5),
+    ], atomic=False)
+
+    assert [r.ok for r in results] == [True, True, False, False]
+    assert alice.balance == 70
+    assert bob.balance == 30
+
+
+def test_atomic_batch_rolls_back_on_any_failure():
+    accounts = {}
+    service = BankService(accounts)
+    alice = service.create_account("Alice", "pw")
+    service.create_account("Bob", "pw")
+    history_len = len(alice.history)
+
+    results = service.apply_batch([
+        ("deposit", "Alice", 100),
+        ("transfer", "Alice", "Bob", 500),
+    ])
+
+    assert not any(r.ok for r in results)
+    assert alice.balance == 0
+    assert len(alice.history) == history_len
+
+
+def test_amounts_and_balances_are_bounded():
+    from bank_project.money import MAX_AMOUNT, MAX_BALANCE
+
+    accounts = {}
+    service = BankService(accounts)
+    alice = service.create_account("Alice", "pw")
+    bob = service.create_account("Bob", "pw")
+    service.deposit(alice, 100)
+    bob.balance = MAX_BALANCE - 50
+
+    with pytest.raises(ValueError, match="cannot exceed"):
+        service.deposit(alice, MAX_AMOUNT + 1)
+    with pytest.raises(ValueError, match="larger balance"):
+        service.deposit(bob, 51)
+    with pytest.raises(ValueError, match="larger balance"):
+        service.transfer(alice, "Bob", 100)
+    results = service.apply_batch([("transfer", "Alice", "Bob", 100)])
+
+    assert not results[0].ok
+    assert alice.balance == 100
+    assert bob.balance == MAX_BALANCE - 50
+
+
+def test_concurrent_transfers_conserve_money():
+    import random
+    import threading
+    from bank_project.account import bank
+
+    accounts = {}
+    service = BankService(accounts)
+    names = ["Alice", "Bob", "Cara", "Dave", "Erin", "Finn"]
+    for name in names:
+        service.deposit(service.create_account(name, "pw"), 1000)
+    total_before = bank.total_bank_balance
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(2000):
+            sender, recipient = rng.sample(names, 2)
+            try:
+                service.transfer(accounts[sender], recipient, rng.randint(1, 300))
+            except ValueError:
+                pass  # insufficient funds is expected under contention
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(acc.balance for acc in accounts.values()) == 6000
+    assert all(acc.balance >= 0 for acc in accounts.values())
+    assert bank.total_bank_balance == total_before
+
+
+def test_delete_checks_balance_under_the_account_lock():
+    import threading
+
+    accounts = {}
+    service = BankService(accounts)
+    bob = service.create_account("Bob", "pw")
+    errors = []
+
+    def delete():
+        try:
+            service.delete_account(bob, "DELETE BOB")
+        except ValueError as e:
+            errors.append(str(e))
+
+    # A transfer in holds Bob's lock while the deletion starts
+    with service._locked("Bob"):
+        deleter = threading.Thread(target=delete)
+        deleter.start()
+        deleter.join(0.1)
+        bob.balance += 100
+    deleter.join()
+
+    assert errors == ["You cannot delete an account with a remaining balance."]
+    assert accounts["Bob"] is bob
@@ -0,0 +1,150 @@
+import sqlite3
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app.services import db_storage
+
+
+@pytest.fixture
+def db(data_dir):
+    return db_storage
+
+
+def test_connection_is_reused_across_calls(db):
+    first = db.get_conn()
+    db.upsert_account(bank("Alice", "pw", 10))
+    db.log_transaction("Alice", "DEPOSIT", 10)
+
+    assert db.get_conn() is first
+
+
+def test_close_releases_connection_and_reopens(db):
+    db.upsert_account(bank("Alice", "pw", 10))
+    first = db.get_conn()
+
+    db.close()
+
+    assert db.get_conn() is not first
+    assert "Alice" in db.load_accounts()
+
+
+def test_upsert_and_history_round_trip(db):
+    db.upsert_account(bank("Alice", "pw", 0))
+    db.log_transaction("Alice", "DEPOSIT", 25)
+
+    accounts = db.load_accounts()
+
+    assert accounts["Alice"].balance == 0
+    assert accounts["Alice"].history[-1].type == "DEPOSIT"
+    assert accounts["Alice"].history[-1].amount == 25
+
+
+def test_upsert_accounts_writes_all_rows(db):
+    db.upsert_accounts([bank("Alice", "pw", 5), bank("Bob", "pw", 7)])
+
+    accounts = db.load_accounts()
+
+    assert accounts["Alice"].balance == 5
+    assert accounts["Bob"].balance == 7
+
+
+def test_load_recent_histories_keeps_last_n_per_account(db):
+    db.upsert_accounts([bank("Alice", "pw", 0), bank("Bob", "pw", 0)])
+    for i in range(7):
+        db.log_transaction("Alice", "DEPOSIT", i)
+    db.log_transaction("Bob", "WITHDRAW", 1)
+
+    histories = db.load_recent_histories(limit=5)
+
+    assert histories["Alice"] == db.load_recent_history("Alice", limit=5)
+    assert len(histories["Alice"]) == 5
+    assert histories["Alice"][-1].amount == 6
+    assert len(histories["Bob"]) == 1
+
+
+def test_schema_is_at_latest_version_with_history_index(db):
+    conn = db.get_conn()
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(transactions)")}
+
+    assert db.schema_version() == db.SCHEMA_VERSION
+    assert "idx_transactions_account_id" in indexes
+
+
+def test_query_history_pages_with_keyset_cursor(db):
+    db.upsert_account(bank("Alice", "pw", 0))
+    for i in range(1, 8):
+        db.log_transaction("Alice", "DEPOSIT" if i % 2 else "WITHDRAW", i)
+    db.log_transaction("Bob", "DEPOSIT", 99)
+
+    first, cursor = db.query_history("Alice", limit=3)
+    second, cursor = db.query_history("Alice", before_id=cursor, limit=3)
+    last, cursor = db.query_history("Alice", before_id=cursor, limit=3)
+
+    assert [r.amount for r in first + second + last] == [7, 6, 5, 4, 3, 2, 1]
+    assert cursor is None
+
+
+def test_query_history_filters_by_type_and_date(db):
+    db.log_transaction("Alice", "DEPOSIT", 1)
+    db.log_transaction("Alice", "WITHDRAW", 2)
+    db.get_conn().execute(
+        "UPDATE transactions SET created_at = '2020-01-15 10:00:00' WHERE amount_cents = 1")
+
+    deposits, _ = db.query_history("Alice", tx_types=["DEPOSIT"])
+    in_2020, _ = db.query_history("Alice", since="2020-01-01", until="2020-01-15")
+
+    assert [r.amount for r in deposits] == [1]
+    assert [r.amount for r in in_2020] == [1]
+
+
+def test_migration_converts_real_dollars_to_cents(db, data_dir):
+    # Build a version-2 file the way the old code left it
+    old = sqlite3.connect(data_dir / "bank.db")
+    for step in db.MIGRATIONS[0] + db.MIGRATIONS[1]:
+        old.execute(step)
+    old.execute("INSERT INTO accounts VALUES ('Alice', 'pw', 0.3)")
+    old.execute(
+        "INSERT INTO transactions (account_name, type, amount) VALUES ('Alice', 'DEPOSIT', 0.1)")
+    old.execute("PRAGMA user_version = 2")
+    old.commit()
+    old.close()
+
+    acc = db.load_accounts()["Alice"]
+
+    assert db.schema_version() == db.SCHEMA_VERSION
+    assert acc.balance == 30
+    assert acc.history[-1].amount == 10
+    assert db.load_totals() == (1, 30)
+
+
+def test_summary_tracks_every_balance_change(db):
+    db.upsert_accounts([bank("Alice", "pw", 500), bank("Bob", "pw", 200)])
+    bob = db.load_account("Bob")
+    bob.deposit(50)
+    db.write_batch([bob], [("Bob", "DEPOSIT", 50, None)])
+    db.delete_account("Alice")
+
+    assert db.load_totals() == (1, 250)
+    assert db.verify_summary() == []
+
+
+def test_daily_stats_count_and_sum_per_type(db):
+    db.upsert_account(bank("Alice", "pw", 0))
+    db.log_transaction("Alice", "DEPOSIT", 100)
+    db.log_transaction("Alice", "DEPOSIT", 25)
+    db.log_transaction("Alice", "PASSWORD_CHANGE", None)
+
+    stats = {s.type: (s.tx_count, s.volume_cents) for s in db.daily_tx_stats()}
+
+    assert stats == {"DEPOSIT": (2, 125), "PASSWORD_CHANGE": (1, 0)}
+
+
+def test_verify_summary_detects_and_repairs_drift(db):
+    db.upsert_account(bank("Alice", "pw", 100))
+    db.log_transaction("Alice", "DEPOSIT", 100)
+    with db.get_conn() as conn:
+        conn.execute("UPDATE bank_summary SET total_balance_cents = 7")
+        conn.execute("DELETE FROM daily_tx_stats")
+
+    assert len(db.verify_summary(repair=True)) == 2
+    assert db.verify_summary() == []
+    assert db.load_totals() == (1, 100)
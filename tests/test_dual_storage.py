@@ -0,0 +1,140 @@
+import sqlite3
+import pytest
+from bank_project.bank_app.services import db_storage, storage
+from bank_project.bank_app.services.bank_service import BankService
+from bank_project.bank_app.services.dual_storage import DualStorage
+from bank_project.bank_app.services.mirror_writer import MirrorWriter
+
+
+@pytest.mark.parametrize("mirror", ["snapshot", "journal"])
+def test_write_behind_mirror_catches_up_on_drain(data_dir, mirror):
+    dual = DualStorage(mirror=mirror, write_behind=True)
+    accounts = {}
+    service = BankService(accounts)
+
+    alice = service.create_account("Alice", "pw")
+    service.deposit(alice, 100)
+    dual.flush(accounts, service.take_dirty())
+    dual.drain()
+
+    assert dual.mirror_lag()["pending"] == 0
+    assert storage.load_data()["Alice"].balance == 100
+    assert db_storage.load_account("Alice").balance == 100
+    dual.close()
+
+
+def test_close_compacts_journal_into_snapshot(data_dir):
+    dual = DualStorage(mirror="journal", write_behind=True)
+    accounts = {}
+    service = BankService(accounts)
+
+    service.create_account("Alice", "pw")
+    dual.flush(accounts, service.take_dirty())
+    dual.close()
+
+    assert not storage.journal_file().exists()
+    assert "Alice" in storage.load_data()
+
+
+def test_close_finishes_shutdown_when_the_mirror_writer_failed(data_dir):
+    dual = DualStorage(mirror="journal", write_behind=True)
+    accounts = {}
+    service = BankService(accounts)
+    service.create_account("Alice", "pw")
+    dual.flush(accounts, service.take_dirty())
+    dual.drain()
+    dual._writer.error = OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        dual.close()
+    assert not storage.journal_file().exists()
+    assert db_storage._open_conns == []
+
+
+def test_coalesce_keeps_latest_snapshot_and_later_records():
+    ops = MirrorWriter.coalesce([
+        ("journal", [{"op": "put", "name": "A"}]),
+        ("snapshot", "old"),
+        ("snapshot", "new"),
+        ("journal", [{"op": "put", "name": "B"}]),
+        ("journal", [{"op": "del", "name": "C"}]),
+    ])
+
+    assert ops == [
+        ("snapshot", "new"),
+        ("journal", [{"op": "put", "name": "B"}, {"op": "del", "name": "C"}]),
+    ]
+
+
+def test_apply_batch_commits_balances_and_transactions_together(data_dir):
+    dual = DualStorage()
+    accounts = {}
+    service = BankService(accounts, dual)
+    service.create_account("Alice", "pw")
+    service.create_account("Bob", "pw")
+    dual.flush(accounts, service.take_dirty())
+
+    service.apply_batch([("deposit", "Alice", 100), ("transfer", "Alice", "Bob", 40)])
+
+    assert db_storage.load_account("Bob").balance == 40
+    types = [h.type for h in db_storage.load_recent_history("Alice")]
+    assert types == ["DEPOSIT", "TRANSFER_OUT"]
+
+
+def test_apply_batch_rolls_back_when_the_database_rejects_it(data_dir):
+    dual = DualStorage()
+    accounts = {}
+    service = BankService(accounts, dual)
+    alice = service.create_account("Alice", "pw")
+    dual.flush(accounts, service.take_dirty())
+    db_storage.get_conn().execute("""
+        CREATE TRIGGER reject_large BEFORE INSERT ON transactions
+        WHEN NEW.amount_cents > 1000 BEGIN SELECT RAISE(ABORT, 'too large'); END
+    """)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        service.apply_batch([("deposit", "Alice", 10), ("deposit", "Alice", 5000)])
+
+    assert alice.balance == 0
+    assert db_storage.load_account("Alice").balance == 0
+    assert db_storage.load_recent_history("Alice") == []
+
+
+def test_concurrent_transfers_commit_consistent_ledger(data_dir):
+    import threading
+
+    dual = DualStorage()
+    accounts = {}
+    service = BankService(accounts, dual)
+    names = ["Alice", "Bob", "Cara", "Dave"]
+    for name in names:
+        service.create_account(name, "pw")
+        service.deposit(accounts[name], 500)
+    dual.flush(accounts, service.take_dirty())
+
+    def worker(offset):
+        for i in range(100):
+            sender = names[(i + offset) % 4]
+            recipient = names[(i + offset + 1) % 4]
+            try:
+                service.transfer(accounts[sender], recipient, 7)
+            except ValueError:
+                pass
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stored = db_storage.load_accounts()
+    assert sum(acc.balance for acc in stored.values()) == 2000
+    assert {n: stored[n].balance for n in names} == {
+        n: accounts[n].balance for n in names}
+
+    out_total, in_total = db_storage.get_conn().execute("""
+        SELECT SUM(CASE WHEN type = 'TRANSFER_OUT' THEN amount_cents END),
+               SUM(CASE WHEN type = 'TRANSFER_IN' THEN amount_cents END)
+        FROM transactions
+    """).fetchone()
+    assert out_total == in_total
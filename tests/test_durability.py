@@ -0,0 +1,103 @@
+import sqlite3
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app.services import db_storage
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Writes 25 transactions with group commits every 10 operations, then dies
+# without committing, closing or running atexit handlers
+CRASH_SCRIPT = """
+import os, sys
+from bank_project.bank_app.services import db_storage
+db_storage.DB_FILE = sys.argv[1]
+db_storage.set_durability(sys.argv[2])
+db_storage.GROUP_COMMIT_OPS = 10
+db_storage.GROUP_COMMIT_MS = 60_000
+for i in range(25):
+    db_storage.log_transaction("Alice", "DEPOSIT", i + 1)
+os._exit(1)
+"""
+
+
+@pytest.mark.parametrize("mode, survivors", [
+    ("strict", 25),    # every operation was committed and fsynced
+    ("relaxed", 25),   # committed to the OS; only power loss could drop them
+    ("group", 20),     # the open group of 5 operations is lost
+])
+def test_process_crash_loses_exactly_the_open_group(tmp_path, mode, survivors):
+    path = tmp_path / "bank.db"
+    result = subprocess.run(
+        [sys.executable, "-c", CRASH_SCRIPT, str(path), mode], cwd=PROJECT_ROOT)
+    assert result.returncode == 1
+
+    conn = sqlite3.connect(path)
+    count = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    conn.close()
+
+    assert count == survivors
+
+
+@pytest.fixture
+def group_db(data_dir, monkeypatch):
+    monkeypatch.setattr(db_storage, "GROUP_COMMIT_OPS", 1000)
+    monkeypatch.setattr(db_storage, "GROUP_COMMIT_MS", 60_000)
+    db_storage.set_durability("group")
+    yield db_storage
+    db_storage.set_durability("strict")
+
+
+def test_group_mode_reads_see_pending_writes(group_db):
+    group_db.upsert_account(bank("Alice", "pw", 10))
+
+    assert group_db.load_account("Alice").balance == 10
+    assert group_db.get_conn().in_transaction
+
+
+def test_group_mode_failed_operation_rolls_back_alone(group_db):
+    group_db.log_transaction("Alice", "DEPOSIT", 1)
+    group_db.get_conn().execute("""
+        CREATE TRIGGER reject AFTER INSERT ON transactions
+        WHEN NEW.amount_cents > 100 BEGIN SELECT RAISE(ABORT, 'too large'); END
+    """)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        group_db.write_batch([], [("Alice", "DEPOSIT", 500, None)])
+    group_db.flush_group()
+
+    rows, _ = group_db.query_history("Alice")
+    assert [r.amount for r in rows] == [1]
+    assert not group_db.get_conn().in_transaction
+
+
+def test_group_mode_reads_wait_for_operations_in_progress(group_db):
+    group_db.upsert_account(bank("Alice", "pw", 10))
+    writing, release = threading.Event(), threading.Event()
+    seen = []
+
+    def failing_write():
+        with pytest.raises(RuntimeError):
+            with group_db._write() as conn:
+                conn.execute("UPDATE accounts SET balance_cents = 999 WHERE name = 'Alice'")
+                writing.set()
+                release.wait()
+                raise RuntimeError("rolled back")
+
+    writer = threading.Thread(target=failing_write)
+    reader = threading.Thread(target=lambda: seen.append(group_db.load_account("Alice").balance))
+    writer.start()
+    writing.wait()
+    try:
+        reader.start()
+        reader.join(0.2)
+        assert seen == []
+    finally:
+        release.set()
+        writer.join()
+        reader.join()
+    assert seen == [10]
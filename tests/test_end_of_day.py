@@ -0,0 +1,117 @@
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app import end_of_day
+from bank_project.bank_app.services import db_storage, shard_router, storage
+from bank_project.bank_app.services.account_repository import AccountRepository
+from bank_project.money import MAX_BALANCE
+
+BALANCES = {"Alice": 200_000_00, "Bob": 5_000_00, "Carol": 100_00, "Dan": 3}
+
+
+@pytest.fixture
+def stores(data_dir):
+    db_storage.upsert_accounts(bank.restore(n, "pw", b) for n, b in BALANCES.items())
+
+
+def quiet(*_):
+    pass
+
+
+def postings():
+    return db_storage.get_conn().execute(
+        "SELECT account_name, type, amount_cents, created_at FROM transactions "
+        "ORDER BY account_name, type").fetchall()
+
+
+def test_month_end_posts_tiered_interest_and_fees(stores):
+    run = end_of_day.run_end_of_day("2024-01-31", report=quiet)
+
+    # 2% on Alice, 0.5% on Bob (daily, half up); fees never go below zero
+    assert db_storage.load_balances() == {
+        "Alice": 200_000_00 + 1096, "Bob": 5_000_00 + 7, "Carol": 96_00, "Dan": 0}
+    assert run == db_storage.EodRun("2024-01-31", 2, 1103, 2, 403)
+    assert postings() == [
+        ("Alice", "INTEREST", 1096, "2024-01-31 23:59:59"),
+        ("Bob", "INTEREST", 7, "2024-01-31 23:59:59"),
+        ("Carol", "FEE", 400, "2024-01-31 23:59:59"),
+        ("Dan", "FEE", 3, "2024-01-31 23:59:59"),
+    ]
+    assert db_storage.verify_summary() == []
+
+
+def test_fees_only_at_month_end(stores):
+    run = end_of_day.run_end_of_day("2024-01-30", report=quiet)
+
+    assert (run.fee_accounts, run.fee_cents) == (0, 0)
+    assert db_storage.load_balances()["Carol"] == 100_00
+
+
+def test_rerun_for_same_date_is_a_no_op(stores):
+    end_of_day.run_end_of_day("2024-01-31", report=quiet)
+    balances = db_storage.load_balances()
+
+    assert end_of_day.run_end_of_day("2024-01-31", report=quiet) is None
+    assert db_storage.load_balances() == balances
+    assert len(postings()) == 4
+
+
+def test_refreshes_accounts_in_memory(stores):
+    accounts = db_storage.load_accounts()
+    repository = AccountRepository()
+    assert repository["Bob"].balance == 5_000_00
+
+    end_of_day.run_end_of_day("2024-01-31", accounts, report=quiet)
+    end_of_day.refresh_accounts(repository)
+
+    assert accounts["Alice"].balance == 200_000_00 + 1096
+    assert accounts["Alice"].history[-1].type == "INTEREST"
+    assert repository["Bob"].balance == 5_000_00 + 7
+    assert bank.total_bank_balance == sum(db_storage.load_balances().values())
+
+
+def test_json_mirror_gets_new_balances(stores):
+    storage.save_data(db_storage.load_accounts())
+
+    end_of_day.run_end_of_day("2024-01-31", report=quiet)
+
+    assert storage.load_data()["Carol"].balance == 96_00
+
+
+def test_rejects_bad_date(stores):
+    with pytest.raises(ValueError):
+        end_of_day.run_end_of_day("31/01/2024", report=quiet)
+
+
+def test_interest_past_the_largest_balance_posts_nothing(stores):
+    db_storage.upsert_account(bank.restore("Eve", "pw", MAX_BALANCE - 1))
+
+    with pytest.raises(ValueError, match="larger balance"):
+        end_of_day.run_end_of_day("2024-01-31", report=quiet)
+
+    assert db_storage.load_balances()["Alice"] == 200_000_00
+    assert postings() == []
+    assert db_storage.load_eod_run("2024-01-31") is None
+
+
+def test_refuses_while_another_process_has_the_bank_open(stores):
+    fcntl = pytest.importorskip("fcntl")
+    # What a running app or server holds (flock locks are per open file)
+    marker = open(db_storage.in_use_file(), "w")
+    fcntl.flock(marker, fcntl.LOCK_SH)
+    try:
+        with pytest.raises(ValueError, match="stop it before running end of day"):
+            end_of_day.run_end_of_day("2024-01-31", report=quiet)
+    finally:
+        marker.close()
+
+    # The app holding the marker may still run it for itself
+    db_storage.mark_in_use()
+    assert end_of_day.run_end_of_day("2024-01-31", report=quiet) is not None
+
+
+def test_refuses_sharded_storage(stores, monkeypatch):
+    monkeypatch.setattr(shard_router, "SHARDS", 4)
+
+    with pytest.raises(ValueError, match="does not support sharded storage"):
+        end_of_day.run_end_of_day("2024-01-31", report=quiet)
+    assert db_storage.load_eod_run("2024-01-31") is None
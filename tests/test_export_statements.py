@@ -0,0 +1,109 @@
+import csv
+import pytest
+from bank_project.account import HistoryEntry, bank
+from bank_project.bank_app import export_statements
+from bank_project.bank_app.services import db_storage, shard_router
+
+ROWS = [
+    ("Alice", "DEPOSIT", 1000, None, "2024-01-05 10:00:00"),
+    ("Bob", "DEPOSIT", 250, "payday", "2024-01-06 11:00:00"),
+    ("Alice", "WITHDRAW", 300, None, "2024-02-01 09:30:00"),
+    ("Alice", "PASSWORD_CHANGE", None, "Password updated", "2024-02-02 08:00:00"),
+    ("o'brien/2", "DEPOSIT", 5, "ünïcode", "2024-03-01 00:00:00"),
+]
+
+
+@pytest.fixture
+def ledger(data_dir):
+    db_storage.upsert_accounts(bank.restore(n, "pw", 0) for n in ("Alice", "Bob", "o'brien/2"))
+    with db_storage.get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO transactions (account_name, type, amount_cents, note, created_at) "
+            "VALUES (?, ?, ?, ?, ?)", ROWS)
+    return data_dir
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_csv_export_applies_filters(ledger):
+    path = ledger / "out.csv"
+
+    rows = export_statements.export_statements(
+        path, "csv", ["Alice"], since="2024-01-01", until="2024-02-01",
+        tx_types=["DEPOSIT", "WITHDRAW"])
+
+    assert rows == 2
+    header, *body = read_csv(path)
+    assert header == list(export_statements.CSV_HEADER)
+    assert [(r[1], r[2], r[3]) for r in body] == [
+        ("Alice", "DEPOSIT", "1000"), ("Alice", "WITHDRAW", "300")]
+
+
+def test_columnar_round_trip_across_blocks(ledger):
+    path = ledger / "out.bcol"
+
+    rows = export_statements.export_statements(path, "bcol", chunk_rows=2)
+    blocks = list(export_statements.read_columnar(path))
+
+    assert rows == len(ROWS)
+    assert [len(b["id"]) for b in blocks] == [2, 2, 1]
+    exported = [
+        (name, tx_type, amount, note, ts)
+        for b in blocks
+        for name, tx_type, amount, note, ts in zip(
+            b["account_name"], b["type"], b["amount"], b["note"], b["created_ts"])]
+    expected = sorted(
+        (name, tx_type, amount, note, HistoryEntry.parse_timestamp(created))
+        for name, tx_type, amount, note, created in ROWS)
+    assert sorted(exported) == expected
+
+
+def test_columnar_null_bitmap_spans_bytes(tmp_path):
+    nulls = {0, 7, 8, 18}
+    rows = [(i, "A", "DEPOSIT", None if i in nulls else i, None if i in nulls else "n", i)
+            for i in range(19)]
+
+    export_statements.write_columnar(tmp_path / "t.bcol", [rows])
+    (block,) = export_statements.read_columnar(tmp_path / "t.bcol")
+
+    assert block["amount"] == [r[3] for r in rows]
+    assert block["note"] == [r[4] for r in rows]
+
+
+def test_columnar_rejects_other_files(ledger):
+    path = ledger / "out.csv"
+    export_statements.export_statements(path, "csv")
+
+    with pytest.raises(ValueError):
+        list(export_statements.read_columnar(path))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_per_account_files(ledger, workers):
+    out = ledger / "statements"
+
+    stats = export_statements.export_per_account(
+        out, "csv", workers=workers, report=lambda *_: None)
+
+    assert (stats.files, stats.rows) == (3, len(ROWS))
+    assert len(read_csv(out / "Alice.csv")) == 1 + 3
+    odd = export_statements.statement_file_name("o'brien/2", "csv")
+    assert odd.startswith("o_brien_2-") and len(read_csv(out / odd)) == 2
+
+
+def test_unknown_format_is_rejected(ledger):
+    with pytest.raises(ValueError):
+        export_statements.export_statements(ledger / "out.xml", "xml")
+
+
+def test_refuses_sharded_storage(ledger, monkeypatch):
+    monkeypatch.setattr(shard_router, "SHARDS", 4)
+
+    with pytest.raises(ValueError, match="does not support sharded storage"):
+        export_statements.export_statements(ledger / "out.csv")
+    with pytest.raises(ValueError, match="does not support sharded storage"):
+        export_statements.export_per_account(ledger / "out", workers=1)
+    assert not (ledger / "out.csv").exists()
@@ -0,0 +1,56 @@
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app.services import db_storage, metrics, storage
+from bank_project.bank_app.services.bank_service import BankService
+
+
+@pytest.fixture
+def recording(monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", True)
+    metrics.reset()
+    yield metrics
+    metrics.reset()
+
+
+def test_disabled_records_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", False)
+    metrics.reset()
+    service = BankService({})
+    service.deposit(service.create_account("Alice", "pw"), 100)
+
+    assert metrics.snapshot() == {"counters": {}, "latency": {}}
+
+
+def test_service_ops_get_latency_and_error_counts(recording):
+    service = BankService({})
+    alice = service.create_account("Alice", "pw")
+    service.deposit(alice, 100)
+    with pytest.raises(ValueError):
+        service.withdraw(alice, 500)
+
+    data = metrics.snapshot()
+
+    assert data["latency"]["service.deposit"]["count"] == 1
+    assert data["latency"]["service.withdraw"]["count"] == 1
+    assert data["counters"]["service.withdraw.errors"] == 1
+
+
+def test_sqlite_statements_and_json_bytes_are_recorded(recording, data_dir):
+    db_storage.upsert_account(bank("Alice", "pw", 5))
+    storage.save_data({"Alice": bank("Alice", "pw", 5)})
+
+    data = metrics.snapshot()
+
+    assert any(name.startswith("sqlite.INSERT INTO accounts") for name in data["latency"])
+    assert data["counters"]["json.bytes_written"] == (data_dir / "accounts.json").stat().st_size
+
+
+def test_report_and_export(recording, tmp_path):
+    metrics.observe("demo.op", 0.0015)
+    metrics.add("demo.count", 3)
+
+    path = metrics.export(tmp_path / "metrics.txt")
+    text = path.read_text()
+
+    assert "demo.op" in text and "demo.count" in text
+    assert metrics.snapshot()["latency"]["demo.op"]["p99_ms"] == pytest.approx(1.5)
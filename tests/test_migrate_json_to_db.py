@@ -0,0 +1,78 @@
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app import migrate_json_to_db
+from bank_project.bank_app.services import db_storage, storage
+
+
+@pytest.fixture
+def stores(data_dir):
+    storage.save_data({f"user{i}": bank(f"user{i}", "pw", 0) for i in range(5)})
+
+
+def migrated_history_count():
+    return db_storage.get_conn().execute(
+        "SELECT COUNT(*) FROM transactions WHERE type = 'MIGRATED_HISTORY'").fetchone()[0]
+
+
+def quiet(*_):
+    pass
+
+
+def test_migrate_batches_accounts_and_history(stores):
+    stats = migrate_json_to_db.migrate(batch_size=2, report=quiet)
+
+    assert stats.accounts == 5
+    assert db_storage.load_totals() == (5, 0)
+    assert migrated_history_count() == 5
+
+
+def test_rerun_does_not_duplicate_history(stores):
+    migrate_json_to_db.migrate(batch_size=2, report=quiet)
+    migrate_json_to_db.migrate(batch_size=2, restart=True, report=quiet)
+
+    assert migrated_history_count() == 5
+
+
+def test_interrupted_run_resumes_from_checkpoint(stores, monkeypatch):
+    real_import = db_storage.import_batch
+    calls = []
+
+    def crash_on_second_batch(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        real_import(*args)
+
+    monkeypatch.setattr(db_storage, "import_batch", crash_on_second_batch)
+    with pytest.raises(KeyboardInterrupt):
+        migrate_json_to_db.migrate(batch_size=2, report=quiet)
+    monkeypatch.setattr(db_storage, "import_batch", real_import)
+
+    stats = migrate_json_to_db.migrate(batch_size=2, report=quiet)
+
+    assert stats.accounts == 3
+    assert db_storage.load_totals() == (5, 0)
+    assert migrated_history_count() == 5
+
+
+def test_journal_change_invalidates_checkpoint(stores, monkeypatch):
+    real_import = db_storage.import_batch
+
+    def crash_on_second_batch(*args):
+        if args[-1].position > 2:
+            raise KeyboardInterrupt
+        real_import(*args)
+
+    monkeypatch.setattr(db_storage, "import_batch", crash_on_second_batch)
+    with pytest.raises(KeyboardInterrupt):
+        migrate_json_to_db.migrate(batch_size=2, report=quiet)
+    monkeypatch.setattr(db_storage, "import_batch", real_import)
+
+    # A journaled change moves user0 behind the snapshot's accounts, so
+    # resuming at position 2 would skip user2
+    storage.journal_accounts([bank.restore("user0", "pw", 700)])
+    stats = migrate_json_to_db.migrate(batch_size=2, report=quiet)
+
+    assert stats.accounts == 5
+    assert db_storage.load_totals() == (5, 700)
+    assert db_storage.load_account("user2") is not None
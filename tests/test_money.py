@@ -0,0 +1,33 @@
+import pytest
+from bank_project.money import MAX_AMOUNT, format_money, parse_amount, to_cents
+
+
+def test_parse_amount_reads_dollars_and_cents_exactly():
+    assert parse_amount("25") == 2500
+    assert parse_amount("0.1") == 10
+    assert parse_amount("$1,234.56") == 123456
+    assert parse_amount(".05") == 5
+
+
+@pytest.mark.parametrize("text", ["", "abc", "1.234", "-5", "1e3", "."])
+def test_parse_amount_rejects_bad_input(text):
+    with pytest.raises(ValueError):
+        parse_amount(text)
+
+
+def test_parse_amount_rejects_amounts_over_the_limit():
+    assert parse_amount("1,000,000,000") == MAX_AMOUNT
+    for text in ("1000000000.01", "9" * 5000):
+        with pytest.raises(ValueError, match="cannot exceed"):
+            parse_amount(text)
+
+
+def test_legacy_floats_round_to_nearest_cent():
+    assert to_cents(0.1 + 0.2) == 30
+    assert to_cents(19.995) == 2000
+
+
+def test_format_money():
+    assert format_money(5) == "$0.05"
+    assert format_money(123456) == "$1234.56"
+    assert format_money(-250) == "-$2.50"
@@ -0,0 +1,90 @@
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app.services import db_storage
+from bank_project.bank_app.services.account_repository import AccountRepository
+from bank_project.bank_app.services.bank_service import BankService
+from bank_project.bank_app.services.dual_storage import DualStorage
+from bank_project.bank_app.services.name_index import NameIndex, StoredNameIndex, edit_distance
+
+NAMES = ["Alice", "alicia", "Alfred", "Bob", "Bobby", "Carol", "Caroline", "Dave"]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def index(request):
+    if request.param == "memory":
+        return NameIndex(NAMES)
+    request.getfixturevalue("data_dir")
+    db_storage.upsert_accounts(bank.restore(name, "pw", 0) for name in NAMES)
+    return StoredNameIndex()
+
+
+def test_complete_is_case_insensitive_and_ordered(index):
+    assert index.complete("ali") == ["Alice", "alicia"]
+    assert index.complete("AL") == ["Alfred", "Alice", "alicia"]
+    assert index.complete("bob", limit=1) == ["Bob"]
+    assert index.complete("zed") == []
+
+
+@pytest.mark.parametrize("typed, expected", [
+    ("Alcie", "Alice"),       # transposition
+    ("Alce", "Alice"),        # missing letter
+    ("Carrol", "Carol"),      # extra letter
+    ("Dove", "Dave"),         # wrong letter
+    ("carol", "Carol"),       # case only
+])
+def test_suggest_finds_the_intended_name(index, typed, expected):
+    assert index.suggest(typed)[0] == expected
+
+
+def test_suggest_nothing_close(index):
+    assert index.suggest("Zebediah") == []
+
+
+def test_added_and_removed_names_show_up(index):
+    index.add("Alison")
+    index.remove("Alice")
+    assert index.complete("ali") == ["alicia", "Alison"]
+    index.add("Alice")
+    assert index.complete("alic") == ["Alice", "alicia"]
+
+
+def test_edit_distance_counts_swaps_as_one():
+    assert edit_distance("alcie", "alice", 2) == 1
+    assert edit_distance("bob", "robert", 2) == 3
+
+
+def test_transfer_to_unknown_name_suggests_recipients(data_dir):
+    service = BankService(AccountRepository())
+    alice = service.create_account("Alice", "pw")
+    service.create_account("Bob", "pw")
+    service.deposit(alice, 100)
+
+    with pytest.raises(ValueError, match="Did you mean: Bob\\?"):
+        service.transfer(alice, "Bbo", 10)
+    assert service.find_accounts("b") == ["Bob"]
+
+
+def test_pending_names_are_dropped_once_committed(data_dir):
+    dual = DualStorage(mirror="journal")
+    accounts = dual.open_accounts()
+    service = BankService(accounts, dual)
+    bob = service.create_account("Bob", "pw")
+    service.create_account("Carol", "pw")
+    dual.flush(accounts, service.take_dirty())
+
+    service.delete_account(bob, "DELETE BOB")
+    assert service.names._removed == {"Bob"}
+    dual.delete_account("Bob", accounts)
+
+    assert (len(service.names._added), service.names._removed) == (0, set())
+    assert service.find_accounts("") == ["Carol"]
+    dual.close()
+
+
+def test_deleted_accounts_leave_the_index():
+    service = BankService({})
+    carol = service.create_account("Carol", "pw")
+    service.delete_account(carol, "DELETE CAROL")
+
+    assert service.find_accounts("Car") == []
+    assert service.suggest_accounts("Carl") == []
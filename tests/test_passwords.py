@@ -0,0 +1,64 @@
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app import hash_passwords
+from bank_project.bank_app.services import db_storage, passwords, storage
+from bank_project.bank_app.services.bank_service import BankService
+from bank_project.bank_app.services.passwords import PasswordHasher, ScryptParams
+
+
+def test_hash_is_salted_and_verifies():
+    first = passwords.hash_password("pw")
+    second = passwords.hash_password("pw")
+
+    assert first != second
+    assert first.startswith("scrypt$16$1$1$")
+    assert passwords.verify_password("pw", first)
+    assert not passwords.verify_password("nope", first)
+
+
+def test_needs_rehash_for_plaintext_and_old_cost():
+    old = passwords.hash_password("pw", ScryptParams(2 ** 3, 1, 1))
+
+    assert passwords.needs_rehash("pw")
+    assert passwords.needs_rehash(old)
+    assert not passwords.needs_rehash(passwords.hash_password("pw"))
+
+
+def test_service_never_stores_plaintext():
+    service = BankService({}, hasher=PasswordHasher(offload=False))
+    acc = service.create_account("Alice", "secret")
+    service.change_password(acc, "newer")
+
+    assert passwords.is_hashed(acc.password)
+    assert service.login("Alice", "newer") is acc
+    with pytest.raises(ValueError):
+        service.login("Alice", "secret")
+
+
+def test_login_upgrades_legacy_plaintext_in_worker_pool():
+    accounts = {"Alice": bank.restore("Alice", "pw", 0)}
+    service = BankService(accounts)
+
+    service.login("Alice", "pw")
+
+    assert passwords.is_hashed(accounts["Alice"].password)
+    assert service.take_dirty() == [accounts["Alice"]]
+    with pytest.raises(ValueError):
+        service.login("Nobody", "pw")
+
+
+def test_batch_migration_hashes_db_and_mirror(data_dir):
+    accounts = {name: bank(name, "pw", 0) for name in ("Alice", "Bob", "Cara")}
+    db_storage.upsert_accounts(accounts.values())
+    storage.save_data(accounts)
+
+    hasher = PasswordHasher(offload=False)
+    updated = hash_passwords.hash_existing_passwords(batch_size=2, hasher=hasher, report=lambda *_: None)
+    mirrored = storage.load_data()
+
+    assert updated == 3
+    assert hash_passwords.hash_existing_passwords(hasher=hasher, report=lambda *_: None) == 0
+    for name in accounts:
+        stored = db_storage.load_password(name)
+        assert passwords.verify_password("pw", stored)
+        assert mirrored[name].password == stored
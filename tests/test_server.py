@@ -0,0 +1,47 @@
+import asyncio
+from bank_project.bank_app.server import BankServer, PROMPT
+from bank_project.bank_app.services import db_storage
+
+
+async def talk(port, answers):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    answers = iter(answers)
+    output = []
+    while line := await reader.readline():
+        text = line.decode().rstrip("\n")
+        if text.startswith(PROMPT):
+            writer.write((next(answers) + "\n").encode())
+            await writer.drain()
+        else:
+            output.append(text)
+    writer.close()
+    return output
+
+
+def test_concurrent_sessions_share_one_service(data_dir):
+    async def scenario():
+        bank_server = BankServer(max_workers=4)
+        server = await bank_server.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        await asyncio.gather(
+            talk(port, ["new", "Alice", "pw", "done"]),
+            talk(port, ["new", "Bob", "pw", "done"]))
+        out = await talk(port, [
+            "exi", "Alice", "pw",
+            "deposit", "100",
+            "transfer", "Bob", "40",
+            "check balance",
+            "exit", "done"])
+
+        server.close()
+        await server.wait_closed()
+        bank_server.close()
+        return out
+
+    out = asyncio.run(scenario())
+
+    assert "Access granted." in out
+    assert "Transferred $40.00 to Bob." in out
+    assert "Current balance: $60.00." in out
+    assert db_storage.load_account("Bob").balance == 4000
@@ -0,0 +1,204 @@
+import sqlite3
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app import hash_passwords
+from bank_project.bank_app.services import analytics, db_storage, passwords
+from bank_project.bank_app.services.bank_service import BankService
+from bank_project.bank_app.services.dual_storage import DualStorage
+from bank_project.bank_app.services.passwords import PasswordHasher
+from bank_project.bank_app.services.shard_router import ShardRouter, Recovery, shard_path
+
+SHARDS = 4
+NAMES = ["Alice", "Bob", "Carol", "Dave", "Eve", "Frank"]
+
+
+@pytest.fixture
+def router(data_dir):
+    if db_storage.DURABILITY == "group":
+        pytest.skip("sharded storage does not run in group durability")
+    router = ShardRouter(SHARDS)
+    router.upsert_accounts(bank.restore(name, "pw", 1000) for name in NAMES)
+    yield router
+    router.close()
+
+
+def cross_shard_pair(router):
+    sender = NAMES[0]
+    recipient = next(name for name in NAMES if router.shard_of(name) != router.shard_of(sender))
+    return sender, recipient
+
+
+def failing(error):
+    def fail(*args):
+        raise error("disk I/O error")
+    return fail
+
+
+def rows_in(shard, sql):
+    conn = sqlite3.connect(shard_path(shard))
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_accounts_live_in_their_hashed_shard(router):
+    for name in NAMES:
+        for shard in range(SHARDS):
+            stored = rows_in(shard, f"SELECT name FROM accounts WHERE name = '{name}'")
+            assert bool(stored) == (shard == router.shard_of(name))
+
+    assert router.load_totals() == (len(NAMES), 1000 * len(NAMES))
+    assert list(router.iter_account_names(batch_size=2)) == sorted(NAMES)
+    assert [acc.name for acc in router.iter_accounts(batch_size=2)] == sorted(NAMES)
+    assert sorted(router.load_accounts()) == sorted(NAMES)
+
+
+def test_cross_shard_transfer_commits_both_sides(router):
+    dual = DualStorage(mirror="journal", db=router)
+    accounts = dual.load_accounts()
+    service = BankService(accounts, dual)
+    sender, recipient = cross_shard_pair(router)
+
+    service.transfer(accounts[sender], recipient, 250)
+
+    assert router.load_account(sender).balance == 750
+    assert router.load_account(recipient).balance == 1250
+    assert [row.type for row in router.query_history(recipient)[0]] == ["TRANSFER_IN"]
+    assert router.recover() == Recovery(0, 0)
+    assert router.verify_summary() == []
+    assert dual.verify_mirror() == []
+
+
+def test_failed_prepare_rolls_back_every_shard(router, monkeypatch):
+    dual = DualStorage(mirror="journal", db=router)
+    accounts = dual.load_accounts()
+    service = BankService(accounts, dual)
+    by_shard = {router.shard_of(name): name for name in NAMES}
+    # The lowest shard coordinates and never prepares; the highest fails to
+    sender, recipient = by_shard[min(by_shard)], by_shard[max(by_shard)]
+
+    prepare = db_storage.prepare_batch
+
+    def failing_prepare(xid, coordinator, accs, tx_rows):
+        if any(acc.name == recipient for acc in accs):
+            raise sqlite3.OperationalError("disk I/O error")
+        prepare(xid, coordinator, accs, tx_rows)
+
+    monkeypatch.setattr(db_storage, "prepare_batch", failing_prepare)
+    with pytest.raises(sqlite3.OperationalError):
+        service.transfer(accounts[sender], recipient, 250)
+    assert accounts[sender].balance == 1000
+
+    # Shards in between prepared successfully: their parts are dropped too
+    with pytest.raises(sqlite3.OperationalError):
+        router.write_batch([bank.restore(name, "pw", 0) for name in by_shard.values()], [])
+
+    assert router.load_totals() == (len(NAMES), 1000 * len(NAMES))
+    assert router.query_history(sender)[0] == []
+    assert router.run_all(db_storage.load_prepared) == [[]] * SHARDS
+
+
+def test_restart_finishes_decided_batches(router, monkeypatch):
+    sender, recipient = cross_shard_pair(router)
+    # The process dies right after the commit point
+    monkeypatch.setattr(ShardRouter, "_finish", lambda *args: None)
+    router.write_batch(
+        [bank.restore(sender, "pw", 750), bank.restore(recipient, "pw", 1250)],
+        [(sender, "TRANSFER_OUT", 250, None), (recipient, "TRANSFER_IN", 250, None)])
+    assert router.load_totals() != (len(NAMES), 1000 * len(NAMES))
+    router.close()
+
+    reopened = ShardRouter(SHARDS)
+    assert reopened.recovered == Recovery(committed=1, rolled_back=0)
+    assert reopened.load_account(sender).balance == 750
+    assert reopened.load_account(recipient).balance == 1250
+    assert reopened.load_totals() == (len(NAMES), 1000 * len(NAMES))
+    assert reopened.run_all(db_storage.load_decisions) == [{}] * SHARDS
+    reopened.close()
+
+
+def test_failed_finish_is_applied_before_newer_writes(router, monkeypatch):
+    by_shard = {router.shard_of(name): name for name in NAMES}
+    # The recipient's shard is not the coordinator, so it applies its part last
+    sender, recipient = by_shard[min(by_shard)], by_shard[max(by_shard)]
+    commit_prepared = db_storage.commit_prepared
+    monkeypatch.setattr(db_storage, "commit_prepared", failing(sqlite3.OperationalError))
+
+    # Committed at the decision: the caller is not told about the failure
+    router.write_batch(
+        [bank.restore(sender, "pw", 750), bank.restore(recipient, "pw", 1250)],
+        [(sender, "TRANSFER_OUT", 250, None), (recipient, "TRANSFER_IN", 250, None)])
+    assert router.load_account(recipient).balance == 1000
+
+    # The recipient's shard takes no writes until its part lands
+    with pytest.raises(sqlite3.OperationalError):
+        router.upsert_account(bank.restore(recipient, "pw", 1300))
+    monkeypatch.setattr(db_storage, "commit_prepared", commit_prepared)
+    router.upsert_account(bank.restore(recipient, "pw", 1300))
+    router.close()
+
+    reopened = ShardRouter(SHARDS)
+    assert reopened.recovered == Recovery(0, 0)
+    assert reopened.load_account(recipient).balance == 1300
+    assert reopened.query_history(recipient)[0][0].type == "TRANSFER_IN"
+    reopened.close()
+
+
+def test_restart_rolls_back_undecided_batches(router):
+    sender, recipient = cross_shard_pair(router)
+    # Both shards prepared, then the process died before deciding
+    for name, balance in ((sender, 0), (recipient, 2000)):
+        router.run(router.shard_of(name), db_storage.prepare_batch, "x1",
+                   router.shard_of(sender), [bank.restore(name, "pw", balance)], [])
+    router.close()
+
+    reopened = ShardRouter(SHARDS)
+    assert reopened.recovered == Recovery(committed=0, rolled_back=1)
+    assert reopened.load_account(sender).balance == 1000
+    assert reopened.load_account(recipient).balance == 1000
+    reopened.close()
+
+
+def test_name_search_spans_shards(router):
+    dual = DualStorage(db=router)
+    service = BankService(dual.open_accounts(), dual)
+
+    assert service.find_accounts("") == sorted(NAMES)
+    assert service.suggest_accounts("Frnak") == ["Frank"]
+
+
+def test_ledger_scans_span_shards(router):
+    deposits = [(name, "DEPOSIT", (i + 1) * 10, None) for i, name in enumerate(NAMES)]
+    router.write_batch([], deposits + deposits[:2])
+
+    chunks = list(router.iter_ledger(("account_name", "amount"), chunk_rows=3))
+    assert [len(rows) for rows in chunks] == [3, 3, 2]
+    assert [row for rows in chunks for row in rows] == sorted(
+        (name, amount) for name, _, amount, _ in deposits + deposits[:2])
+
+    pytest.importorskip("numpy")
+    top = analytics.top_accounts(2, db=router)
+    assert [(t.account, t.volume) for t in top] == [("Frank", 60), ("Eve", 50)]
+    assert analytics.running_balance("Bob", db=router).balances.tolist() == [980, 1000]
+
+
+def test_password_migration_spans_shards(router):
+    hasher = PasswordHasher(offload=False)
+
+    assert hash_passwords.hash_existing_passwords(
+        batch_size=4, hasher=hasher, report=lambda *_: None, db=router) == len(NAMES)
+    for name in NAMES:
+        assert passwords.verify_password("pw", router.load_password(name))
+
+
+def test_shard_count_is_fixed_per_directory(router):
+    router.close()
+    with pytest.raises(ValueError, match="not shard 0 of 2"):
+        ShardRouter(2)
+
+
+def test_group_durability_is_rejected(data_dir, monkeypatch):
+    monkeypatch.setattr(db_storage, "DURABILITY", "group")
+    with pytest.raises(ValueError, match="strict' or 'relaxed"):
+        ShardRouter(2)
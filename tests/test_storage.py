@@ -0,0 +1,83 @@
+import json
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app.services import storage
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    path = tmp_path / "accounts.json"
+    monkeypatch.setattr(storage, "DATA_FILE", path)
+    return path
+
+
+def test_journal_is_replayed_on_top_of_snapshot(data_file):
+    alice = bank("Alice", "pw", 10)
+    bob = bank("Bob", "pw", 0)
+    storage.save_data({"Alice": alice, "Bob": bob})
+
+    alice.deposit(5)
+    storage.journal_accounts([alice])
+    storage.journal_delete("Bob")
+
+    loaded = storage.load_data()
+
+    assert sorted(loaded) == ["Alice"]
+    assert loaded["Alice"].balance == 15
+
+
+def test_compact_folds_journal_into_snapshot(data_file):
+    storage.journal_accounts([bank("Alice", "pw", 7)])
+
+    storage.compact()
+
+    assert not storage.journal_file().exists()
+    assert json.loads(data_file.read_text())["Alice"]["balance_cents"] == 7
+    assert storage.load_data()["Alice"].balance == 7
+
+
+def test_torn_journal_line_is_ignored(data_file):
+    storage.journal_accounts([bank("Alice", "pw", 3)])
+    with open(storage.journal_file(), "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "name": "Bo')
+
+    assert sorted(storage.load_data()) == ["Alice"]
+
+
+def test_legacy_text_history_is_loaded_as_records(data_file):
+    data_file.write_text(json.dumps({"Old": {
+        "name": "Old", "password": "pw", "balance": 1.5,
+        "history": ["Deposited: $1.5. New balance: $1.5."]}}))
+
+    acc = storage.load_data()["Old"]
+
+    assert acc.balance == 150
+    assert str(acc.history[0]) == "NOTE | Deposited: $1.5. New balance: $1.5."
+
+
+def test_legacy_dollar_records_are_converted_to_cents(data_file):
+    data_file.write_text(json.dumps({"Old": {
+        "name": "Old", "password": "pw", "balance": 0.3,
+        "history": [["DEPOSIT", 0.1, 0, None], ["DEPOSIT", 0.2, 0, None]]}}))
+
+    acc = storage.load_data()["Old"]
+
+    assert acc.balance == 30
+    assert [e.amount for e in acc.history] == [10, 20]
+
+
+def test_iter_snapshot_streams_in_small_chunks(data_file):
+    accounts = {f"user{i}": bank(f"user{i}", "pw", i) for i in range(20)}
+    storage.save_data(accounts)
+
+    streamed = dict(storage.iter_snapshot(chunk_size=7))
+
+    assert streamed == json.loads(data_file.read_text())
+
+
+def test_iter_data_applies_journal(data_file):
+    storage.save_data({"Alice": bank("Alice", "pw", 1), "Bob": bank("Bob", "pw", 2)})
+    storage.journal_delete("Bob")
+    storage.journal_accounts([bank("Cara", "pw", 3)])
+
+    assert [name for name, _ in storage.iter_data()] == ["Alice", "Cara"]
@@ -0,0 +1,162 @@
+import sqlite3
+import threading
+import pytest
+from bank_project.account import bank
+from bank_project.bank_app import verify_mirror
+from bank_project.bank_app.services import db_storage, merkle, storage
+from bank_project.bank_app.services.bank_service import BankService
+from bank_project.bank_app.services.dual_storage import DualStorage
+
+
+def quiet(*_):
+    pass
+
+
+def seeded(mirror):
+    dual = DualStorage(mirror=mirror)
+    accounts = {}
+    service = BankService(accounts)
+    for name in ("Alice", "Bob", "Carol"):
+        service.deposit(service.create_account(name, "pw"), 100)
+    dual.flush(accounts, service.take_dirty())
+    return dual, accounts, service
+
+
+def expected_tree():
+    tree = merkle.MerkleTree()
+    for name, password, balance in db_storage.get_conn().execute(
+            "SELECT name, password, balance_cents FROM accounts"):
+        tree.add(merkle.bucket_of(name), merkle.leaf(name, password, balance))
+    return tree
+
+
+@pytest.mark.parametrize("mirror", ["snapshot", "journal"])
+def test_stores_in_sync_verify_clean(data_dir, mirror):
+    dual, accounts, service = seeded(mirror)
+    service.withdraw(accounts["Bob"], 40)
+    dual.flush(accounts, service.take_dirty())
+    del accounts["Carol"]
+    dual.delete_account("Carol", accounts)
+
+    assert dual.verify_mirror() == []
+    dual.close()
+
+
+def test_lists_only_drifted_accounts(data_dir):
+    dual, accounts, _ = seeded("journal")
+    db_storage.upsert_account(bank.restore("Alice", accounts["Alice"].password, 999))
+    db_storage.delete_account("Bob")
+    storage.journal_delete("Carol")
+    db_storage.upsert_account(bank.restore("Dan", "pw", 0))
+
+    assert dual.verify_mirror() == [
+        merkle.Divergence("Alice", merkle.DIFFERS),
+        merkle.Divergence("Bob", merkle.MISSING_FROM_DB),
+        merkle.Divergence("Carol", merkle.MISSING_FROM_MIRROR),
+        merkle.Divergence("Dan", merkle.MISSING_FROM_MIRROR),
+    ]
+    dual.close()
+
+
+def test_new_process_reuses_saved_digests(data_dir, monkeypatch):
+    dual, _, _ = seeded("journal")
+    dual.close()
+
+    # A fresh process has no live tree; unchanged files mean no mirror scan
+    monkeypatch.setattr(storage, "_digests", None)
+    monkeypatch.setattr(storage, "iter_data", None)
+    assert verify_mirror.verify(report=quiet) == []
+
+
+def test_saved_digests_ignored_once_mirror_changes(data_dir, monkeypatch):
+    dual, _, _ = seeded("snapshot")
+    dual.close()
+    monkeypatch.setattr(storage, "_digests", None)
+
+    # Another process edits the mirror without updating the checksum file
+    raw = storage._read_snapshot()
+    raw["Alice"]["balance_cents"] = 1
+    storage._write_snapshot(raw)
+
+    assert verify_mirror.verify(report=quiet) == [
+        merkle.Divergence("Alice", merkle.DIFFERS)]
+
+
+def test_journal_writes_read_only_their_buckets(data_dir, monkeypatch):
+    dual, accounts, service = seeded("journal")
+    storage.mirror_tree()
+    service.withdraw(accounts["Bob"], 40)
+    dual.flush(accounts, service.take_dirty())
+    del accounts["Carol"]
+    dual.delete_account("Carol", accounts)
+
+    # Neither the tree nor a drifted bucket needs a pass over the mirror
+    monkeypatch.setattr(storage, "iter_data", None)
+    assert storage.mirror_tree().buckets == expected_tree().buckets
+    db_storage.upsert_account(bank.restore("Alice", accounts["Alice"].password, 1))
+    assert dual.verify_mirror() == [merkle.Divergence("Alice", merkle.DIFFERS)]
+    dual.close()
+
+
+def test_write_paths_keep_bucket_digests_current(data_dir):
+    db_storage.upsert_accounts(bank.restore(f"user{i}", "pw", i) for i in range(200))
+    db_storage.upsert_account(bank.restore("user3", "pw", 1234))
+    db_storage.write_batch([bank.restore("user4", "pw", 0), bank.restore("user9", "pw", 50)],
+                           [("user4", "WITHDRAW", 4, None)])
+    assert db_storage.replace_passwords([("new", "user5", "pw"), ("new", "user6", "stale")]) == 1
+    db_storage.post_end_of_day("2026-01-02", [(0, 36500)], fee_cents=1, fee_waiver_balance=100)
+    db_storage.delete_account("user7")
+
+    assert db_storage.load_merkle_tree().buckets == expected_tree().buckets
+
+
+def test_database_needs_no_custom_sql_functions(data_dir):
+    seeded("journal")[0].close()
+
+    # Other SQLite clients (the sqlite3 shell, backups) can check and write it
+    conn = sqlite3.connect(data_dir / "bank.db")
+    try:
+        assert conn.execute("PRAGMA integrity_check").fetchall() == [("ok",)]
+        conn.execute("UPDATE accounts SET balance_cents = 0 WHERE name = 'Alice'")
+        conn.execute("DELETE FROM accounts WHERE name = 'Bob'")
+    finally:
+        conn.close()
+
+
+def test_diff_descends_only_into_changed_subtrees():
+    ours, theirs = merkle.MerkleTree(), merkle.MerkleTree()
+    assert ours.diff(theirs) == []
+
+    theirs.add(5, 1)
+    theirs.add(4000, 2)
+    assert ours.diff(theirs) == [5, 4000]
+    assert ours.root() != theirs.root()
+
+
+def test_concurrent_upserts_keep_bucket_digests_current(data_dir):
+    db_storage.upsert_account(bank.restore("Alice", "pw", 0))
+
+    def worker(offset):
+        for i in range(100):
+            db_storage.upsert_accounts([bank.restore("Alice", "pw", offset * 1000 + i)])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert db_storage.verify_merkle() == []
+
+
+def test_repair_rebuilds_stored_bucket_digests(data_dir):
+    seeded("journal")[0].close()
+    bucket = merkle.bucket_of("Alice")
+    with db_storage.get_conn() as conn:
+        conn.execute("UPDATE merkle_buckets SET digest = 1 WHERE bucket = ?", (bucket,))
+
+    assert db_storage.verify_merkle() == [
+        f"checksum bucket {bucket}: stored 1, actual {expected_tree().buckets[bucket]}"]
+    assert verify_mirror.verify(report=quiet, repair=True) == []
+    assert db_storage.verify_merkle() == []
+    assert db_storage.load_merkle_tree().root() == storage.mirror_tree().root()